@@ -0,0 +1,122 @@
+"""JWT z claimem ról (accounts.roles): wystawianie, odświeżanie i uwierzytelnianie.
+
+Uwierzytelnianie nie czyta wiersza users przy każdym żądaniu: pola użytkownika (bez
+hasła – odroczone, doczytywane dopiero przy dostępie) trzymane są w cache przez
+AUTH_USER_CACHE_TTL sekund, a role pochodzą z claimu tokenu. Ciepłe żądanie to zero
+zapytań uwierzytelniania. Wpis usuwają sygnały accounts.signals przy każdym zapisie
+i usunięciu użytkownika (zmiana is_active, UserViewSet.destroy, reset hasła przez
+AdminPasswordResetSerializer); zmiany przez QuerySet.update() omijają sygnały i są
+widoczne po TTL. AUTH_USER_CACHE_TTL=0 – użytkownik zawsze z bazy.
+
+Sprawdzenie czarnej listy przy odświeżeniu korzysta z negatywnego cache accounts.tokens.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.roles import ROLES_CLAIM, load_roles, remember_roles, role_claims_enabled, user_roles
+from accounts.tokens import is_known_not_blacklisted, remember_not_blacklisted
+
+USER_CACHE_KEY = "auth:user:{user_id}"
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token, którego access token niesie aktualne role użytkownika."""
+
+    _roles_current = False
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        if role_claims_enabled():
+            token[ROLES_CLAIM] = list(user_roles(user))
+            token._roles_current = True
+        return token
+
+    @property
+    def access_token(self):
+        if role_claims_enabled() and not self._roles_current:
+            # Odświeżenie: role z bazy, nie z refresh tokena wystawionego przy logowaniu.
+            self[ROLES_CLAIM] = list(load_roles(self[api_settings.USER_ID_CLAIM]))
+            self._roles_current = True
+        return super().access_token
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if is_known_not_blacklisted(jti):
+            return
+        super().check_blacklist()
+        remember_not_blacklisted(jti)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleRefreshToken
+
+
+def _cached_fields(model):
+    return [field.attname for field in model._meta.concrete_fields if field.attname != "password"]
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+
+def cached_user(user_id):
+    """(użytkownik, skrót hasła) z cache albo jednym zapytaniem; brak – DoesNotExist.
+
+    Skrót hasła (md5 jak w simplejwt) trzymany jest tylko dla CHECK_REVOKE_TOKEN.
+    """
+    model = get_user_model()
+    timeout = getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+    fields = _cached_fields(model)
+    key = USER_CACHE_KEY.format(user_id=user_id)
+    entry = cache.get(key) if timeout else None
+    if entry is None:
+        user = model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        revoke_hash = (
+            get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None
+        )
+        if timeout:
+            values = [getattr(user, name) for name in fields]
+            cache.set(key, (values, revoke_hash), timeout=timeout)
+        return user, revoke_hash
+    values, revoke_hash = entry
+    # Instancja jak z bazy; pole password odroczone (doczytane przy pierwszym dostępie).
+    return model.from_db(model.objects.db, fields, values), revoke_hash
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication z użytkownikiem z cache i rolami z claimu tokenu."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        try:
+            user, revoke_hash = cached_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != revoke_hash
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+        roles = validated_token.get(ROLES_CLAIM)
+        if roles is not None and role_claims_enabled():
+            remember_roles(user, roles)
+        return user
@@ -0,0 +1,57 @@
+"""Haszowanie haseł: PBKDF2 z konfigurowalną liczbą iteracji i przehaszowanie w tle.
+
+TunablePBKDF2PasswordHasher (pierwszy w PASSWORD_HASHERS) to PBKDF2-SHA256 z liczbą
+iteracji z AUTH_PBKDF2_ITERATIONS (domyślnie wartość Django). Hasz zapisuje swoją liczbę
+iteracji, więc stare hasła weryfikują się bez zmian, a przy logowaniu hasher zgłasza
+must_update i hasło jest przehaszowane do bieżącej konfiguracji.
+
+Django robi to synchronicznie w check_password – drugie pełne haszowanie w żądaniu
+logowania. Z AUTH_LOGIN_BACKGROUND_REHASH=1 check_password_with_rehash przenosi je do
+wątku w tle (po commicie), a odpowiedź wraca po jednym haszowaniu. Hasło jawne nie
+opuszcza procesu (bez kolejki Celery).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-rehash")
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 z liczbą iteracji z ustawień (algorytm i format hasza bez zmian)."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, "AUTH_PBKDF2_ITERATIONS", None) or super().iterations
+
+
+def _rehash(user_id, raw_password):
+    close_old_connections()
+    try:
+        user = get_user_model().objects.get(pk=user_id)
+        # Hasło mogło się zmienić w międzyczasie – przehaszowanie tylko tego samego.
+        if check_password(raw_password, user.password):
+            user.set_password(raw_password)
+            user.save(update_fields=["password"])
+    except Exception:
+        logger.exception("Przehaszowanie hasła użytkownika %s nie powiodło się", user_id)
+    finally:
+        close_old_connections()
+
+
+def check_password_with_rehash(user, raw_password):
+    """user.check_password z przehaszowaniem w tle (AUTH_LOGIN_BACKGROUND_REHASH)."""
+    if not getattr(settings, "AUTH_LOGIN_BACKGROUND_REHASH", False):
+        return user.check_password(raw_password)
+
+    def setter(raw):
+        transaction.on_commit(lambda: _executor.submit(_rehash, user.pk, raw))
+
+    return check_password(raw_password, user.password, setter)
@@ -0,0 +1,83 @@
+"""
+Benchmark: wyszukanie użytkownika przy logowaniu – email__iexact vs User.objects.by_email.
+
+Uruchomienie: python manage.py bench_login
+              python manage.py bench_login --users 200000 --samples 200 --logins 5
+
+Użytkownicy są tworzeni w transakcji (bulk_create, jeden wspólny hash hasła) i wycofywani
+na końcu. Mierzona jest mediana czasu wyszukania po e-mailu (oba warianty, losowe adresy
+w różnej wielkości liter), plan zapytania oraz mediana pełnego POST /api/auth/login –
+ten ostatni zdominowany jest przez haszowanie hasła (PBKDF2), nie przez wyszukanie.
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+PASSWORD = "bench-login-pass"
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _median_ms(fn, args):
+    timings = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = "Porównuje wyszukanie użytkownika po e-mailu (iexact vs indeks LOWER(email))."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--samples", type=int, default=100)
+        parser.add_argument("--logins", type=int, default=3, help="Pełnych logowań przez API.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        password = make_password(PASSWORD)
+        emails = [f"bench-login-{i}@example.com" for i in range(options["users"])]
+        User.objects.bulk_create(
+            (User(username=email, email=email, password=password) for email in emails),
+            batch_size=5000,
+        )
+        sample = [random.choice(emails).upper() for _ in range(options["samples"])]
+
+        iexact_ms = _median_ms(lambda email: User.objects.get(email__iexact=email), sample)
+        indexed_ms = _median_ms(lambda email: User.objects.by_email(email).get(), sample)
+        self.stdout.write(f"użytkownicy: {options['users']:,}  próbki: {len(sample)}")
+        self.stdout.write(f"email__iexact:      {iexact_ms:8.3f} ms")
+        self.stdout.write(
+            f"by_email (indeks):  {indexed_ms:8.3f} ms  x{iexact_ms / indexed_ms:.1f}"
+        )
+        self.stdout.write("plan by_email: " + User.objects.by_email(sample[0]).explain())
+
+        client = APIClient()
+        login_ms = _median_ms(
+            lambda email: client.post(
+                "/api/auth/login", {"email": email, "password": PASSWORD}, format="json"
+            ),
+            sample[: options["logins"]],
+        )
+        self.stdout.write(f"POST /api/auth/login: {login_ms:8.1f} ms (w tym haszowanie hasła)")
@@ -0,0 +1,52 @@
+"""
+Usuwa wygasłe refresh tokeny z tabel token_blacklist (OutstandingToken, BlacklistedToken).
+
+Uruchomienie: python manage.py prune_tokens
+              python manage.py prune_tokens --batch-size 5000 --pause 0.1
+              python manage.py prune_tokens --dry-run
+
+Usuwanie partiami po id, każda partia we własnej krótkiej transakcji; --pause daje
+replikacji i autovacuum czas między partiami. To samo robi zadanie Celery
+accounts.tasks.prune_tokens (Celery Beat, co godzinę).
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.tokens import DEFAULT_BATCH_SIZE, prune_expired_tokens, token_table_sizes
+
+
+class Command(BaseCommand):
+    help = "Usuwa wygasłe refresh tokeny (outstanding + blacklisted) partiami."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--pause", type=float, default=0, help="Sekundy między partiami.")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Tylko rozmiary tabel i liczba wygasłych."
+        )
+
+    def handle(self, *args, **options):
+        sizes = token_table_sizes()
+        self.stdout.write(
+            f"outstanding: {sizes['outstanding']:,}  blacklisted: {sizes['blacklisted']:,}"
+        )
+        if options["dry_run"]:
+            expired = OutstandingToken.objects.filter(expires_at__lt=timezone.now()).count()
+            self.stdout.write(f"wygasłe do usunięcia: {expired:,}")
+            return
+        stats = prune_expired_tokens(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"usunięto outstanding: {stats['outstanding']:,}  "
+                f"blacklisted: {stats['blacklisted']:,}  partie: {stats['batches']}  "
+                f"{stats['seconds']} s ({stats['rate_per_s']:,} wierszy/s)"
+            )
+        )
@@ -0,0 +1,73 @@
+"""Unikalny indeks funkcyjny LOWER(email) (users_email_lower_uniq) + UserManager.by_email.
+
+PostgreSQL: CREATE UNIQUE INDEX CONCURRENTLY – bez blokady zapisu do users na czas
+budowy indeksu (dlatego migracja nie jest atomowa). Inne bazy: zwykłe AddConstraint.
+Przed utworzeniem indeksu migracja sprawdza duplikaty różniące się wielkością liter
+i przerywa się z listą adresów do ręcznego scalenia.
+"""
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+import accounts.models
+
+INDEX_NAME = "users_email_lower_uniq"
+
+CONSTRAINT = models.UniqueConstraint(Lower("email"), condition=~models.Q(email=""), name=INDEX_NAME)
+
+
+def check_duplicates(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    duplicates = list(
+        User.objects.exclude(email="")
+        .values(email_lower=Lower("email"))
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("email_lower", flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Adresy e-mail różniące się tylko wielkością liter – scal konta przed migracją: "
+            + ", ".join(duplicates)
+        )
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+            "ON users (LOWER(email)) WHERE NOT (email = '')"
+        )
+        return
+    schema_editor.add_constraint(apps.get_model("accounts", "User"), CONSTRAINT)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+        return
+    schema_editor.remove_constraint(apps.get_model("accounts", "User"), CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", accounts.models.UserManager()),
+            ],
+        ),
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddConstraint(model_name="user", constraint=CONSTRAINT)],
+            database_operations=[migrations.RunPython(create_index, drop_index)],
+        ),
+    ]
@@ -1,13 +1,42 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class UserManager(BaseUserManager):
+    def by_email(self, email):
+        """Użytkownicy o danym e-mailu bez względu na wielkość liter.
+
+        Warunek LOWER(email) = ... AND NOT email = '' pokrywa się z indeksem
+        users_email_lower_uniq (funkcyjny, częściowy), więc jest wyszukaniem w indeksie,
+        a nie skanem tabeli jak email__iexact (UPPER(...) na PostgreSQL).
+        """
+        return (
+            self.get_queryset()
+            .alias(email_lower=Lower("email"))
+            .filter(email_lower=(email or "").lower())
+            .exclude(email="")
+        )
 
 
 class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserManager()
+
     class Meta:
         db_table = "users"
+        constraints = [
+            # Jeden użytkownik na adres e-mail (bez względu na wielkość liter); puste
+            # adresy (konta bez e-maila, np. createsuperuser) nie podlegają ograniczeniu.
+            models.UniqueConstraint(
+                Lower("email"),
+                condition=~models.Q(email=""),
+                name="users_email_lower_uniq",
+            ),
+        ]
 
 
 class Role(models.Model):
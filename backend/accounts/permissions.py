@@ -1,12 +1,11 @@
 from rest_framework import permissions
 
-from accounts.models import Role
+from accounts.roles import ADMIN, has_role
 
 
 def _has_role_admin(user):
-    if not user or not user.is_authenticated:
-        return False
-    return Role.objects.filter(name="admin", userrole__user=user).exists()
+    # Role raz na żądanie (albo z claimu tokenu) – accounts.roles.
+    return has_role(user, ADMIN)
 
 
 class IsAdmin(permissions.BasePermission):
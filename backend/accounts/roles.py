@@ -0,0 +1,98 @@
+"""Role użytkownika: jedno zapytanie na żądanie albo claim "roles" z tokenu JWT.
+
+Nazwy ról zapamiętywane są na obiekcie użytkownika (request.user żyje tyle co żądanie),
+więc IsAdmin.has_permission, has_object_permission i UserProfileSerializer.get_roles
+dzielą jedno zapytanie. Gdy access token niesie podpisany claim "roles"
+(accounts.authentication), zapytania nie ma wcale; stare tokeny bez claimu korzystają
+z odczytu z bazy.
+
+Claim odświeżany jest przy każdym /api/auth/refresh – zmiana ról
+(UserUpdateSerializer.update) działa najpóźniej po ACCESS_TOKEN_LIFETIME.
+Wyłączenie: JWT_ROLE_CLAIMS=0 (claim ignorowany i niewystawiany).
+
+Listy użytkowników (panel admina) dostają role w tym samym zapytaniu: with_roles()
+dodaje EXISTS dla roli admin i nazwy ról złączone agregatem w podzapytaniu.
+"""
+
+from django.conf import settings
+from django.db.models import Aggregate, CharField, Exists, OuterRef, Subquery
+
+from accounts.models import Role, UserRole
+
+ROLES_CLAIM = "roles"
+ADMIN = "admin"
+
+_CACHE_ATTR = "_role_names"
+
+
+def role_claims_enabled():
+    return getattr(settings, "JWT_ROLE_CLAIMS", True)
+
+
+def load_roles(user_id):
+    """Nazwy ról użytkownika z bazy (kolejność przypisania ról)."""
+    return tuple(
+        Role.objects.filter(userrole__user_id=user_id).order_by("id").values_list("name", flat=True)
+    )
+
+
+def user_roles(user):
+    """Nazwy ról użytkownika – z pamięci obiektu, claimu tokenu albo jednym zapytaniem."""
+    if not user or not user.is_authenticated:
+        return ()
+    roles = getattr(user, _CACHE_ATTR, None)
+    if roles is None:
+        roles = load_roles(user.pk)
+        remember_roles(user, roles)
+    return roles
+
+
+def remember_roles(user, roles):
+    setattr(user, _CACHE_ATTR, tuple(roles))
+
+
+def forget_roles(user):
+    """Po zmianie ról: kolejne user_roles(user) odczyta je z bazy."""
+    user.__dict__.pop(_CACHE_ATTR, None)
+
+
+def has_role(user, name):
+    return name in user_roles(user)
+
+
+class _GroupConcat(Aggregate):
+    """Nazwy złączone przecinkiem: GROUP_CONCAT (SQLite) / STRING_AGG (PostgreSQL)."""
+
+    function = "GROUP_CONCAT"
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            function="STRING_AGG",
+            template="%(function)s(%(distinct)s%(expressions)s, ',')",
+            **extra_context,
+        )
+
+
+def with_roles(queryset):
+    """Użytkownicy z adnotacjami is_admin (EXISTS) i role_names – bez zapytań per wiersz."""
+    user_roles_qs = UserRole.objects.filter(user=OuterRef("pk"))
+    names = (
+        user_roles_qs.order_by()
+        .values("user")
+        .annotate(names=_GroupConcat("role__name"))
+        .values("names")
+    )
+    return queryset.annotate(
+        is_admin=Exists(user_roles_qs.filter(role__name=ADMIN)),
+        role_names=Subquery(names, output_field=CharField()),
+    )
+
+
+def annotated_roles(user):
+    """Role z adnotacji with_roles() (posortowane) albo – bez adnotacji – user_roles()."""
+    if not hasattr(user, "role_names"):
+        return list(user_roles(user))
+    return sorted(user.role_names.split(",")) if user.role_names else []
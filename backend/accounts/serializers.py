@@ -3,7 +3,9 @@ from django.contrib.auth.password_validation import validate_password
 
 from rest_framework import serializers
 
+from accounts.hashers import check_password_with_rehash
 from accounts.models import Role, UserRole
+from accounts.roles import ADMIN, annotated_roles, forget_roles, has_role, user_roles
 
 User = get_user_model()
 
@@ -16,10 +18,10 @@ class LoginSerializer(serializers.Serializer):
         email = data.get("email")
         password = data.get("password")
         try:
-            user = User.objects.get(email__iexact=email)
+            user = User.objects.by_email(email).get()
         except User.DoesNotExist:
             raise serializers.ValidationError({"email": "Nieprawidłowy adres e-mail lub hasło."})
-        if not user.check_password(password):
+        if not check_password_with_rehash(user, password):
             raise serializers.ValidationError({"email": "Nieprawidłowy adres e-mail lub hasło."})
         if not user.is_active:
             raise serializers.ValidationError({"email": "Konto jest nieaktywne."})
@@ -35,7 +37,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ("id", "email", "first_name", "last_name", "roles")
 
     def get_roles(self, obj):
-        return list(Role.objects.filter(userrole__user=obj).values_list("name", flat=True))
+        return list(user_roles(obj))
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -46,7 +48,7 @@ class RegisterSerializer(serializers.Serializer):
     last_name = serializers.CharField(required=False, allow_blank=True, default="")
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.by_email(value).exists():
             raise serializers.ValidationError("Użytkownik z tym adresem e-mail już istnieje.")
         return value.lower()
 
@@ -78,13 +80,29 @@ class UserListSerializer(serializers.ModelSerializer):
     """Serializer dla listy użytkowników (admin)."""
 
     is_admin = serializers.SerializerMethodField()
+    roles = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ("id", "email", "first_name", "last_name", "is_admin", "last_login", "created_at")
+        fields = (
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "is_admin",
+            "roles",
+            "last_login",
+            "created_at",
+        )
 
     def get_is_admin(self, obj):
-        return Role.objects.filter(userrole__user=obj, name="admin").exists()
+        # Adnotacja accounts.roles.with_roles (lista) – bez zapytania per użytkownik.
+        if hasattr(obj, "is_admin"):
+            return obj.is_admin
+        return has_role(obj, ADMIN)
+
+    def get_roles(self, obj):
+        return annotated_roles(obj)
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
@@ -119,7 +137,7 @@ class UserCreateSerializer(serializers.Serializer):
     is_admin = serializers.BooleanField(required=False, default=False)
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.by_email(value).exists():
             raise serializers.ValidationError("Użytkownik z tym adresem e-mail już istnieje.")
         return value.lower()
 
@@ -155,7 +173,7 @@ class UserUpdateSerializer(serializers.Serializer):
     is_admin = serializers.BooleanField(required=False)
 
     def validate_email(self, value):
-        if self.instance and User.objects.filter(email__iexact=value).exclude(id=self.instance.id).exists():
+        if self.instance and User.objects.by_email(value).exclude(id=self.instance.id).exists():
             raise serializers.ValidationError("Użytkownik z tym adresem e-mail już istnieje.")
         return value.lower() if value else value
 
@@ -178,6 +196,8 @@ class UserUpdateSerializer(serializers.Serializer):
                 UserRole.objects.get_or_create(user=instance, role=admin_role)
             else:
                 UserRole.objects.filter(user=instance, role=admin_role).delete()
+            # Nowe role trafią do tokenu przy najbliższym /api/auth/refresh.
+            forget_roles(instance)
 
         return instance
 
@@ -0,0 +1,25 @@
+"""Unieważnianie cache uwierzytelniania (accounts.authentication, accounts.tokens)."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from accounts.authentication import invalidate_cached_user
+from accounts.models import User
+from accounts.tokens import forget_not_blacklisted
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Teraz i po commicie – odczyt w trakcie transakcji nie utrwali starego wiersza.
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def forget_blacklisted_token(sender, instance, **kwargs):
+    forget_not_blacklisted(instance.token.jti)
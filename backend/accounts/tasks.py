@@ -0,0 +1,14 @@
+"""Zadania Celery: sprzątanie tabel token_blacklist."""
+
+from celery import shared_task
+
+from accounts.tokens import prune_expired_tokens
+
+
+@shared_task
+def prune_tokens(batch_size=1000, max_batches=None):
+    """Usuwa wygasłe refresh tokeny partiami (accounts.tokens.prune_expired_tokens).
+
+    Uruchamiane z Celery Beat co godzinę; metryki w logu "prune_tokens".
+    """
+    return prune_expired_tokens(batch_size=batch_size, max_batches=max_batches)
@@ -0,0 +1,98 @@
+"""Token bucket dla logowania i rejestracji: per IP i per adres e-mail.
+
+Każde logowanie to pełne PBKDF2 (setki ms CPU); seria ponowień SPA albo credential
+stuffing zajmuje wszystkie workery. Throttle działa w APIView.initial – przed
+serializerem – więc odrzucona próba kosztuje odczyt i zapis jednego klucza w cache,
+bez haszowania hasła. Odpowiedź 429 z nagłówkiem Retry-After.
+
+Kubełek: pojemność N żetonów, uzupełniany w tempie N na okres (AUTH_THROTTLE_RATES,
+format DRF "N/okres": "30/min"). Stan (żetony, czas) trzymany jest w domyślnym cache –
+bez Redisa działa LocMem (per proces) albo DatabaseCache (wspólny dla workerów,
+CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache). Odczyt i zapis nie są
+atomowe między procesami: przy równoległych próbach limit jest przybliżony, nie luźniejszy
+niż liczba workerów × pojemność.
+
+Klucz e-mail to skrót adresu (bez danych osobowych w cache); brak e-maila w body – bez
+limitu per e-mail (limit per IP nadal obowiązuje).
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.throttling import BaseThrottle
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """Limit w formacie "N/okres" → (pojemność, żetony na sekundę); None – bez limitu.
+
+    Okres rozpoznawany po pierwszej literze, jak w DRF SimpleRateThrottle.parse_rate
+    ("30/m", "30/min", "30/minute").
+    """
+    if not rate:
+        return None
+    count, _, period = rate.partition("/")
+    return int(count), int(count) / _PERIODS[period.strip()[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Bazowy throttle token bucket; podklasy ustawiają scope i get_bucket_key()."""
+
+    scope = None
+    cache_format = "throttle:bucket:{scope}:{key}"
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_rate(self):
+        return parse_rate(getattr(settings, "AUTH_THROTTLE_RATES", {}).get(self.scope))
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        key = self.get_bucket_key(request, view)
+        if rate is None or key is None:
+            return True
+        capacity, refill = rate
+        cache_key = self.cache_format.format(scope=self.scope, key=key)
+        now = time.time()  # czas ścienny – stan współdzielony między procesami
+        with _lock:
+            tokens, updated = cache.get(cache_key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.wait_seconds = (1 - tokens) / refill
+            # TTL: czas pełnego uzupełnienia – pełny kubełek nie musi leżeć w cache.
+            cache.set(cache_key, (tokens, now), timeout=int(capacity / refill) + 1)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = "auth_ip"
+
+    def get_bucket_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    scope = "auth_email"
+
+    def get_bucket_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()
@@ -0,0 +1,110 @@
+"""Tabele token_blacklist: przycinanie wygasłych tokenów i cache "nie na czarnej liście".
+
+Każde logowanie i rejestracja dopisuje wiersz OutstandingToken, a wylogowanie –
+BlacklistedToken; bez sprzątania obie tabele rosną bez końca. prune_expired_tokens
+usuwa tokeny z expires_at w przeszłości partiami po id (krótkie transakcje, bez długich
+blokad tabeli). Tokeny wstawiane są w kolejności wygasania (stały czas życia), więc
+najstarsze id wygasają pierwsze i skan po kluczu głównym kończy się szybko mimo braku
+indeksu na expires_at. Wygasłego tokenu i tak nie da się użyć – usunięcie jego wpisu
+z czarnej listy niczego nie odblokowuje.
+
+Negatywny cache: RefreshToken.check_blacklist to zapytanie ze złączeniem przy każdym
+odświeżeniu. W pamięci procesu trzymamy jti tokenów sprawdzonych jako niezablokowane
+przez AUTH_BLACKLIST_NEGATIVE_TTL sekund. Zablokowanie tokenu w tym procesie (sygnał
+post_save BlacklistedToken) usuwa wpis od razu; w innych procesach unieważniony token
+może działać najdłużej TTL. AUTH_BLACKLIST_NEGATIVE_TTL=0 – zawsze zapytanie.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+NEGATIVE_CACHE_MAX_SIZE = 50_000
+
+_not_blacklisted = {}
+_not_blacklisted_lock = threading.Lock()
+
+
+def _negative_ttl():
+    return getattr(settings, "AUTH_BLACKLIST_NEGATIVE_TTL", 30)
+
+
+def is_known_not_blacklisted(jti):
+    expires = _not_blacklisted.get(jti)
+    return expires is not None and expires > time.monotonic()
+
+
+def remember_not_blacklisted(jti):
+    ttl = _negative_ttl()
+    if not ttl:
+        return
+    with _not_blacklisted_lock:
+        if len(_not_blacklisted) >= NEGATIVE_CACHE_MAX_SIZE:
+            # Prosty limit pamięci: pełny cache zaczyna od zera.
+            _not_blacklisted.clear()
+        _not_blacklisted[jti] = time.monotonic() + ttl
+
+
+def forget_not_blacklisted(jti):
+    with _not_blacklisted_lock:
+        _not_blacklisted.pop(jti, None)
+
+
+def reset_negative_cache():
+    with _not_blacklisted_lock:
+        _not_blacklisted.clear()
+
+
+def token_table_sizes():
+    """Liczba wierszy obu tabel; PostgreSQL – szacunek z pg_class (bez pełnego skanu)."""
+    models = {"outstanding": OutstandingToken, "blacklisted": BlacklistedToken}
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class WHERE relname IN (%s, %s)",
+                [model._meta.db_table for model in models.values()],
+            )
+            estimates = dict(cursor.fetchall())
+        return {name: estimates.get(model._meta.db_table, 0) for name, model in models.items()}
+    return {name: model.objects.count() for name, model in models.items()}
+
+
+def prune_expired_tokens(*, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, pause=0, now=None):
+    """Usuwa wygasłe OutstandingToken (z wpisami BlacklistedToken) partiami.
+
+    Zwraca statystyki: usunięte wiersze obu tabel, liczba partii, czas, tempo (wiersze/s).
+    """
+    now = now or timezone.now()
+    stats = {"outstanding": 0, "blacklisted": 0, "batches": 0}
+    started = time.perf_counter()
+    while max_batches is None or stats["batches"] < max_batches:
+        with transaction.atomic():
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lt=now)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            stats["blacklisted"] += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            stats["outstanding"] += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        stats["batches"] += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    deleted = stats["outstanding"] + stats["blacklisted"]
+    stats["rate_per_s"] = round(deleted / stats["seconds"]) if stats["seconds"] else deleted
+    stats.update({f"{name}_total": size for name, size in token_table_sizes().items()})
+    logger.info("prune_tokens", extra=stats)
+    return stats
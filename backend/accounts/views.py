@@ -12,11 +12,12 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenBlacklistView, TokenRefreshView
 
+from accounts.authentication import RoleRefreshToken
 from accounts.models import Role, UserRole
 from accounts.permissions import IsAdmin
+from accounts.roles import with_roles
 from accounts.serializers import (
     AdminPasswordResetSerializer,
     LoginSerializer,
@@ -27,6 +28,8 @@ from accounts.serializers import (
     UserProfileSerializer,
     UserUpdateSerializer,
 )
+from accounts.throttling import AuthEmailThrottle, AuthIPThrottle
+from config.pagination import KeysetPagination
 
 User = get_user_model()
 
@@ -88,6 +91,8 @@ class TokenBlacklistDocumentedView(TokenBlacklistView):
 @extend_schema(tags=["auth"])
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    # Przed serializerem – odrzucona próba nie haszuje hasła (accounts.throttling).
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
 
     @extend_schema(
         summary="Logowanie (JWT)",
@@ -112,6 +117,7 @@ class LoginView(APIView):
                 },
             },
             400: {"description": "Błąd walidacji (np. błędne dane logowania)"},
+            429: {"description": "Za dużo prób (limit per IP / e-mail); nagłówek Retry-After"},
         },
         examples=[
             OpenApiExample(
@@ -140,7 +146,7 @@ class LoginView(APIView):
         ser = LoginSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         user = ser.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response(
             {
                 "access": str(refresh.access_token),
@@ -154,6 +160,7 @@ class LoginView(APIView):
 @extend_schema(tags=["auth"])
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
 
     @extend_schema(
         summary="Rejestracja nowego użytkownika",
@@ -178,6 +185,7 @@ class RegisterView(APIView):
                 },
             },
             400: {"description": "Błąd walidacji (np. email zajęty, hasła nie pasują)"},
+            429: {"description": "Za dużo prób (limit per IP / e-mail); nagłówek Retry-After"},
         },
         examples=[
             OpenApiExample(
@@ -217,7 +225,7 @@ class RegisterView(APIView):
         user_role, _ = Role.objects.get_or_create(name="user")
         UserRole.objects.get_or_create(user=user, role=user_role)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response(
             {
                 "access": str(refresh.access_token),
@@ -264,7 +272,10 @@ class MeView(APIView):
     list=extend_schema(
         tags=["admin-users"],
         summary="Lista użytkowników (admin)",
-        description="Zwraca listę wszystkich użytkowników. Wymaga roli admin.",
+        description=(
+            "Zwraca listę użytkowników (paginacja kursorowa: next/previous; "
+            "paginate=false – cała lista). Wymaga roli admin."
+        ),
         responses={200: UserListSerializer(many=True)},
     ),
     retrieve=extend_schema(
@@ -310,11 +321,21 @@ class MeView(APIView):
 class UserViewSet(ModelViewSet):
     """ViewSet do zarządzania użytkownikami (admin-only)."""
 
-    queryset = User.objects.all().order_by("-created_at")
+    queryset = User.objects.all().order_by("-created_at", "-id")
     permission_classes = [IsAdmin]
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ["email", "first_name", "last_name"]
     ordering_fields = ["email", "created_at", "last_login"]
+    # Keyset po (created_at, id) albo po polu z ?ordering= (+ id) – bez OFFSET.
+    ordering = ("-created_at", "-id")
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # is_admin i role w zapytaniu listy (accounts.roles.with_roles) – bez N+1.
+            queryset = with_roles(queryset)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
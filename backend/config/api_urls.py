@@ -1,4 +1,4 @@
-"""Agregacja ścieżek API: auth, me, rooms, reservations."""
+"""Agregacja ścieżek API: auth, me, rooms, reservations, availability, calendar, reports."""
 
 from django.urls import include, path
 
@@ -6,7 +6,16 @@ from rest_framework.routers import DefaultRouter
 
 from accounts import urls as accounts_urls
 from accounts.views import MeView, UserViewSet
-from reservations.views import ReservationViewSet
+from reservations.views import (
+    AvailabilitySearchView,
+    CalendarFeedLinkView,
+    CalendarView,
+    FreeRoomsView,
+    ReservationViewSet,
+    RoomCalendarFeedView,
+    UserCalendarFeedView,
+    UtilizationReportView,
+)
 from rooms.views import EquipmentViewSet, RoomViewSet
 
 router = DefaultRouter()
@@ -18,5 +27,24 @@ router.register(r"admin/users", UserViewSet, basename="admin-user")
 urlpatterns = [
     path("auth/", include(accounts_urls)),
     path("me", MeView.as_view(), name="me"),
+    path(
+        "availability/search",
+        AvailabilitySearchView.as_view(),
+        name="availability-search",
+    ),
+    path("availability/free-rooms", FreeRoomsView.as_view(), name="availability-free-rooms"),
+    path("calendar", CalendarView.as_view(), name="calendar"),
+    path("calendar/feed-link", CalendarFeedLinkView.as_view(), name="calendar-feed-link"),
+    path(
+        "calendar/rooms/<int:room_id>.ics",
+        RoomCalendarFeedView.as_view(),
+        name="calendar-feed-room",
+    ),
+    path(
+        "calendar/users/<str:token>.ics",
+        UserCalendarFeedView.as_view(),
+        name="calendar-feed-user",
+    ),
+    path("reports/utilization", UtilizationReportView.as_view(), name="reports-utilization"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,18 @@
+"""Rodzaj cache Django: współdzielony między procesami czy tylko w pamięci procesu.
+
+LocMem (domyślny backend, CACHES w settings) jest osobny w każdym procesie – workerze
+gunicorn, procesie potomnym Celery prefork, runserver. Dane, które jeden proces zmienia,
+a inny czyta (bitmapy zajętości, wersje indeksów), mają sens tylko we wspólnym cache
+(Redis, Memcached, baza) – inaczej zmiana z Celery nigdy nie dociera do procesu WWW.
+"""
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """True, jeśli cache `alias` widzą wszystkie procesy (nie LocMem ani Dummy)."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -0,0 +1,115 @@
+"""Warunkowy GET (ETag / Last-Modified) dla viewsetów DRF.
+
+ConditionalGetMixin liczy odcisk przefiltrowanego querysetu jednym zapytaniem
+agregującym (domyślnie: liczba wierszy, max(id), max(updated_at)) – po uwierzytelnieniu
+i sprawdzeniu uprawnień, a przed pobraniem i serializacją wierszy. If-None-Match zgodny
+z ETag kończy żądanie odpowiedzią 304; odpytywanie bez zmian kosztuje jedno małe zapytanie.
+
+ETag obejmuje pełną ścieżkę z parametrami (filtry, kursor, fields), więc każda strona
+i wariant listy ma własny. Last-Modified wysyłany jest informacyjnie; 304 wyłącznie
+po ETag – usunięcie wiersza nie zmienia max(updated_at), ale zmienia liczbę wierszy.
+Cache-Control: no-cache – przeglądarka zawsze rewaliduje (wysyła If-None-Match).
+
+Dane z modeli powiązanych (np. nazwa sali w liście rezerwacji) wchodzą do odcisku przez
+conditional_related albo nadpisanie get_conditional_aggregates().
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date
+
+from rest_framework.exceptions import APIException
+
+
+def etag_matches(header, etag):
+    """Czy nagłówek If-None-Match obejmuje etag (porównanie słabe, '*' pasuje zawsze)."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class _NotModified(APIException):
+    status_code = 304
+
+
+class ConditionalGetMixin:
+    """Mixin viewsetu: ETag/Last-Modified i 304 dla akcji z conditional_actions."""
+
+    conditional_actions = ("list", "retrieve")
+    # Ścieżki do updated_at modeli powiązanych, np. ("room__updated_at",).
+    conditional_related = ()
+
+    def get_conditional_aggregates(self):
+        """Agregaty odcisku: {nazwa: wyrażenie}; wartości datetime tworzą Last-Modified."""
+        aggregates = {
+            "count": Count("pk", distinct=True),
+            "last_id": Max("pk"),
+            "modified": Max("updated_at"),
+        }
+        for path in self.conditional_related:
+            aggregates[path] = Max(path)
+        return aggregates
+
+    def get_object(self):
+        # Obiekt pobrany już przy odcisku (retrieve) – bez ponownego zapytania.
+        obj = getattr(self, "_conditional_object", None)
+        if obj is None:
+            obj = self._conditional_object = super().get_object()
+        return obj
+
+    def get_conditional_queryset(self):
+        if self.action == "retrieve":
+            # get_object sprawdza uprawnienia do obiektu – przed ewentualnym 304.
+            return self.get_queryset().filter(pk=self.get_object().pk)
+        return self.filter_queryset(self.get_queryset())
+
+    def get_conditional_state(self):
+        """Odcisk zasobu – jedno zapytanie agregujące."""
+        queryset = self.get_conditional_queryset().order_by()
+        return queryset.aggregate(**self.get_conditional_aggregates())
+
+    def get_conditional_headers(self):
+        """Nagłówki walidacji (ETag, Last-Modified, Cache-Control) z odcisku zasobu.
+
+        Nadpisywalne – np. gdy ETag znany jest bez zapytania do bazy (treść z cache).
+        """
+        state = self.get_conditional_state()
+        raw = "|".join(
+            [self.request.get_full_path()] + [f"{key}={state[key]!r}" for key in sorted(state)]
+        )
+        headers = {
+            "ETag": '"{}"'.format(hashlib.sha1(raw.encode("utf-8")).hexdigest()),
+            "Cache-Control": "private, no-cache",
+        }
+        modified = [value for value in state.values() if hasattr(value, "timestamp")]
+        if modified:
+            headers["Last-Modified"] = http_date(max(modified).timestamp())
+        return headers
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_headers = None
+        if request.method not in ("GET", "HEAD") or self.action not in self.conditional_actions:
+            return
+        self._conditional_headers = self.get_conditional_headers()
+        if etag_matches(request.headers.get("If-None-Match"), self._conditional_headers["ETag"]):
+            raise _NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            response = HttpResponseNotModified()
+            for name, value in self._conditional_headers.items():
+                response[name] = value
+            return response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, "_conditional_headers", None)
+        if headers and response.status_code == 200:
+            for name, value in headers.items():
+                response[name] = value
+        return response
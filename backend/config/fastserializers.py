@@ -0,0 +1,178 @@
+"""Szybka ścieżka serializacji list: wiersze QuerySet.values() → dict/tuple.
+
+Zamiast budować instancje modeli (select_related) i przechodzić przez maszynerię pól DRF
+dla każdego wiersza, lista deklaruje FastSpec: kolejne pola wyjścia i ich źródła
+w values(). Spec kompilowany jest raz (na zestaw pól) do funkcji Pythona generowanej
+z kodu – jeden literał dict/tuple na wiersz, konwertery tylko tam, gdzie są potrzebne.
+
+Wynik ma być identyczny z serializerem DRF, któremu odpowiada spec (te same klucze
+w tej samej kolejności i te same wartości) – pilnują tego testy porównujące JSON.
+
+Rzadkie zestawy pól: ?fields=id,start_at,end_at (kolejność wyjścia zgodna ze specem).
+"""
+
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+
+def _iso(value, tz):
+    if not value:
+        return None
+    text = value.astimezone(tz).isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+def drf_datetime(value):
+    """Jak rest_framework.fields.DateTimeField.to_representation (format ISO 8601)."""
+    return _iso(value, timezone.get_current_timezone())
+
+
+class Field:
+    """Pole wyjścia: nazwa, źródło w values() (domyślnie nazwa) i opcjonalny konwerter."""
+
+    __slots__ = ("name", "source", "convert")
+
+    def __init__(self, name, source=None, convert=None):
+        self.name = name
+        self.source = source or name
+        self.convert = convert
+
+
+class DateTime(Field):
+    """Pole datetime w formacie DRF (drf_datetime).
+
+    Strefa (bieżąca strefa Django) ustalana jest raz na serialize(), nie dla każdej wartości.
+    """
+
+    __slots__ = ()
+
+
+class BatchField:
+    """Pole liczone hurtowo dla całej strony, np. zagnieżdżona lista z osobnego zapytania.
+
+    loader(keys) → {klucz: wartość}; klucz to wartość źródła `key` wiersza.
+    Wiersze bez wpisu dostają default() (nowa wartość dla każdego wiersza).
+    """
+
+    __slots__ = ("name", "key", "loader", "default")
+
+    def __init__(self, name, *, key, loader, default=list):
+        self.name = name
+        self.key = key
+        self.loader = loader
+        self.default = default
+
+
+class CompiledSpec:
+    """Skompilowany spec dla konkretnego zestawu pól."""
+
+    def __init__(self, fields, extra_sources, as_tuple):
+        self.names = tuple(f.name for f in fields)
+        self.batch_fields = [(i, f) for i, f in enumerate(fields) if isinstance(f, BatchField)]
+        sources = []
+        for f in fields:
+            source = f.key if isinstance(f, BatchField) else f.source
+            if source not in sources:
+                sources.append(source)
+        for source in extra_sources:
+            if source not in sources:
+                sources.append(source)
+        self.sources = tuple(sources)
+        self._row = self._compile(fields, as_tuple)
+
+    def _compile(self, fields, as_tuple):
+        namespace = {}
+        parts = []
+        for i, f in enumerate(fields):
+            if isinstance(f, BatchField):
+                namespace[f"b{i}"] = f
+                expr = f"_get(batch, {i}, r[{f.key!r}], b{i})"
+            elif isinstance(f, DateTime):
+                expr = f"_iso(r[{f.source!r}], tz)"
+            elif f.convert is not None:
+                namespace[f"c{i}"] = f.convert
+                expr = f"c{i}(r[{f.source!r}])"
+            else:
+                expr = f"r[{f.source!r}]"
+            parts.append(expr if as_tuple else f"{f.name!r}: {expr}")
+        body = f"({', '.join(parts)},)" if as_tuple else "{" + ", ".join(parts) + "}"
+        namespace["_get"] = _batch_get
+        namespace["_iso"] = _iso
+        source = f"def row(r, batch, tz):\n    return {body}\n"
+        exec(compile(source, "<fastserializer>", "exec"), namespace)  # noqa: S102
+        return namespace["row"]
+
+    def serialize(self, rows):
+        """Lista wierszy values() → lista dict (lub tuple)."""
+        rows = rows if isinstance(rows, list) else list(rows)
+        batch = {i: f.loader({r[f.key] for r in rows}) for i, f in self.batch_fields}
+        row = self._row
+        tz = timezone.get_current_timezone()
+        return [row(r, batch, tz) for r in rows]
+
+    def stream(self, rows, chunk_size=2000):
+        """Generator porcji (list) zserializowanych wierszy – dla długich strumieni.
+
+        Pola BatchField ładowane są osobno dla każdej porcji, więc pamięć zależy od
+        chunk_size, a nie od liczby wierszy.
+        """
+        chunk = []
+        for r in rows:
+            chunk.append(r)
+            if len(chunk) >= chunk_size:
+                yield self.serialize(chunk)
+                chunk = []
+        if chunk:
+            yield self.serialize(chunk)
+
+
+def _batch_get(batch, index, key, field):
+    value = batch[index].get(key)
+    return field.default() if value is None else value
+
+
+class FastSpec:
+    """Deklaratywny opis listy: FastSpec(Field(...), DateTime(...), BatchField(...), ...).
+
+    extra_sources: źródła pobierane zawsze (np. pola sortowania potrzebne paginacji),
+    nawet jeśli klient ich nie zażądał w ?fields=.
+    """
+
+    fields_query_param = "fields"
+
+    def __init__(self, *fields, extra_sources=()):
+        self.fields = tuple(fields)
+        self.names = tuple(f.name for f in fields)
+        self.extra_sources = tuple(extra_sources)
+        self._compiled = {}
+
+    def compile(self, names=None, *, as_tuple=False):
+        """CompiledSpec dla pól `names` (domyślnie wszystkich); wynik zapamiętywany."""
+        key = (tuple(names) if names else self.names, as_tuple)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            wanted = set(key[0])
+            fields = [f for f in self.fields if f.name in wanted]
+            compiled = CompiledSpec(fields, self.extra_sources, as_tuple)
+            self._compiled[key] = compiled
+        return compiled
+
+    def requested_fields(self, request):
+        """Pola z ?fields= (w kolejności specu) albo None = wszystkie; nieznane → 400."""
+        return self.parse_fields(request.query_params.get(self.fields_query_param))
+
+    def parse_fields(self, raw):
+        """Jak requested_fields, dla wartości "a,b,c" spoza requestu (np. opcji komendy)."""
+        if not raw:
+            return None
+        wanted = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = sorted(set(wanted) - set(self.names))
+        if unknown:
+            raise ValidationError({self.fields_query_param: f"Nieznane pola: {', '.join(unknown)}"})
+        return tuple(name for name in self.names if name in wanted)
+
+    def for_request(self, request):
+        return self.compile(self.requested_fields(request))
@@ -0,0 +1,276 @@
+"""Paginacja keyset (kursorowa) dla list API.
+
+Kursor to zakodowane (base64, nieprzezroczyste dla klienta) wartości pól sortowania
+ostatniego/pierwszego wiersza strony. Następna strona to WHERE (a, b) "za" kursorem
+w porządku sortowania – np. dla ("-start_at", "-id"):
+start_at < s OR (start_at = s AND id < i). Zapytanie korzysta z indeksu na polach
+sortowania i kończy się po page_size + 1 wierszach, więc głęboka strona kosztuje tyle
+co pierwsza (bez OFFSET), a wstawienia w trakcie przeglądania nie przesuwają stron.
+
+Ostatnie pole sortowania musi być unikalne (np. id) – rozstrzyga remisy. Pola
+dopuszczające NULL sortowane są z NULL-ami "na końcu" malejąco i "na początku"
+rosnąco (tak samo na każdej bazie), a warunek kursora uwzględnia IS NULL.
+
+Widok z OrderingFilter: porządek strony bierze się z ?ordering= (albo view.ordering),
+uzupełniony o id jako rozstrzygnięcie remisów.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginacja keyset po `ordering` widoku (domyślnie ("-id",)).
+
+    Parametry: cursor (z linków next/previous), page_size (do max_page_size).
+    ?paginate=false zwraca całą listę bez paginacji (zgodność wsteczna – jawny opt-in).
+    """
+
+    ordering = ("-id",)
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    unpaginated_query_param = "paginate"
+    invalid_cursor_message = "Nieprawidłowy kursor."
+
+    def __init__(self):
+        self.base_url = None
+        self.page = None
+        self.next_position = None
+        self.previous_position = None
+
+    def get_ordering(self, view, request=None, queryset=None):
+        ordering = getattr(view, "ordering", None) or self.ordering
+        for backend in getattr(view, "filter_backends", ()):
+            if request is not None and issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view) or ordering
+        ordering = tuple(ordering)
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def is_unpaginated(self, request):
+        value = request.query_params.get(self.unpaginated_query_param, "")
+        return value.lower() in ("false", "0", "no")
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_unpaginated(request):
+            return None
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view, request, queryset)
+        values, reverse = self.decode_cursor(request, len(ordering))
+
+        if reverse:
+            # Strona poprzednia: sortowanie odwrócone, potem odwrócenie wyniku.
+            scan = tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+        else:
+            scan = ordering
+        nullable = self._nullable_fields(queryset.model, scan)
+        queryset = queryset.order_by(*self._order_by(scan, nullable))
+        if values is not None:
+            values = self._cursor_values(queryset.model, scan, values)
+            queryset = queryset.filter(self._after(scan, values, nullable))
+
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        self.page = rows
+        self.next_position = self._position(rows[-1], ordering) if rows and has_next else None
+        self.previous_position = (
+            self._position(rows[0], ordering) if rows and has_previous else None
+        )
+        return rows
+
+    @staticmethod
+    def _nullable_fields(model, ordering):
+        nullable = set()
+        for field in ordering:
+            name = field.lstrip("-")
+            try:
+                if model._meta.get_field(name).null:
+                    nullable.add(name)
+            except FieldDoesNotExist:
+                pass
+        return nullable
+
+    def _cursor_values(self, model, ordering, values):
+        """Wartości kursora przekonwertowane to_python pól modelu; błędne → 404.
+
+        Kursor pochodzi od klienta: wartość niepasująca do typu pola (albo None w polu
+        NOT NULL) dawałaby błąd zapytania (500) zamiast odpowiedzi o złym kursorze.
+        """
+        parsed = []
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            try:
+                model_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                model_field = None  # adnotacja – tylko skalary JSON
+            try:
+                if value is None:
+                    if model_field is not None and not model_field.null:
+                        raise ValueError(name)
+                elif model_field is not None:
+                    value = model_field.to_python(value)
+                elif isinstance(value, (dict, list)):
+                    raise TypeError(name)
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            parsed.append(value)
+        return parsed
+
+    @staticmethod
+    def _order_by(ordering, nullable):
+        # NULL "najmniejszy": na końcu malejąco, na początku rosnąco (odwracalne).
+        return [
+            (
+                (
+                    F(field[1:]).desc(nulls_last=True)
+                    if field.startswith("-")
+                    else F(field).asc(nulls_first=True)
+                )
+                if field.lstrip("-") in nullable
+                else field
+            )
+            for field in ordering
+        ]
+
+    @staticmethod
+    def _after(ordering, values, nullable=frozenset()):
+        """Q dla wierszy ściśle "za" pozycją `values` w porządku `ordering`."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            if value is None:
+                # Za NULL-em są tylko wartości niepuste przy sortowaniu rosnącym.
+                after = None if descending else Q(**{f"{name}__isnull": False})
+            else:
+                after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if descending and name in nullable:
+                    after |= Q(**{f"{name}__isnull": True})
+            if after is not None:
+                condition |= equal & after
+            equal &= Q(**{name: value})
+        # Jawny zakres na pierwszym polu (<= / >=) – baza może zawęzić skan indeksu
+        # zamiast rozwijać OR.
+        first = ordering[0]
+        if first.lstrip("-") in nullable:
+            return condition
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+    @staticmethod
+    def _position(obj, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            # Instancja modelu albo wiersz values() (szybka ścieżka serializacji).
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    def decode_cursor(self, request, fields_count):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values, reverse = payload["v"], bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != fields_count:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        payload = {"v": values}
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Kursor strony (z linków next/previous).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Liczba wyników na stronę (max {self.max_page_size}).",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.unpaginated_query_param,
+                "required": False,
+                "in": "query",
+                "description": "'false' – cała lista bez paginacji (zgodność wsteczna).",
+                "schema": {"type": "string", "enum": ["false"]},
+            },
+        ]
@@ -0,0 +1,76 @@
+"""Strumieniowy eksport rezerwacji (NDJSON, CSV) – API i komenda export_reservations.
+
+Wiersze czytane są przez values().iterator(chunk_size) (na PostgreSQL kursor po stronie
+serwera), serializowane szybką ścieżką RESERVATION_LIST_SPEC i wysyłane porcjami, więc
+pamięć workera zależy od chunk_size, a nie od liczby wierszy. Zapytanie wykonywane jest
+dopiero przy pierwszej porcji: nagłówek CSV wychodzi, zanim baza zwróci pierwszy wiersz.
+"""
+
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from reservations.serializers import RESERVATION_LIST_SPEC
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class _StreamingRenderer(BaseRenderer):
+    """Renderer eksportu: stream() dla danych, render() dla zwykłych odpowiedzi (np. 403)."""
+
+    charset = "utf-8"
+    as_tuple = False
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        names = tuple(rows[0]) if rows and isinstance(rows[0], dict) else ()
+        if self.as_tuple:
+            rows = [tuple(row.values()) if isinstance(row, dict) else row for row in rows]
+        return b"".join(self.encode(names, [rows]))
+
+    def stream(self, queryset, names=None, *, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Generator bajtów eksportu `queryset` (pola `names` z RESERVATION_LIST_SPEC)."""
+        spec = RESERVATION_LIST_SPEC.compile(names, as_tuple=self.as_tuple)
+        rows = queryset.values(*spec.sources).iterator(chunk_size=chunk_size)
+        return self.encode(spec.names, spec.stream(rows, chunk_size))
+
+    def encode(self, names, chunks):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(_StreamingRenderer):
+    """Jeden obiekt JSON na linię (JSON jak w liście API)."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def encode(self, names, chunks):
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        for rows in chunks:
+            yield "".join([dumps(row) + "\n" for row in rows]).encode(self.charset)
+
+
+class CSVRenderer(_StreamingRenderer):
+    """CSV z nagłówkiem (nazwy pól); brak wartości → pusta komórka."""
+
+    media_type = "text/csv"
+    format = "csv"
+    as_tuple = True
+
+    def encode(self, names, chunks):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue().encode(self.charset)
+        for rows in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode(self.charset)
+
+
+RENDERERS = {renderer.format: renderer for renderer in (NDJSONRenderer, CSVRenderer)}
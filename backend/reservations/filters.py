@@ -0,0 +1,37 @@
+"""Filtry list rezerwacji wspólne dla API (lista, eksport) i komend zarządzania."""
+
+from django.utils.dateparse import parse_datetime
+
+from reservations.models import Reservation
+
+
+def filter_reservations(queryset, params, user=None):
+    """Filtry: room_id, from (start_at__gte), to (end_at__lte), status, mine.
+
+    params – mapping parametrów (request.query_params albo dict z opcji komendy);
+    nieprawidłowe wartości są pomijane, jak dotąd w liście API. mine wymaga użytkownika.
+    """
+    room_id = params.get("room_id")
+    if room_id is not None:
+        try:
+            queryset = queryset.filter(room_id=int(room_id))
+        except ValueError:
+            pass
+    from_ = params.get("from")
+    if from_:
+        dt = parse_datetime(from_)
+        if dt is not None:
+            queryset = queryset.filter(start_at__gte=dt)
+    to_ = params.get("to")
+    if to_:
+        dt = parse_datetime(to_)
+        if dt is not None:
+            queryset = queryset.filter(end_at__lte=dt)
+    status_ = params.get("status")
+    if status_ and status_ in dict(Reservation.Status.choices):
+        # Status efektywny – wygasły hold jest canceled, nie pending.
+        queryset = queryset.in_status(status_)
+    mine = (params.get("mine") or "").lower()
+    if mine in ("true", "1") and user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset
@@ -0,0 +1,253 @@
+"""Kanały iCalendar (.ics) rezerwacji: per sala (publiczny) i per użytkownik (podpisany link).
+
+Link kanału użytkownika podpisany jest SECRET_KEY z solą zawierającą klucz użytkownika
+(CalendarFeedKey). Wyciek linku naprawia rotate_user_feed_key – nowy klucz unieważnia
+stare linki tylko tego użytkownika.
+
+Klienci kalendarzy (Outlook, Google) odpytują kanał co kilka minut. Każde żądanie kosztuje
+jedno zapytanie "odcisku" (Count + Max(updated_at) wierszy, które kanał obejmuje –
+indeksy reservations_room_start_idx / reservations_user_start_idx):
+
+- If-None-Match zgodny z ETag odcisku → 304 bez budowania treści,
+- treść w cache pod kluczem z odciskiem → odpowiedź z cache,
+- inaczej treść generowana strumieniowo (iterator po porcjach wierszy) i jednocześnie
+  zapisywana do cache po wysłaniu ostatniej porcji.
+
+Odcisk liczony jest po wszystkich statusach (anulowanie zmienia updated_at, usunięcie
+– Count), treść zawiera tylko rezerwacje blokujące (bez wygasłych holdów). Wygaśnięcie
+holdu nie zmienia wiersza, więc odcisk obejmuje też liczbę wygasłych holdów – ETag
+i klucz cache zmieniają się w chwili wygaśnięcia, bez czekania na zadanie w tle.
+Kanał sali nie zawiera danych osobowych.
+Kanał obejmuje rezerwacje od FEED_PAST_DAYS dni wstecz; granica zmienia się raz na dobę
+i jest częścią klucza.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from reservations.models import CalendarFeedKey, Reservation, expired_hold_q, new_feed_key
+
+FEED_PAST_DAYS = 30
+FEED_CACHE_TTL = 24 * 3600
+FEED_CHUNK_SIZE = 500
+FEED_KEY = "reservations:ics:{kind}:{owner}:{etag}"
+FEED_SIGNING_SALT = "reservations.ical"
+PRODID = "-//MeetSpace Plus//Rezerwacje//PL"
+
+_STATUS = {
+    Reservation.Status.PENDING: "TENTATIVE",
+    Reservation.Status.CONFIRMED: "CONFIRMED",
+}
+
+
+# --- Linki kanału użytkownika -------------------------------------------------------------
+
+
+def _signer(feed_key):
+    return signing.Signer(salt=f"{FEED_SIGNING_SALT}:{feed_key}")
+
+
+def user_feed_token(user):
+    """Token kanału użytkownika (id:podpis); klucz tworzony przy pierwszym użyciu."""
+    feed_key, _ = CalendarFeedKey.objects.get_or_create(user=user)
+    return _signer(feed_key.key).sign(str(user.pk))
+
+
+def rotate_user_feed_key(user):
+    """Nowy klucz kanału – wszystkie dotychczasowe linki użytkownika przestają działać."""
+    CalendarFeedKey.objects.update_or_create(user=user, defaults={"key": new_feed_key()})
+    return user_feed_token(user)
+
+
+def user_from_token(token):
+    """Aktywny użytkownik z tokenu albo None (zły podpis, zmieniony klucz) – jedno zapytanie."""
+    user_id = token.partition(":")[0]
+    if not user_id.isdigit():
+        return None
+    feed_key = (
+        CalendarFeedKey.objects.select_related("user")
+        .filter(user_id=int(user_id), user__is_active=True)
+        .first()
+    )
+    if feed_key is None:
+        return None
+    try:
+        _signer(feed_key.key).unsign(token)
+    except signing.BadSignature:
+        return None
+    return feed_key.user
+
+
+# --- Format iCalendar (RFC 5545) ----------------------------------------------------------
+
+
+def _text(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line):
+    """Linia zawinięta do 75 oktetów (kontynuacja od spacji), zakończona CRLF."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1  # nie dziel znaku UTF-8
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _header(name):
+    return "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_text(name)}",
+        )
+    )
+
+
+def _event(row, summary):
+    pk, start_at, end_at, status, updated_at, room_name, location = row
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:reservation-{pk}@meetspace-plus",
+        f"DTSTAMP:{_utc(updated_at)}",
+        f"LAST-MODIFIED:{_utc(updated_at)}",
+        f"DTSTART:{_utc(start_at)}",
+        f"DTEND:{_utc(end_at)}",
+        f"SUMMARY:{_text(summary(row))}",
+        f"LOCATION:{_text(', '.join(filter(None, (room_name, location))))}",
+        f"STATUS:{_STATUS[status]}",
+        "END:VEVENT",
+    ]
+    return "".join(_fold(line) for line in lines)
+
+
+# --- Kanały -------------------------------------------------------------------------------
+
+
+def _room_summary(row):
+    return "Zajęte" if row[3] == Reservation.Status.CONFIRMED else "Zajęte (wstępnie)"
+
+
+def _user_summary(row):
+    name = f"Rezerwacja: {row[5]}"
+    return name if row[3] == Reservation.Status.CONFIRMED else f"{name} (niepotwierdzona)"
+
+
+class Feed:
+    """Kanał .ics: zbiór rezerwacji, odcisk (ETag) i generowanie treści."""
+
+    def __init__(self, kind, owner, name, queryset, summary):
+        self.kind = kind
+        self.owner = owner
+        self.name = name
+        self.cutoff = timezone.make_aware(
+            datetime.combine(timezone.localdate(), datetime.min.time())
+        ) - timedelta(days=FEED_PAST_DAYS)
+        self.queryset = queryset.filter(start_at__gte=self.cutoff)
+        self.summary = summary
+        # Jeden moment dla odcisku i treści – wygasłe holdy liczone tak samo w obu.
+        self.now = timezone.now()
+        self._etag = None
+
+    @property
+    def etag(self):
+        """ETag z odcisku: jedno zapytanie (Count, Max(updated_at) rezerwacji i ich sal,
+        liczba wygasłych holdów)."""
+        if self._etag is None:
+            state = self.queryset.order_by().aggregate(
+                count=Count("id"),
+                expired=Count("id", filter=expired_hold_q(self.now)),
+                last=Max("updated_at"),
+                room=Max("room__updated_at"),
+            )
+            last, room = (state[k].isoformat() if state[k] else "" for k in ("last", "room"))
+            raw = (
+                f"{self.cutoff.date()}|{state['count']}|{state['expired']}|{last}|{room}"
+                f"|{self.name}"
+            )
+            self._etag = '"{}"'.format(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+        return self._etag
+
+    @property
+    def cache_key(self):
+        return FEED_KEY.format(kind=self.kind, owner=self.owner, etag=self.etag.strip('"'))
+
+    def cached(self):
+        return cache.get(self.cache_key)
+
+    def stream(self):
+        """Generator bajtów treści; pełna treść trafia do cache po ostatniej porcji."""
+        key = self.cache_key
+        parts = []
+        for chunk in self._chunks():
+            parts.append(chunk)
+            yield chunk
+        cache.set(key, b"".join(parts), timeout=FEED_CACHE_TTL)
+
+    def _chunks(self):
+        yield _header(self.name).encode("utf-8")
+        rows = (
+            self.queryset.blocking(self.now)
+            .order_by("start_at", "id")
+            .values_list(
+                "id", "start_at", "end_at", "status", "updated_at", "room__name", "room__location"
+            )
+            .iterator(chunk_size=FEED_CHUNK_SIZE)
+        )
+        events = []
+        for row in rows:
+            events.append(_event(row, self.summary))
+            if len(events) >= FEED_CHUNK_SIZE:
+                yield "".join(events).encode("utf-8")
+                events = []
+        events.append(_fold("END:VCALENDAR"))
+        yield "".join(events).encode("utf-8")
+
+
+def room_feed(room):
+    """Publiczny kanał sali: zajętość bez danych osobowych."""
+    return Feed(
+        "room",
+        room.pk,
+        f"Sala {room.name}",
+        Reservation.objects.filter(room_id=room.pk),
+        _room_summary,
+    )
+
+
+def user_feed(user):
+    """Kanał rezerwacji użytkownika (wszystkie sale)."""
+    return Feed(
+        "user",
+        user.pk,
+        "Moje rezerwacje – MeetSpace Plus",
+        Reservation.objects.filter(user_id=user.pk),
+        _user_summary,
+    )
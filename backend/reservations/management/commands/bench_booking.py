@@ -0,0 +1,114 @@
+"""
+Benchmark: latencja create_reservation w zależności od liczby rezerwacji sali.
+
+Uruchomienie: python manage.py bench_booking
+              python manage.py bench_booking --sizes 10000 100000 1000000 --samples 200
+
+Dane są tworzone w transakcji i wycofywane na końcu (baza pozostaje bez zmian).
+Zadania Celery wykonywane lokalnie (eager) – benchmark nie wymaga brokera.
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from config.celery import app as celery_app
+from reservations.models import Reservation
+from reservations.services.booking import create_reservation
+from rooms.models import Room
+
+User = get_user_model()
+
+# 20 slotów po 30 min w godzinach 8–18 na dzień historii
+SLOTS_PER_DAY = 20
+BATCH_SIZE = 5000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mierzy latencję create_reservation przy 10k/100k/1M rezerwacji sali (dane wycofywane)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Liczby istniejących rezerwacji sali (domyślnie 10000 100000 1000000).",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=100,
+            help="Liczba mierzonych wywołań create_reservation dla każdego rozmiaru.",
+        )
+
+    def handle(self, *args, **options):
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        try:
+            for size in options["sizes"]:
+                try:
+                    with transaction.atomic():
+                        self._run(size, options["samples"])
+                        raise _Rollback
+                except _Rollback:
+                    pass
+        finally:
+            celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=eager)
+
+    def _run(self, size, samples):
+        tz = timezone.get_current_timezone()
+        user = User.objects.create_user(username=f"bench-{size}@example.com", password=None)
+        room = Room.objects.create(name=f"Bench {size}")
+
+        # Historia: `size` rozłącznych slotów wstecz od wczoraj
+        first_day = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+        batch = []
+        for i in range(size):
+            day = first_day - timedelta(days=1 + i // SLOTS_PER_DAY)
+            start = day + timedelta(hours=8, minutes=30 * (i % SLOTS_PER_DAY))
+            batch.append(
+                Reservation(
+                    user=user,
+                    room=room,
+                    status=Reservation.Status.CONFIRMED,
+                    start_at=start,
+                    end_at=start + timedelta(minutes=30),
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                Reservation.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Reservation.objects.bulk_create(batch)
+
+        # Pomiar: nowe rezerwacje w przyszłości (każda w wolnym slocie)
+        timings = []
+        for i in range(samples):
+            day = first_day + timedelta(days=1 + i // SLOTS_PER_DAY)
+            start = timezone.localtime(
+                day + timedelta(hours=8, minutes=30 * (i % SLOTS_PER_DAY)), tz
+            )
+            t0 = time.perf_counter()
+            create_reservation(user, room.id, start, start + timedelta(minutes=30))
+            timings.append((time.perf_counter() - t0) * 1000)
+
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"rezerwacji sali: {size:>9}  "
+                f"mediana: {statistics.median(timings):7.2f} ms  "
+                f"p95: {p95:7.2f} ms  "
+                f"max: {timings[-1]:7.2f} ms"
+            )
+        )
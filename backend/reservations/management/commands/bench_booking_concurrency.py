@@ -0,0 +1,120 @@
+"""
+Test obciążeniowy: równoległe create_reservation na nakładające się sloty.
+
+Uruchomienie: python manage.py bench_booking_concurrency
+              python manage.py bench_booking_concurrency --threads 32 --requests 10000 --rooms 20
+
+Wątki strzelają w te same, wzajemnie nakładające się sloty kilku sal. Na końcu komenda
+sprawdza, że żadne dwie nie-anulowane rezerwacje sali się nie nakładają, i raportuje
+przepustowość (próby/s, rezerwacje/s). Dane są usuwane po pomiarze; zadania Celery
+wykonywane lokalnie (eager).
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from config.celery import app as celery_app
+from reservations.exceptions import ReservationCollisionError
+from reservations.models import Reservation
+from reservations.services.availability import intervals_overlap
+from reservations.services.booking import create_reservation
+from rooms.models import Room
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Równoległe rezerwacje nakładających się slotów: weryfikacja braku kolizji i przepustowość."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=4000, help="Łączna liczba prób.")
+        parser.add_argument("--rooms", type=int, default=4)
+
+    def handle(self, *args, **options):
+        threads, total, room_count = options["threads"], options["requests"], options["rooms"]
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        user = User.objects.create_user(username="bench-concurrency@example.com", password=None)
+        rooms = [Room.objects.create(name=f"Bench concurrency {i}") for i in range(room_count)]
+        try:
+            self._run(user, rooms, threads, total)
+        finally:
+            Reservation.objects.filter(room__in=rooms).delete()
+            Room.objects.filter(pk__in=[r.pk for r in rooms]).delete()
+            user.delete()
+            celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=eager)
+
+    def _run(self, user, rooms, threads, total):
+        tz = timezone.get_current_timezone()
+        # Sloty 1 h co 15 min na kilka dni – każdy nakłada się na sąsiednie
+        base = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()), tz)
+        slots = []
+        for day in range(1, 8):
+            for i in range(37):
+                start = timezone.localtime(base + timedelta(days=day, hours=8, minutes=15 * i), tz)
+                slots.append((start, start + timedelta(hours=1)))
+
+        created, collisions, errors = [], [], []
+        barrier = threading.Barrier(threads)
+        per_thread = total // threads
+
+        def worker(n):
+            close_old_connections()
+            try:
+                barrier.wait()
+                for i in range(per_thread):
+                    room = rooms[(n + i) % len(rooms)]
+                    start, end = slots[(n * 7 + i) % len(slots)]
+                    try:
+                        create_reservation(user, room.id, start, end)
+                        created.append(1)
+                    except ReservationCollisionError:
+                        collisions.append(1)
+                    except Exception as exc:
+                        errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - t0
+
+        overlaps = 0
+        for room in rooms:
+            rows = list(
+                Reservation.objects.filter(room=room)
+                .exclude(status=Reservation.Status.CANCELED)
+                .order_by("start_at")
+                .values_list("start_at", "end_at")
+            )
+            overlaps += sum(
+                1 for (s1, e1), (s2, e2) in zip(rows, rows[1:]) if intervals_overlap(s1, e1, s2, e2)
+            )
+
+        attempts = per_thread * threads
+        self.stdout.write(
+            f"wątki: {threads}  sale: {len(rooms)}  próby: {attempts}  "
+            f"rezerwacje: {len(created)}  kolizje (409): {len(collisions)}  błędy: {len(errors)}"
+        )
+        self.stdout.write(
+            f"czas: {elapsed:.2f} s  próby/s: {attempts / elapsed:.0f}  "
+            f"rezerwacje/s: {len(created) / elapsed:.0f}"
+        )
+        if errors:
+            self.stderr.write(f"pierwszy błąd: {errors[0]!r}")
+        if overlaps:
+            raise CommandError(f"Wykryto nakładające się rezerwacje: {overlaps}")
+        self.stdout.write(self.style.SUCCESS("Brak nakładających się rezerwacji."))
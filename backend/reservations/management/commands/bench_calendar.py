@@ -0,0 +1,102 @@
+"""
+Benchmark: widok tygodnia wielu sal – /api/calendar vs lista /api/reservations/.
+
+Uruchomienie: python manage.py bench_calendar
+              python manage.py bench_calendar --rooms 50 --per-day 16 --samples 20
+
+Dane (sale, rezerwacje na 7 dni) są tworzone w transakcji i wycofywane na końcu.
+Porównywany jest rozmiar odpowiedzi i czas obsługi żądania (mediana) obu endpointów.
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from reservations.models import Reservation
+from rooms.models import Room
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Porównuje rozmiar i czas /api/calendar z listą rezerwacji dla tygodnia wielu sal."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=50)
+        parser.add_argument("--per-day", type=int, default=10, help="Rezerwacji sali na dzień.")
+        parser.add_argument("--samples", type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = User.objects.create_user(
+            username="bench-calendar@example.com",
+            email="bench-calendar@example.com",
+            password=None,
+            first_name="Bench",
+            last_name="Calendar",
+        )
+        rooms = Room.objects.bulk_create(
+            [Room(name=f"Bench calendar {i}") for i in range(options["rooms"])]
+        )
+        monday = timezone.localdate() - timedelta(days=timezone.localdate().weekday())
+        week_start = timezone.make_aware(datetime.combine(monday, datetime.min.time()))
+        week_end = week_start + timedelta(days=7)
+        slot = timedelta(minutes=600 // options["per_day"])
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=user,
+                room=room,
+                status=Reservation.Status.CONFIRMED,
+                start_at=week_start + timedelta(days=day, hours=8) + i * slot,
+                end_at=week_start + timedelta(days=day, hours=8) + (i + 1) * slot,
+            )
+            for room in rooms
+            for day in range(7)
+            for i in range(options["per_day"])
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        params = {"from": week_start.isoformat(), "to": week_end.isoformat()}
+        results = {}
+        cases = (
+            ("lista", "/api/reservations/", {**params, "paginate": "false"}),
+            ("calendar", "/api/calendar", params),
+        )
+        for name, url, query in cases:
+            timings = []
+            for _ in range(options["samples"]):
+                t0 = time.perf_counter()
+                response = client.get(url, query)
+                timings.append((time.perf_counter() - t0) * 1000)
+            assert response.status_code == 200, response.content[:200]
+            results[name] = (len(response.content), statistics.median(timings))
+
+        total = len(rooms) * 7 * options["per_day"]
+        self.stdout.write(f"sale: {len(rooms)}  rezerwacje w tygodniu: {total}")
+        for name, (size, ms) in results.items():
+            self.stdout.write(f"  {name:<9} {size / 1024:9.1f} KiB  mediana: {ms:8.2f} ms")
+        (list_size, list_ms), (cal_size, cal_ms) = results["lista"], results["calendar"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"calendar: {cal_size / list_size:.1%} rozmiaru, {cal_ms / list_ms:.1%} czasu listy"
+            )
+        )
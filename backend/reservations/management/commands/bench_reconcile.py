@@ -0,0 +1,125 @@
+"""
+Benchmark: czas opróżnienia zaległych holdów przez reconcile_pending (partie UPDATE ... RETURNING).
+
+Uruchomienie: python manage.py bench_reconcile
+              python manage.py bench_reconcile --holds 100000 --chunk-size 5000 --legacy 2000
+
+Tworzy `--holds` rezerwacji pending z wygasłym holdem (bulk_create w transakcji, wycofywane
+na końcu). Najpierw `--legacy` z nich anulowanych jest dawną pętlą save() wiersz po wierszu
+(dla porównania tempa), potem reszta partiami services.holds.expire_in_chunks. Partie
+w benchmarku są savepointami wewnątrz transakcji benchmarku, a powiadomienia (on_commit)
+nie są wysyłane.
+"""
+
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reservations.models import Reservation
+from reservations.services import hooks
+from reservations.services.holds import expire_in_chunks
+from rooms.models import Room
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+ROOMS = 100
+SLOT = timedelta(minutes=30)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mierzy czas opróżnienia zaległych wygasłych holdów (dane wycofywane)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holds", type=int, default=1_000_000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--legacy", type=int, default=5000, help="Holdów anulowanych dawną pętlą save()."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, count):
+        user = User.objects.create_user(username="bench-reconcile@example.com", password=None)
+        rooms = Room.objects.bulk_create(Room(name=f"Bench reconcile {i}") for i in range(ROOMS))
+        now = timezone.now()
+        base = now - timedelta(days=1)
+        expired = now - timedelta(minutes=5)
+        batch = []
+        # Rozłączne sloty per sala – przechodzą też ograniczenie wykluczające (PostgreSQL).
+        for i in range(count):
+            start = base - SLOT * (i // ROOMS)
+            batch.append(
+                Reservation(
+                    user=user,
+                    room=rooms[i % ROOMS],
+                    status=Reservation.Status.PENDING,
+                    start_at=start,
+                    end_at=start + SLOT,
+                    hold_expires_at=expired,
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                Reservation.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Reservation.objects.bulk_create(batch)
+        return now
+
+    def _legacy(self, now, count):
+        qs = Reservation.objects.filter(
+            status=Reservation.Status.PENDING, hold_expires_at__lte=now
+        ).order_by("pk")[:count]
+        for r in qs:
+            r.status = Reservation.Status.CANCELED
+            r.save(update_fields=["status", "updated_at"])
+            hooks.reservation_released(r)
+
+    def _run(self, options):
+        started = time.perf_counter()
+        now = self._seed(options["holds"])
+        self.stdout.write(
+            f"holdów: {options['holds']:,}  seed: {time.perf_counter() - started:.1f} s"
+        )
+
+        legacy = min(options["legacy"], options["holds"])
+        legacy_rate = None
+        if legacy:
+            started = time.perf_counter()
+            self._legacy(now, legacy)
+            seconds = time.perf_counter() - started
+            legacy_rate = legacy / seconds
+            self.stdout.write(
+                f"save() wiersz po wierszu: {legacy:,} w {seconds:.2f} s "
+                f"({legacy_rate:,.0f} wierszy/s, całość ≈ {options['holds'] / legacy_rate:.0f} s)"
+            )
+
+        started = time.perf_counter()
+        chunks = canceled = 0
+        for rows in expire_in_chunks(now, chunk_size=options["chunk_size"]):
+            chunks += 1
+            canceled += len(rows)
+        seconds = time.perf_counter() - started
+        rate = canceled / seconds if seconds else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"partie po {options['chunk_size']:,}: {canceled:,} w {seconds:.2f} s "
+                f"({chunks} partii, {rate:,.0f} wierszy/s)"
+            )
+        )
+        if legacy_rate and rate:
+            self.stdout.write(f"przyspieszenie: x{rate / legacy_rate:.1f}")
@@ -0,0 +1,128 @@
+"""
+Benchmark: raport wykorzystania (reservations.reporting) na milionach rezerwacji.
+
+Uruchomienie: python manage.py bench_reporting
+              python manage.py bench_reporting --rows 5000000 --rooms 100 --max-memory-mb 128
+
+Dane są tworzone w transakcji i wycofywane na końcu (baza pozostaje bez zmian). Szczyt
+pamięci raportu mierzony jest przez tracemalloc (alokacje Pythona i NumPy); przekroczenie
+--max-memory-mb kończy komendę błędem.
+"""
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reservations.models import Reservation
+from reservations.reporting import DEFAULT_CHUNK_SIZE, utilization_report
+from rooms.models import Room
+
+User = get_user_model()
+
+SLOTS_PER_DAY = 20
+BATCH_SIZE = 5000
+STATUSES = (
+    Reservation.Status.CONFIRMED,
+    Reservation.Status.CONFIRMED,
+    Reservation.Status.CONFIRMED,
+    Reservation.Status.CANCELED,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Czas i szczyt pamięci raportu wykorzystania dla milionów rezerwacji (dane wycofywane)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--rooms", type=int, default=50)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--max-memory-mb",
+            type=float,
+            default=256.0,
+            help="Limit szczytu pamięci raportu (MB); przekroczenie = błąd.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rows, room_count = options["rows"], options["rooms"]
+        user = User.objects.create_user(username="bench-reporting@example.com", password=None)
+        rooms = Room.objects.bulk_create(
+            [Room(name=f"Bench reporting {i}") for i in range(room_count)]
+        )
+        per_room = -(-rows // room_count)
+        days = -(-per_room // SLOTS_PER_DAY)
+        last_day = timezone.make_aware(
+            datetime.combine(timezone.localdate(), datetime.min.time())
+        ) - timedelta(days=1)
+
+        t0 = time.perf_counter()
+        batch = []
+        for i in range(rows):
+            room = rooms[i % room_count]
+            slot = i // room_count
+            day = last_day - timedelta(days=slot // SLOTS_PER_DAY)
+            start = day + timedelta(hours=8, minutes=30 * (slot % SLOTS_PER_DAY))
+            batch.append(
+                Reservation(
+                    user=user,
+                    room=room,
+                    status=STATUSES[i % len(STATUSES)],
+                    start_at=start,
+                    end_at=start + timedelta(minutes=30),
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                Reservation.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Reservation.objects.bulk_create(batch)
+        self.stdout.write(
+            f"dane: {rows} rezerwacji, {room_count} sal, {days} dni "
+            f"({time.perf_counter() - t0:.1f} s)"
+        )
+
+        date_to = timezone.localtime(last_day).date()
+        date_from = date_to - timedelta(days=days - 1)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        report = utilization_report(
+            date_from,
+            date_to,
+            room_ids=[room.id for room in rooms],
+            chunk_size=options["chunk_size"],
+        )
+        elapsed = time.perf_counter() - t0
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        peak_mb = peak / 1024 / 1024
+        self.stdout.write(
+            f"raport: {report['reservations']} wierszy  czas: {elapsed:.2f} s  "
+            f"wiersze/s: {report['reservations'] / elapsed:.0f}  "
+            f"szczyt pamięci: {peak_mb:.1f} MB  (chunk_size={options['chunk_size']})"
+        )
+        self.stdout.write(f"wykorzystanie: {report['utilization']:.2f}%")
+        if report["reservations"] != rows:
+            raise CommandError(f"Raport objął {report['reservations']} z {rows} wierszy")
+        if peak_mb > options["max_memory_mb"]:
+            raise CommandError(
+                f"Szczyt pamięci {peak_mb:.1f} MB > limit {options['max_memory_mb']:.1f} MB"
+            )
+        self.stdout.write(self.style.SUCCESS("Szczyt pamięci w limicie."))
@@ -0,0 +1,146 @@
+"""
+Benchmark: serializacja list – serializery DRF vs szybka ścieżka (config.fastserializers).
+
+Uruchomienie: python manage.py bench_serializers
+              python manage.py bench_serializers --rows 20000 --rooms 200 --samples 5
+
+Dane (sale ze sprzętem, rezerwacje) są tworzone w transakcji i wycofywane na końcu.
+Mierzone jest zapytanie + serializacja (bez renderowania JSON), mediana z --samples;
+przed pomiarem sprawdzana jest zgodność wyników bajt w bajt.
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from reservations.models import Reservation
+from reservations.serializers import RESERVATION_LIST_SPEC, ReservationListSerializer
+from rooms.models import Equipment, Room, RoomEquipment
+from rooms.serializers import ROOM_LIST_SPEC, RoomListSerializer
+from rooms.services import refresh_equipment_summary
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _median_ms(fn, samples):
+    timings = []
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = "Porównuje wiersze/s serializerów DRF i szybkiej ścieżki dla list rezerwacji i sal."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Liczba rezerwacji.")
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--samples", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = User.objects.create_user(
+            username="bench-serializers@example.com",
+            email="bench-serializers@example.com",
+            password=None,
+            first_name="Bench",
+            last_name="Serializers",
+        )
+        equipment = Equipment.objects.bulk_create(
+            [Equipment(name=f"Bench sprzęt {i}") for i in range(5)]
+        )
+        rooms = Room.objects.bulk_create(
+            [
+                Room(name=f"Bench sala {i}", capacity=4 + i % 20, location=f"Piętro {i % 5}")
+                for i in range(options["rooms"])
+            ]
+        )
+        RoomEquipment.objects.bulk_create(
+            RoomEquipment(room=room, equipment=item, qty=1 + j)
+            for i, room in enumerate(rooms)
+            for j, item in enumerate(equipment[: i % 4])
+        )
+        refresh_equipment_summary(room.pk for room in rooms)
+        start = timezone.make_aware(
+            datetime.combine(timezone.localdate() + timedelta(days=1), datetime.min.time())
+        ) + timedelta(hours=8)
+        Reservation.objects.bulk_create(
+            (
+                Reservation(
+                    user=user,
+                    room=rooms[i % len(rooms)],
+                    status=Reservation.Status.CONFIRMED,
+                    start_at=start + timedelta(days=i // len(rooms)),
+                    end_at=start + timedelta(days=i // len(rooms), minutes=30),
+                )
+                for i in range(options["rows"])
+            ),
+            batch_size=2000,
+        )
+
+        reservations = (
+            Reservation.objects.with_current_status().filter(user=user).order_by("-start_at", "-id")
+        )
+        bench_rooms = Room.objects.filter(name__startswith="Bench sala").order_by("id")
+        sparse = RESERVATION_LIST_SPEC.compile(("id", "start_at", "end_at"))
+        cases = [
+            (
+                "rezerwacje",
+                options["rows"],
+                lambda: ReservationListSerializer(
+                    reservations.select_related("room", "user"), many=True
+                ).data,
+                lambda: RESERVATION_LIST_SPEC.compile().serialize(
+                    reservations.values(*RESERVATION_LIST_SPEC.compile().sources)
+                ),
+            ),
+            (
+                "sale",
+                len(rooms),
+                lambda: RoomListSerializer(bench_rooms, many=True).data,
+                lambda: ROOM_LIST_SPEC.compile().serialize(
+                    bench_rooms.values(*ROOM_LIST_SPEC.compile().sources)
+                ),
+            ),
+        ]
+
+        renderer = JSONRenderer()
+        for name, rows, drf, fast in cases:
+            if renderer.render(drf()) != renderer.render(fast()):
+                raise CommandError(f"{name}: szybka ścieżka różni się od serializera DRF")
+            drf_ms = _median_ms(drf, options["samples"])
+            fast_ms = _median_ms(fast, options["samples"])
+            self.stdout.write(
+                f"{name:<11} wiersze: {rows:>7}  "
+                f"DRF: {rows / drf_ms * 1000:>10,.0f}/s  "
+                f"fast: {rows / fast_ms * 1000:>10,.0f}/s  "
+                f"x{drf_ms / fast_ms:.1f}"
+            )
+        sparse_ms = _median_ms(
+            lambda: sparse.serialize(reservations.values(*sparse.sources)), options["samples"]
+        )
+        self.stdout.write(
+            f"{'?fields=id,start_at,end_at':<26} "
+            f"fast: {options['rows'] / sparse_ms * 1000:>10,.0f}/s"
+        )
+        self.stdout.write(self.style.SUCCESS("Wyniki zgodne bajt w bajt z serializerami DRF."))
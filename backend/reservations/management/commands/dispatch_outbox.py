@@ -0,0 +1,59 @@
+"""
+Publikuje zaległe zdarzenia outboxu rezerwacji (services.outbox) do brokera Celery.
+
+Uruchomienie: python manage.py dispatch_outbox
+              python manage.py dispatch_outbox --loop --interval 0.5
+              python manage.py dispatch_outbox --batch-size 1000 --max-batches 10
+
+Bez --loop opróżnia outbox raz (do wyczerpania zaległości albo pierwszego błędu brokera).
+Z --loop działa jako osobny proces dispatchera: gdy nic nie wysłał albo broker jest
+niedostępny, czeka --interval sekund. To samo co przebieg bez --loop robi zadanie
+reservations.tasks.dispatch_outbox (Celery Beat, co 2 s).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservations.models import OutboxEvent
+from reservations.services.outbox import batch_size, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Publikuje zaległe zdarzenia outboxu rezerwacji partiami."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Działa do przerwania (Ctrl+C).")
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="Sekundy przerwy w trybie --loop."
+        )
+
+    def handle(self, *args, **options):
+        limit = options["batch_size"] or batch_size()
+        if not options["loop"]:
+            self._report(dispatch_pending(limit=limit, max_batches=options["max_batches"]))
+            return
+        try:
+            while True:
+                stats = dispatch_pending(limit=limit, max_batches=options["max_batches"])
+                if stats["sent"]:
+                    self._report(stats)
+                if not stats["sent"] or stats["failed"]:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def _report(self, stats):
+        backlog = OutboxEvent.objects.filter(sent_at__isnull=True).count()
+        line = (
+            f"wysłane: {stats['sent']:,}  partie: {stats['batches']}  "
+            f"usunięte stare: {stats['pruned']:,}  zaległe: {backlog:,}  {stats['seconds']} s"
+        )
+        if stats["failed"]:
+            self.stdout.write(
+                self.style.WARNING(f"{line}  (błąd brokera – ponowienie z backoffem)")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,58 @@
+"""
+Eksport rezerwacji do NDJSON/CSV strumieniowo (reservations.export).
+
+Uruchomienie: python manage.py export_reservations --format csv --output rezerwacje.csv
+              python manage.py export_reservations --from 2025-01-01T00:00:00Z \
+                  --to 2026-01-01T00:00:00Z --status confirmed --fields id,room,start_at,end_at
+
+Filtry jak w GET /api/reservations/ (reservations.filters). Pamięć stała niezależnie od
+liczby wierszy – wiersze czytane i zapisywane porcjami po --chunk-size.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.exceptions import ValidationError
+
+from reservations.export import DEFAULT_CHUNK_SIZE, RENDERERS
+from reservations.filters import filter_reservations
+from reservations.models import Reservation
+from reservations.serializers import RESERVATION_LIST_SPEC
+
+
+class Command(BaseCommand):
+    help = "Strumieniowy eksport rezerwacji (NDJSON lub CSV) z filtrami listy API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(RENDERERS), default="ndjson")
+        parser.add_argument("--output", help="Plik wynikowy (domyślnie stdout).")
+        parser.add_argument("--room-id", type=int)
+        parser.add_argument("--from", dest="from_", help="ISO 8601 (start_at >=)")
+        parser.add_argument("--to", help="ISO 8601 (end_at <=)")
+        parser.add_argument("--status", choices=Reservation.Status.values)
+        parser.add_argument("--fields", help="Pola po przecinku, np. id,start_at,end_at.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            names = RESERVATION_LIST_SPEC.parse_fields(options["fields"])
+        except ValidationError as e:
+            raise CommandError(e.detail["fields"])
+        params = {
+            "room_id": options["room_id"],
+            "from": options["from_"],
+            "to": options["to"],
+            "status": options["status"],
+        }
+        queryset = filter_reservations(
+            Reservation.objects.with_current_status().order_by("start_at", "id"),
+            {key: value for key, value in params.items() if value is not None},
+        )
+        chunks = RENDERERS[options["format"]]().stream(
+            queryset, names, chunk_size=options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "wb") as out:
+                out.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode("utf-8"), ending="")
@@ -0,0 +1,57 @@
+"""
+Raport wykorzystania sal za zakres dat (reservations.reporting).
+
+Uruchomienie: python manage.py report_utilization --from 2025-01-01 --to 2025-03-31
+              python manage.py report_utilization --from 2025-01-01 --to 2025-01-31 --rooms 1 --json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reservations.reporting import DEFAULT_CHUNK_SIZE, utilization_report
+
+WEEKDAY_NAMES = ("pn", "wt", "śr", "cz", "pt", "sb", "nd")
+
+
+class Command(BaseCommand):
+    help = "Wykorzystanie sal, godziny szczytu oraz odsetek anulowań i wygasłych holdów."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD (włącznie)")
+        parser.add_argument("--rooms", nargs="+", type=int, help="Id sal (domyślnie wszystkie).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--json", action="store_true", help="Pełny raport jako JSON.")
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options["date_from"])
+        date_to = parse_date(options["date_to"])
+        if date_from is None or date_to is None or date_from > date_to:
+            raise CommandError("Podaj poprawny zakres dat: --from YYYY-MM-DD --to YYYY-MM-DD")
+
+        report = utilization_report(
+            date_from, date_to, room_ids=options["rooms"], chunk_size=options["chunk_size"]
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['from']} – {report['to']}  rezerwacje: {report['reservations']}  "
+            f"wykorzystanie: {report['utilization']:.2f}%  "
+            f"anulowane: {report['cancel_ratio']:.2%}  wygasłe holdy: {report['no_show_ratio']:.2%}"
+        )
+        for room in report["rooms"]:
+            self.stdout.write(
+                f"  [{room['room_id']:>4}] {room['room_name'][:30]:<30} "
+                f"{room['utilization']:6.2f}%  rezerwacje: {room['reservations']:>7}  "
+                f"anulowane: {room['cancel_ratio']:.2%}"
+            )
+        if report["peak_hours"]:
+            peaks = ", ".join(
+                f"{WEEKDAY_NAMES[p['weekday']]} {p['hour']:02d}:00 ({p['utilization']:.1f}%)"
+                for p in report["peak_hours"]
+            )
+            self.stdout.write(f"Godziny szczytu: {peaks}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0001_initial"),
+        ("rooms", "0002_add_room_capacity_location"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["room", "status", "start_at", "end_at"],
+                name="reservations_room_span_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+"""PostgreSQL: kolumna period = tstzrange(start_at, end_at, '[)') + GiST + ExclusionConstraint.
+
+Na innych bazach (SQLite w dev) migracja nic nie robi – kolizje sprawdza serwis
+pod blokadą sali. Ograniczenie obejmuje tylko nie-anulowane rezerwacje; przed
+migracją nie mogą istnieć nakładające się nie-anulowane rezerwacje tej samej sali.
+"""
+
+from django.db import migrations
+
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE reservations ADD COLUMN period tstzrange "
+    "GENERATED ALWAYS AS (tstzrange(start_at, end_at, '[)')) STORED",
+    "CREATE INDEX reservations_period_gist ON reservations USING gist (period)",
+    "ALTER TABLE reservations ADD CONSTRAINT reservations_room_period_excl "
+    "EXCLUDE USING gist (room_id WITH =, period WITH &&) WHERE (status <> 'canceled')",
+]
+
+BACKWARD_SQL = [
+    "ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservations_room_period_excl",
+    "DROP INDEX IF EXISTS reservations_period_gist",
+    "ALTER TABLE reservations DROP COLUMN IF EXISTS period",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0002_reservation_room_span_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0003_reservation_period_exclusion"),
+        ("rooms", "0002_add_room_capacity_location"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["start_at"], name="reservations_start_idx"),
+        ),
+    ]
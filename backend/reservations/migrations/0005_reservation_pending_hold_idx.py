@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0004_reservation_start_idx"),
+        ("rooms", "0003_room_equipment_summary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["hold_expires_at"],
+                name="reservations_pending_hold_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0007_calendarfeedkey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxevent",
+            name="delivered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
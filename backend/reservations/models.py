@@ -1,5 +1,52 @@
+import secrets
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+# PostgreSQL: EXCLUDE USING gist (room_id WITH =, period WITH &&) WHERE status <> 'canceled',
+# gdzie period = tstzrange(start_at, end_at, '[)') (migracja 0003).
+OVERLAP_CONSTRAINT_NAME = "reservations_room_period_excl"
+
+
+def expired_hold_q(now):
+    """Pending z hold_expires_at <= now – status efektywny canceled (Q do filtrów i agregatów)."""
+    return models.Q(status=Reservation.Status.PENDING, hold_expires_at__lte=now)
+
+
+class ReservationQuerySet(models.QuerySet):
+    """Leniwe wygaszanie holdów: pending z hold_expires_at <= now traktowane jak anulowane.
+
+    Fizyczną zmianę statusu robią zadania w tle (services.holds); do tego czasu odczyty
+    i sprawdzanie kolizji nie mogą zależeć od tego, czy workery nadążają.
+    """
+
+    def blocking(self, now=None):
+        """Rezerwacje zajmujące slot: confirmed i pending z niewygasłym holdem."""
+        now = now or timezone.now()
+        return self.filter(
+            status__in=(Reservation.Status.PENDING, Reservation.Status.CONFIRMED)
+        ).exclude(expired_hold_q(now))
+
+    def in_status(self, status, now=None):
+        """Filtr po statusie efektywnym (wygasły hold = canceled)."""
+        now = now or timezone.now()
+        if status == Reservation.Status.CANCELED:
+            return self.filter(models.Q(status=status) | expired_hold_q(now))
+        if status == Reservation.Status.PENDING:
+            return self.filter(status=status).exclude(expired_hold_q(now))
+        return self.filter(status=status)
+
+    def with_current_status(self, now=None):
+        """Adnotacja current_status – status efektywny liczony w bazie (jak effective_status)."""
+        now = now or timezone.now()
+        return self.annotate(
+            current_status=models.Case(
+                models.When(expired_hold_q(now), then=models.Value(Reservation.Status.CANCELED)),
+                default=models.F("status"),
+                output_field=models.CharField(),
+            )
+        )
 
 
 class Reservation(models.Model):
@@ -27,6 +74,8 @@ class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReservationQuerySet.as_manager()
+
     class Meta:
         db_table = "reservations"
         indexes = [
@@ -38,7 +87,98 @@ class Reservation(models.Model):
                 fields=["user", "start_at"],
                 name="reservations_user_start_idx",
             ),
+            # Sprawdzanie kolizji: room_id = X AND status IN (...) AND start_at < end
+            # AND end_at > start (services.availability.overlapping_reservations).
+            models.Index(
+                fields=["room", "status", "start_at", "end_at"],
+                name="reservations_room_span_idx",
+            ),
+            # Okno czasu dla wszystkich sal (reservations_in_window: kalendarz, raporty)
+            # na bazach bez indeksu GiST na period.
+            models.Index(fields=["start_at"], name="reservations_start_idx"),
+            # Wygaszanie holdów (services.holds): status = 'pending' AND hold_expires_at <= now;
+            # indeks częściowy – obejmuje tylko otwarte holdy, nie całą historię.
+            models.Index(
+                fields=["hold_expires_at"],
+                condition=models.Q(status="pending"),
+                name="reservations_pending_hold_idx",
+            ),
+        ]
+        # Brak nakładania się slotów (room_id, [start_at, end_at)):
+        # - PostgreSQL: wygenerowana kolumna period (tstzrange) z indeksem GiST
+        #   i ograniczeniem OVERLAP_CONSTRAINT_NAME (btree_gist) dla nie-anulowanych;
+        #   serwis mapuje naruszenie na 409. Kolumna nie jest polem modelu (SQLite
+        #   nie zna tstzrange) – tworzy ją migracja 0003 tylko na PostgreSQL.
+        # - SQLite (dev): walidacja w warstwie serwisowej pod blokadą sali
+        #   (room_booking_lock; 409 przy kolizji).
+
+    def hold_expired(self, now=None):
+        return (
+            self.status == self.Status.PENDING
+            and self.hold_expires_at is not None
+            and self.hold_expires_at <= (now or timezone.now())
+        )
+
+    @property
+    def effective_status(self):
+        """Status z uwzględnieniem wygasłego holdu (zanim posprząta go zadanie w tle)."""
+        return self.Status.CANCELED if self.hold_expired() else self.status
+
+
+class OutboxEvent(models.Model):
+    """Zadanie Celery do opublikowania, zapisane w transakcji zmiany statusu (services.outbox).
+
+    Wiersz powstaje albo znika razem ze zmianą, której dotyczy; publikuje go dispatcher
+    (dispatch_outbox). dedup_key jest unikalny – drugi zapis tego samego zdarzenia jest
+    pomijany – i trafia do brokera jako task_id. Konsument zaznacza obsłużenie zdarzenia
+    (delivered_at) w bazie, więc powtórka jest rozpoznawana w każdym procesie workera.
+    """
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    eta = models.DateTimeField(null=True, blank=True)
+    dedup_key = models.CharField(max_length=200, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Po błędzie publikacji przesuwane w przyszłość (backoff).
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "reservations_outbox"
+        indexes = [
+            # Dispatcher: sent_at IS NULL ORDER BY id – indeks częściowy obejmuje tylko
+            # zaległe zdarzenia, nie historię wysłanych.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(sent_at__isnull=True),
+                name="reservations_outbox_unsent_idx",
+            ),
+            models.Index(fields=["sent_at"], name="reservations_outbox_sent_idx"),
         ]
-        # Brak nakładania się slotów (room_id, [start_at, end_at]) – egzekwowane
-        # w warstwie serwisowej (409 przy kolizji). ExclusionConstraint wymaga
-        # PostgreSQL; przy SQLite (dev) pozostawiamy walidację w serwisie.
+
+
+def new_feed_key():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeedKey(models.Model):
+    """Sekret użytkownika wchodzący do podpisu linku jego kanału .ics (reservations.ical).
+
+    Zmiana klucza (POST /api/calendar/feed-link) unieważnia wszystkie wcześniejsze linki
+    tego użytkownika – bez zmiany SECRET_KEY i bez wpływu na innych.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="calendar_feed_key",
+    )
+    key = models.CharField(max_length=64, default=new_feed_key)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "reservations_calendar_feed_key"
@@ -0,0 +1,268 @@
+"""Raporty wykorzystania sal: macierz zajętości sala × dzień tygodnia × godzina (NumPy).
+
+Rezerwacje z zakresu dat strumieniowane są z bazy przez values_list(...).iterator()
+w porcjach po chunk_size wierszy; każda porcja zamieniana jest na tablice int64 (sekundy
+epoki) i dodawana do macierzy wektorowo. Pamięć zależy od chunk_size i liczby sal,
+a nie od liczby rezerwacji w historii.
+
+Czas lokalny: przesunięcie strefy (TIME_ZONE) liczone jest raz na dzień zakresu, o północy
+lokalnej. Rezerwacje mieszczą się w godzinach pracy jednego dnia, więc zmiana czasu
+(w nocy) nie przecina żadnej z nich.
+
+Metryki:
+- utilization – minuty potwierdzonych rezerwacji / (dni zakresu × minuty dnia pracy),
+- heatmap – to samo per (dzień tygodnia, godzina), uśrednione po salach,
+- cancel_ratio – anulowane / wszystkie,
+- no_show_ratio – przybliżenie: system nie rejestruje obecności, więc "no-show" to hold
+  nigdy niepotwierdzony, anulowany przez wygaszenie (updated_at w ciągu EXPIRY_GRACE
+  od hold_expires_at).
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import BigIntegerField, Func
+from django.utils import timezone
+
+import numpy as np
+
+from reservations.models import Reservation
+from rooms.models import Room
+
+DEFAULT_CHUNK_SIZE = 50_000
+# expire_holds co RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS, reconcile_pending co 5 min – z zapasem.
+EXPIRY_GRACE = timedelta(minutes=10)
+WEEKDAYS = 7
+HOURS = 24
+_DAY = 86_400
+_EPOCH_WEEKDAY = 3  # 1970-01-01 to czwartek (poniedziałek = 0)
+
+_STATUS_CODES = {
+    Reservation.Status.PENDING: 0,
+    Reservation.Status.CONFIRMED: 1,
+    Reservation.Status.CANCELED: 2,
+}
+
+
+class Epoch(Func):
+    """Sekundy epoki UTC liczone w bazie (NULL → -1).
+
+    Wiersze trafiają do NumPy jako int – bez konwersji każdej wartości na aware datetime.
+    """
+
+    output_field = BigIntegerField()
+    # SQLite: julianday działa także na wersjach bez unixepoch()
+    template = (
+        "COALESCE(CAST(ROUND((julianday(%(expressions)s) - 2440587.5) * 86400) AS INTEGER), -1)"
+    )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        template = "COALESCE(CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT), -1)"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+def _day_offsets(date_from, date_to):
+    """(północe lokalne jako sekundy UTC, przesunięcie strefy w sekundach) dla każdego dnia."""
+    tz = timezone.get_current_timezone()
+    days = (date_to - date_from).days + 1
+    midnights, offsets = [], []
+    for i in range(days + 1):
+        local = timezone.make_aware(
+            datetime.combine(date_from + timedelta(days=i), datetime.min.time()), tz
+        )
+        midnights.append(int(local.timestamp()))
+        offsets.append(int(local.utcoffset().total_seconds()))
+    return np.array(midnights, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+class OccupancyAccumulator:
+    """Macierz minut zajętości [sala, dzień tygodnia, godzina] i liczniki statusów."""
+
+    def __init__(self, room_ids, date_from, date_to):
+        self.room_ids = np.array(sorted(room_ids), dtype=np.int64)
+        self.date_from = date_from
+        self.date_to = date_to
+        self.midnights, self.offsets = _day_offsets(date_from, date_to)
+        self.range_start = int(self.midnights[0])
+        self.range_end = int(self.midnights[-1])
+        self.minutes = np.zeros((len(self.room_ids), WEEKDAYS, HOURS), dtype=np.float64)
+        self.status_counts = np.zeros((len(self.room_ids), len(_STATUS_CODES)), dtype=np.int64)
+        self.expired_holds = np.zeros(len(self.room_ids), dtype=np.int64)
+        self.rows = 0
+
+    def add_chunk(self, rows):
+        """rows: lista (room_id, start_at, end_at, status, hold_expires_at, updated_at).
+
+        Czasy jako sekundy epoki UTC (int, -1 dla braku wartości) – patrz Epoch.
+        """
+        if not rows:
+            return
+        self.rows += len(rows)
+        n = len(rows)
+        room_ids, starts, ends, statuses, holds, updates = zip(*rows)
+        raw_room = np.fromiter(room_ids, np.int64, n)
+        room = np.minimum(np.searchsorted(self.room_ids, raw_room), len(self.room_ids) - 1)
+        known = self.room_ids[room] == raw_room
+        start = np.fromiter(starts, np.int64, n)
+        end = np.fromiter(ends, np.int64, n)
+        status = np.fromiter((_STATUS_CODES[s] for s in statuses), np.int64, n)
+        hold = np.fromiter(holds, np.int64, n)
+        updated = np.fromiter(updates, np.int64, n)
+
+        room, start, end, status, hold, updated = (
+            a[known] for a in (room, start, end, status, hold, updated)
+        )
+        np.add.at(self.status_counts, (room, status), 1)
+        expired = (
+            (status == _STATUS_CODES[Reservation.Status.CANCELED])
+            & (hold >= 0)
+            & (updated >= hold)
+            & (updated - hold <= int(EXPIRY_GRACE.total_seconds()))
+        )
+        np.add.at(self.expired_holds, room[expired], 1)
+
+        used = status == _STATUS_CODES[Reservation.Status.CONFIRMED]
+        room, start, end = room[used], start[used], end[used]
+        start = np.maximum(start, self.range_start)
+        end = np.minimum(end, self.range_end)
+        keep = end > start
+        room, start, end = room[keep], start[keep], end[keep]
+        if not len(room):
+            return
+
+        day = np.searchsorted(self.midnights, start, side="right") - 1
+        offset = self.offsets[day]
+        local_start = start + offset
+        local_end = end + offset
+        # Rezerwacja rozbijana na kolejne pełne godziny: k-ta godzina od godziny startu.
+        first_hour = local_start // 3600 * 3600
+        span = int(((local_end - first_hour + 3599) // 3600).max())
+        for k in range(span):
+            bucket = first_hour + k * 3600
+            overlap = np.minimum(local_end, bucket + 3600) - np.maximum(local_start, bucket)
+            hit = overlap > 0
+            if not hit.any():
+                continue
+            b = bucket[hit]
+            weekday = (b // _DAY + _EPOCH_WEEKDAY) % WEEKDAYS
+            hour = b % _DAY // 3600
+            np.add.at(self.minutes, (room[hit], weekday, hour), overlap[hit] / 60.0)
+
+    def _work_minutes_per_day(self):
+        start = datetime.combine(self.date_from, settings.RESERVATION_WORK_START)
+        end = datetime.combine(self.date_from, settings.RESERVATION_WORK_END)
+        return (end - start).total_seconds() / 60
+
+    def _weekday_days(self):
+        days = (self.date_to - self.date_from).days + 1
+        counts = np.zeros(WEEKDAYS, dtype=np.int64)
+        first = self.date_from.weekday()
+        for i in range(WEEKDAYS):
+            counts[(first + i) % WEEKDAYS] = days // WEEKDAYS + (1 if i < days % WEEKDAYS else 0)
+        return counts
+
+    def result(self, room_names=None, *, peak_hours=5):
+        room_names = room_names or {}
+        days = (self.date_to - self.date_from).days + 1
+        available = days * self._work_minutes_per_day()
+        booked = self.minutes.sum(axis=(1, 2))
+        totals = self.status_counts.sum(axis=1)
+
+        weekday_days = self._weekday_days()
+        rooms_count = max(len(self.room_ids), 1)
+        denominator = weekday_days[:, None] * 60.0 * rooms_count
+        heatmap = np.divide(
+            self.minutes.sum(axis=0) * 100.0,
+            denominator,
+            out=np.zeros((WEEKDAYS, HOURS)),
+            where=denominator > 0,
+        )
+        flat = np.argsort(heatmap, axis=None)[::-1][:peak_hours]
+        peaks = [
+            {
+                "weekday": int(i // HOURS),
+                "hour": int(i % HOURS),
+                "utilization": _pct(heatmap.flat[i]),
+            }
+            for i in flat
+            if heatmap.flat[i] > 0
+        ]
+
+        all_total = int(totals.sum())
+        canceled = int(self.status_counts[:, _STATUS_CODES[Reservation.Status.CANCELED]].sum())
+        return {
+            "from": self.date_from.isoformat(),
+            "to": self.date_to.isoformat(),
+            "reservations": all_total,
+            "utilization": (
+                _pct(booked.sum() * 100.0 / (available * rooms_count)) if available else 0.0
+            ),
+            "cancel_ratio": _ratio(canceled, all_total),
+            "no_show_ratio": _ratio(int(self.expired_holds.sum()), all_total),
+            "rooms": [
+                {
+                    "room_id": int(room_id),
+                    "room_name": room_names.get(int(room_id), ""),
+                    "reservations": int(totals[i]),
+                    "booked_minutes": round(float(booked[i]), 1),
+                    "utilization": _pct(booked[i] * 100.0 / available) if available else 0.0,
+                    "cancel_ratio": _ratio(
+                        int(self.status_counts[i, _STATUS_CODES[Reservation.Status.CANCELED]]),
+                        int(totals[i]),
+                    ),
+                    "no_show_ratio": _ratio(int(self.expired_holds[i]), int(totals[i])),
+                }
+                for i, room_id in enumerate(self.room_ids)
+            ],
+            "heatmap": [[_pct(v) for v in row] for row in heatmap],
+            "peak_hours": peaks,
+        }
+
+
+def _pct(value):
+    return round(float(value), 2)
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+def utilization_report(date_from, date_to, *, room_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Raport wykorzystania sal dla dni [date_from, date_to] (włącznie).
+
+    Dwa zapytania: sale oraz strumień rezerwacji z zakresu (iterator, chunk_size wierszy
+    na porcję). Zwraca dict gotowy do serializacji JSON.
+    """
+    rooms = Room.objects.order_by("id")
+    if room_ids:
+        rooms = rooms.filter(id__in=room_ids)
+    room_names = dict(rooms.values_list("id", "name"))
+    acc = OccupancyAccumulator(room_names, date_from, date_to)
+    if not room_names:
+        return acc.result()
+
+    start = datetime.fromtimestamp(acc.range_start, tz=timezone.get_current_timezone())
+    end = datetime.fromtimestamp(acc.range_end, tz=timezone.get_current_timezone())
+    reservations = Reservation.objects.filter(start_at__lt=end, end_at__gt=start)
+    if room_ids:
+        reservations = reservations.filter(room_id__in=list(room_names))
+    rows = (
+        reservations.order_by()
+        .values_list(
+            "room_id",
+            Epoch("start_at"),
+            Epoch("end_at"),
+            "status",
+            Epoch("hold_expires_at"),
+            Epoch("updated_at"),
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            acc.add_chunk(chunk)
+            chunk = []
+    acc.add_chunk(chunk)
+    return acc.result(room_names)
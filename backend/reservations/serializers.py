@@ -2,6 +2,7 @@
 
 from rest_framework import serializers
 
+from config.fastserializers import DateTime, FastSpec, Field
 from reservations.models import Reservation
 from rooms.models import Room
 
@@ -11,6 +12,8 @@ class ReservationListSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source="user.email", read_only=True)
     user_first_name = serializers.CharField(source="user.first_name", read_only=True)
     user_last_name = serializers.CharField(source="user.last_name", read_only=True)
+    # Wygasły hold to canceled, zanim zadanie w tle zmieni status w bazie.
+    status = serializers.CharField(source="effective_status", read_only=True)
 
     class Meta:
         model = Reservation
@@ -31,11 +34,34 @@ class ReservationListSerializer(serializers.ModelSerializer):
         )
 
 
+# Szybka ścieżka listy (config.fastserializers) – ten sam wynik co ReservationListSerializer.
+# Pola sortowania listy (start_at, id) pobierane zawsze – z nich powstaje kursor strony.
+# status z adnotacji current_status (Reservation.objects.with_current_status()).
+RESERVATION_LIST_SPEC = FastSpec(
+    Field("id"),
+    Field("user", "user_id"),
+    Field("user_email", "user__email"),
+    Field("user_first_name", "user__first_name"),
+    Field("user_last_name", "user__last_name"),
+    Field("room", "room_id"),
+    Field("room_name", "room__name"),
+    Field("status", "current_status"),
+    DateTime("start_at"),
+    DateTime("end_at"),
+    DateTime("hold_expires_at"),
+    DateTime("created_at"),
+    DateTime("updated_at"),
+    extra_sources=("start_at", "id"),
+)
+
+
 class ReservationDetailSerializer(serializers.ModelSerializer):
     room_name = serializers.CharField(source="room.name", read_only=True)
     user_email = serializers.CharField(source="user.email", read_only=True)
     user_first_name = serializers.CharField(source="user.first_name", read_only=True)
     user_last_name = serializers.CharField(source="user.last_name", read_only=True)
+    # Wygasły hold to canceled, zanim zadanie w tle zmieni status w bazie.
+    status = serializers.CharField(source="effective_status", read_only=True)
 
     class Meta:
         model = Reservation
@@ -67,3 +93,104 @@ class ReservationCreateSerializer(serializers.Serializer):
         if not Room.objects.filter(pk=data["room_id"]).exists():
             raise serializers.ValidationError({"room_id": "Sala o podanym id nie istnieje"})
         return data
+
+
+def _id_list(value):
+    try:
+        return sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise serializers.ValidationError("Oczekiwano listy id rozdzielonych przecinkami")
+
+
+class AvailabilitySearchQuerySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    duration = serializers.IntegerField(min_value=1, help_text="Długość slotu w minutach")
+    capacity = serializers.IntegerField(min_value=1, required=False)
+    location = serializers.CharField(required=False, allow_blank=True)
+    equipment = serializers.CharField(
+        required=False, allow_blank=True, help_text="Id wyposażenia, po przecinku (np. 1,3)"
+    )
+
+    def validate_equipment(self, value):
+        return _id_list(value)
+
+
+class FreeSlotSerializer(serializers.Serializer):
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+
+
+class RoomAvailabilitySerializer(serializers.Serializer):
+    room_id = serializers.IntegerField()
+    room_name = serializers.CharField()
+    capacity = serializers.IntegerField()
+    location = serializers.CharField()
+    slots = FreeSlotSerializer(many=True)
+
+
+class FreeRoomsQuerySerializer(serializers.Serializer):
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+    room_ids = serializers.CharField(
+        required=False, allow_blank=True, help_text="Id sal, po przecinku; domyślnie wszystkie"
+    )
+
+    def validate_room_ids(self, value):
+        return _id_list(value)
+
+    def validate(self, data):
+        if data["start_at"] >= data["end_at"]:
+            raise serializers.ValidationError({"end_at": "end_at musi być później niż start_at"})
+        return data
+
+
+class FreeRoomsSerializer(serializers.Serializer):
+    room_ids = serializers.ListField(child=serializers.IntegerField())
+
+
+class UtilizationReportQuerySerializer(serializers.Serializer):
+    room_ids = serializers.CharField(
+        required=False, allow_blank=True, help_text="Id sal, po przecinku; domyślnie wszystkie"
+    )
+
+    def get_fields(self):
+        # "from" to słowo kluczowe Pythona – pola dodawane tutaj (nazwy jak w liście rezerwacji)
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField()
+        fields["to"] = serializers.DateField(help_text="Włącznie")
+        return fields
+
+    def validate_room_ids(self, value):
+        return _id_list(value)
+
+    def validate(self, data):
+        if data["from"] > data["to"]:
+            raise serializers.ValidationError({"to": "to musi być nie wcześniej niż from"})
+        return data
+
+
+class CalendarQuerySerializer(serializers.Serializer):
+    # Okno kalendarza: do 31 dni (widok miesiąca), typowo tydzień
+    MAX_WINDOW_DAYS = 31
+
+    room_ids = serializers.CharField(
+        required=False, allow_blank=True, help_text="Id sal, po przecinku; domyślnie wszystkie"
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["from"] = serializers.DateTimeField(help_text="ISO 8601, początek okna")
+        fields["to"] = serializers.DateTimeField(help_text="ISO 8601, koniec okna (wyłącznie)")
+        return fields
+
+    def validate_room_ids(self, value):
+        return _id_list(value)
+
+    def validate(self, data):
+        if data["from"] >= data["to"]:
+            raise serializers.ValidationError({"to": "to musi być później niż from"})
+        if (data["to"] - data["from"]).days > self.MAX_WINDOW_DAYS:
+            raise serializers.ValidationError(
+                {"to": f"Okno kalendarza może mieć najwyżej {self.MAX_WINDOW_DAYS} dni"}
+            )
+        return data
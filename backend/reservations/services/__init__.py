@@ -1,11 +1,25 @@
 """Warstwa serwisowa rezerwacji."""
 
-from .availability import intervals_overlap
+from .availability import (
+    find_collision,
+    find_free_slots,
+    intervals_overlap,
+    is_slot_free,
+    overlapping_reservations,
+    reservations_in_window,
+    room_timeline,
+)
 from .booking import cancel_reservation, confirm_reservation, create_reservation
 
 __all__ = [
     "cancel_reservation",
     "confirm_reservation",
     "create_reservation",
+    "find_collision",
+    "find_free_slots",
     "intervals_overlap",
+    "is_slot_free",
+    "overlapping_reservations",
+    "reservations_in_window",
+    "room_timeline",
 ]
@@ -1,9 +1,41 @@
 """Funkcje do wykrywania kolizji (przecięcia przedziałów czasu).
 
 Konwencja: przedziały półotwarte [start, end) – stykające się sloty
-(np. [9:00, 10:00) i [10:00, 11:00)) nie kolidują.
+(np. [9:00, 10:00) i [10:00, 11:00)) nie kolidują. Pending z wygasłym holdem nie zajmuje
+slotu, nawet jeśli zadanie w tle jeszcze go nie anulowało (ReservationQuerySet.blocking).
 """
 
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Count, F, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from config.caching import cache_is_shared
+from reservations.models import Reservation
+from reservations.services.interval_index import room_index
+from rooms.models import Room
+from rooms.services import equipment_mask
+
+# Statusy, które zajmują slot w sali (anulowane nie blokują; pending – do wygaśnięcia holdu).
+BLOCKING_STATUSES = (Reservation.Status.PENDING, Reservation.Status.CONFIRMED)
+
+# Rezerwacja mieści się w jednym dniu (create_reservation), więc trwa maksymalnie dobę
+# (25 h przy zmianie czasu). Dolne ograniczenie start_at zamyka skan indeksu z obu stron.
+MAX_RESERVATION_SPAN = timedelta(hours=25)
+
+
+def occupancy_cache_enabled():
+    """Czy zajętość sal może być trzymana w cache (RESERVATION_OCCUPANCY_CACHE).
+
+    None (auto) – tylko przy cache współdzielonym: zmiany z Celery (wygaszanie holdów)
+    i innych workerów muszą trafiać tam, skąd czyta proces WWW.
+    """
+    enabled = getattr(settings, "RESERVATION_OCCUPANCY_CACHE", None)
+    return cache_is_shared() if enabled is None else enabled
+
 
 def intervals_overlap(
     start_a,
@@ -17,3 +49,203 @@ def intervals_overlap(
     Styczność (end_a == start_b lub end_b == start_a) → brak kolizji.
     """
     return start_a < end_b and start_b < end_a
+
+
+def overlapping_reservations(
+    room_id, start_at, end_at, *, queryset=None, now=None, include_expired_holds=False
+):
+    """QuerySet rezerwacji sali zajmujących slot i nakładających się na [start_at, end_at).
+
+    include_expired_holds – także pending z wygasłym holdem (fizycznie nadal w tabeli).
+
+    Ten sam warunek co intervals_overlap, ale po stronie bazy:
+    start_at < new_end AND end_at > new_start. Dodatkowe start_at > new_start - MAX_RESERVATION_SPAN
+    nie zmienia wyniku, a ogranicza skan indeksu reservations_room_span_idx
+    (room, status, start_at, end_at) do okna – koszt zależy od liczby rezerwacji
+    w pobliżu slotu, a nie od całej historii sali.
+    """
+    qs = queryset if queryset is not None else Reservation.objects.all()
+    qs = qs.filter(
+        room_id=room_id,
+        status__in=BLOCKING_STATUSES,
+        start_at__gt=start_at - MAX_RESERVATION_SPAN,
+        start_at__lt=end_at,
+        end_at__gt=start_at,
+    )
+    return qs if include_expired_holds else qs.blocking(now)
+
+
+def find_collision(room_id, start_at, end_at, *, now=None, include_expired_holds=False):
+    """Zwraca pierwszą znalezioną kolidującą rezerwację (z room) albo None.
+
+    Jedno zapytanie z LIMIT 1 i bez ORDER BY – baza kończy skan na pierwszym trafieniu.
+    """
+    hits = list(
+        overlapping_reservations(
+            room_id, start_at, end_at, now=now, include_expired_holds=include_expired_holds
+        ).select_related("room")[:1]
+    )
+    return hits[0] if hits else None
+
+
+def is_slot_free(room_id, start_at, end_at):
+    """True, jeśli żadna rezerwacja zajmująca slot nie nakłada się na [start_at, end_at)."""
+    return not overlapping_reservations(room_id, start_at, end_at).exists()
+
+
+def reservations_in_window(start, end, *, queryset=None):
+    """Rezerwacje (wszystkich sal) nakładające się na okno [start, end).
+
+    Na PostgreSQL warunek period && tstzrange(start, end, '[)') korzysta z indeksu GiST
+    reservations_period_gist (migracja 0003); na innych bazach – start_at < end
+    AND end_at > start, z dolnym ograniczeniem start_at jak w overlapping_reservations.
+    Status nie jest filtrowany.
+    """
+    qs = queryset if queryset is not None else Reservation.objects.all()
+    if connection.vendor == "postgresql":
+        return qs.filter(
+            RawSQL(
+                '"reservations"."period" && tstzrange(%s, %s, \'[)\')',
+                (start, end),
+                output_field=BooleanField(),
+            )
+        )
+    return qs.filter(start_at__gt=start - MAX_RESERVATION_SPAN, start_at__lt=end, end_at__gt=start)
+
+
+def _room_candidates(*, min_capacity=None, location=None, equipment_ids=None):
+    rooms = Room.objects.all()
+    if min_capacity:
+        rooms = rooms.filter(capacity__gte=min_capacity)
+    if location:
+        rooms = rooms.filter(location__icontains=location)
+    if equipment_ids:
+        wanted = set(equipment_ids)
+        mask = equipment_mask(wanted)
+        if mask is not None:
+            # Bity sprzętu w rooms.equipment_mask (rooms.services) – bez złączenia.
+            return (
+                rooms.annotate(matched_mask=F("equipment_mask").bitand(mask))
+                .filter(matched_mask=mask)
+                .order_by("id")
+            )
+        rooms = rooms.annotate(
+            matched_equipment=Count(
+                "roomequipment__equipment",
+                filter=Q(roomequipment__equipment_id__in=wanted),
+                distinct=True,
+            )
+        ).filter(matched_equipment=len(wanted))
+    return rooms.order_by("id")
+
+
+def find_free_slots(
+    day,
+    duration,
+    *,
+    min_capacity=None,
+    location=None,
+    equipment_ids=None,
+    work_start=None,
+    work_end=None,
+    now=None,
+):
+    """Wolne okna (>= duration) wszystkich pasujących sal w godzinach pracy dnia `day`.
+
+    Dwa zapytania niezależnie od liczby sal: sale (z filtrami) i rezerwacje zajmujące slot
+    tych sal w oknie dnia, posortowane po (room_id, start_at). Wynik to jeden przebieg
+    (sweep line) po rezerwacjach: kursor przesuwa się do max(kursor, end); przerwa
+    [kursor, start) >= duration jest wolnym oknem. Przedziały półotwarte – rezerwacja
+    kończąca się o 10:00 nie blokuje okna od 10:00. Dla dnia dzisiejszego okno zaczyna
+    się od `now`.
+
+    Przy wspólnym cache (occupancy_cache_enabled) zajętość pochodzi z indeksu przedziałów
+    w pamięci (services.interval_index) – ten sam przebieg po RoomDayIndex sal, a zapytanie
+    o rezerwacje tylko dla dni sal jeszcze niezaładowanych.
+
+    Zwraca listę (room, [(start, end), ...]) tylko dla sal z co najmniej jednym oknem.
+    """
+    tz = timezone.get_current_timezone()
+    work_start = work_start or getattr(settings, "RESERVATION_WORK_START", time(8, 0))
+    work_end = work_end or getattr(settings, "RESERVATION_WORK_END", time(18, 0))
+    window_start = timezone.make_aware(datetime.combine(day, work_start), tz)
+    window_end = timezone.make_aware(datetime.combine(day, work_end), tz)
+    now = now or timezone.now()
+    if now > window_start:
+        window_start = now.replace(microsecond=0)
+    if window_end - window_start < duration:
+        return []
+
+    rooms = list(
+        _room_candidates(min_capacity=min_capacity, location=location, equipment_ids=equipment_ids)
+    )
+    if not rooms:
+        return []
+    if occupancy_cache_enabled():
+        days = room_index.days([room.id for room in rooms], day)
+        found = [
+            (room, days[room.id].gaps(window_start, window_end, duration, now)) for room in rooms
+        ]
+        return [(room, gaps) for room, gaps in found if gaps]
+    busy = (
+        Reservation.objects.blocking(now)
+        .filter(
+            room_id__in=[room.id for room in rooms],
+            start_at__lt=window_end,
+            end_at__gt=window_start,
+        )
+        .order_by("room_id", "start_at")
+    )
+
+    gaps = {room.id: [] for room in rooms}
+    cursors = dict.fromkeys(gaps, window_start)
+    for room_id, start, end in busy.values_list("room_id", "start_at", "end_at"):
+        cursor = cursors[room_id]
+        if start - cursor >= duration:
+            gaps[room_id].append((cursor, start))
+        cursors[room_id] = max(cursor, end)
+    for room_id, cursor in cursors.items():
+        if window_end - cursor >= duration:
+            gaps[room_id].append((cursor, window_end))
+
+    return [(room, gaps[room.id]) for room in rooms if gaps[room.id]]
+
+
+def room_timeline(start, end, *, room_ids=None):
+    """Zwarta oś czasu sal w oknie [start, end) – dane dla widoku kalendarza.
+
+    Zwraca (rooms, timeline):
+    - rooms: {room_id: nazwa} – sale z room_ids (domyślnie wszystkie),
+    - timeline: {room_id: [[id, start_offset, end_offset, status], ...]} – rezerwacje
+      zajmujące slot (bez wygasłych holdów) nakładające się na okno; offsety w sekundach
+      od `start` (mogą wychodzić poza okno, jeśli rezerwacja zaczyna się przed nim lub
+      kończy po nim).
+
+    Dwa zapytania: nazwy sal i jedno values() po oknie nakładania (reservations_in_window).
+    """
+    rooms = Room.objects.order_by("id")
+    if room_ids:
+        rooms = rooms.filter(id__in=room_ids)
+    names = dict(rooms.values_list("id", "name"))
+    timeline = {room_id: [] for room_id in names}
+    if not names:
+        return names, timeline
+    rows = reservations_in_window(start, end).blocking()
+    if room_ids:
+        rows = rows.filter(room_id__in=list(names))
+    rows = rows.order_by("room_id", "start_at").values(
+        "id", "room_id", "start_at", "end_at", "status"
+    )
+    for row in rows:
+        entries = timeline.get(row["room_id"])
+        if entries is None:
+            continue
+        entries.append(
+            [
+                row["id"],
+                int((row["start_at"] - start).total_seconds()),
+                int((row["end_at"] - start).total_seconds()),
+                row["status"],
+            ]
+        )
+    return names, timeline
@@ -0,0 +1,297 @@
+"""Bitmapy zajętości sal per (sala, dzień) w cache – szybkie "które sale są wolne".
+
+Dzień pracy (RESERVATION_WORK_START–RESERVATION_WORK_END) dzielony jest na sloty po
+RESERVATION_BITMAP_SLOT_MINUTES minut; bit i odpowiada slotowi i. Dla każdej sali i dnia
+trzymamy dwie maski (int):
+
+- occupied – slot choć częściowo zajęty przez nie-anulowaną rezerwację,
+- full – slot zajęty w całości (rezerwacja pokrywa cały slot).
+
+Dla zapytania wyrównanego do siatki odpowiedź jest dokładna: sala wolna wtedy i tylko
+wtedy, gdy occupied & maska_zapytania == 0. Dla niewyrównanego liczymy maskę wewnętrzną
+(sloty w całości w zapytaniu) i zewnętrzną (sloty dotknięte): full & zewnętrzna albo
+occupied & wewnętrzna ⇒ zajęta; occupied & zewnętrzna == 0 ⇒ wolna; pozostałe przypadki
+(zajętość tylko w częściowo dotkniętych slotach) rozstrzyga jedno dokładne zapytanie
+dla wszystkich nierozstrzygniętych sal – z indeksu przedziałów w pamięci
+(services.interval_index), bez zapytania po jego załadowaniu. Zapytania poza godzinami
+pracy idą do bazy.
+
+Pending zajmuje slot tylko do wygaśnięcia holdu: bitmapa pamięta najwcześniejszy
+hold_expires_at swoich pending (valid_until) i po nim jest budowana od nowa – bez
+wygasłych holdów, nawet jeśli zadanie w tle jeszcze ich nie anulowało.
+
+Brak bitmapy w cache ⇒ przebudowa z wierszy Reservation (jedno zapytanie dla wszystkich
+brakujących sal). Zmiany łatane w miejscu przez services.hooks po commicie. Bitmapa jest
+cache'em odczytu (tablice w holu, kalendarz) – kolizje przy zapisie nadal wykrywa
+create_reservation.
+
+Łatki przychodzą też z Celery (wygaszanie holdów), więc bitmapy mają sens tylko we
+wspólnym cache (occupancy_cache_enabled). Przy cache w pamięci procesu (LocMem) zwolniony
+slot zostałby "zajęty" w procesie WWW do BITMAP_TTL – wtedy free_rooms odpowiada jednym
+zapytaniem do bazy, a łatki są pomijane.
+
+Przebudowa a równoległa łatka: rezerwacja zatwierdzona między zapytaniem przebudowy
+a zapisem bitmapy do cache łata klucz, którego jeszcze nie ma. Każda łatka najpierw
+zapisuje nową generację (losowy token) sali i dnia; przebudowa czyta generacje przed
+zapytaniem i ponownie po zapisie – zmieniona oznacza, że łatka mogła się rozminąć
+z zapisem, więc zbudowana bitmapa jest usuwana (następny odczyt zbuduje ją od nowa).
+Tak samo między łatkami: łatka, która nie dostała blokady, usuwa klucz, a właściciel
+blokady po zapisie sprawdza, czy generacja nadal jest jego – jeśli nie, usuwa swój zapis
+(mógł nadpisać usunięcie bitmapą bez cudzej zmiany).
+"""
+
+import math
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from reservations.models import Reservation
+from reservations.services.availability import occupancy_cache_enabled
+from reservations.services.interval_index import room_index
+
+BITMAP_KEY = "reservations:bitmap:{slot}:{room_id}:{day}"
+BITMAP_TTL = 600
+PATCH_LOCK_TTL = 5
+
+
+def slot_minutes():
+    return settings.RESERVATION_BITMAP_SLOT_MINUTES
+
+
+def _key(room_id, day):
+    return BITMAP_KEY.format(slot=slot_minutes(), room_id=room_id, day=day.isoformat())
+
+
+def _generation_key(key):
+    return f"{key}:gen"
+
+
+def _window(day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, settings.RESERVATION_WORK_START), tz)
+    end = timezone.make_aware(datetime.combine(day, settings.RESERVATION_WORK_END), tz)
+    return start, end
+
+
+def _grid(day):
+    """(początek okna dnia, długość slotu w sekundach, liczba slotów)."""
+    start, end = _window(day)
+    step = slot_minutes() * 60
+    return start, step, math.ceil((end - start).total_seconds() / step)
+
+
+def _offsets(day, start_at, end_at):
+    """Położenie [start_at, end_at) na siatce dnia, w slotach (float)."""
+    origin, step, count = _grid(day)
+    lo = (start_at - origin).total_seconds() / step
+    hi = (end_at - origin).total_seconds() / step
+    return lo, hi, count
+
+
+def _mask(first, last):
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def _masks(day, start_at, end_at):
+    """(maska zewnętrzna, maska wewnętrzna) slotów dla [start_at, end_at).
+
+    Zewnętrzna: sloty dotknięte przez przedział; wewnętrzna: sloty w nim zawarte w całości.
+    """
+    lo, hi, count = _offsets(day, start_at, end_at)
+    outer = _mask(max(0, math.floor(lo)), min(count, math.ceil(hi)))
+    inner = _mask(max(0, math.ceil(lo)), min(count, math.floor(hi)))
+    return outer, inner
+
+
+def _is_aligned(day, start_at, end_at):
+    lo, hi, _count = _offsets(day, start_at, end_at)
+    return lo == math.floor(lo) and hi == math.floor(hi)
+
+
+class DayBitmap:
+    """Maski occupied/full jednej sali w jednym dniu.
+
+    valid_until – znacznik czasu (s) wygaśnięcia najwcześniejszego holdu w masce albo None.
+    """
+
+    __slots__ = ("occupied", "full", "valid_until")
+
+    def __init__(self, occupied=0, full=0, valid_until=None):
+        self.occupied = occupied
+        self.full = full
+        self.valid_until = valid_until
+
+    def __eq__(self, other):
+        return (self.occupied, self.full) == (other.occupied, other.full)
+
+    def __repr__(self):
+        return f"DayBitmap(occupied={self.occupied:#x}, full={self.full:#x})"
+
+    def mark(self, day, start_at, end_at, hold_expires_at=None):
+        outer, inner = _masks(day, start_at, end_at)
+        self.occupied |= outer
+        self.full |= inner
+        if hold_expires_at is not None:
+            expires = hold_expires_at.timestamp()
+            if self.valid_until is None or expires < self.valid_until:
+                self.valid_until = expires
+
+    def is_stale(self, now):
+        return self.valid_until is not None and self.valid_until <= now.timestamp()
+
+    def state(self):
+        return (self.occupied, self.full, self.valid_until)
+
+
+def _day_of(dt):
+    return timezone.localtime(dt).date()
+
+
+def _in_work_hours(day, start_at, end_at):
+    window_start, window_end = _window(day)
+    return window_start <= start_at and end_at <= window_end
+
+
+def day_bitmaps(room_ids, day):
+    """{room_id: DayBitmap} dla dnia; brakujące w cache budowane jednym zapytaniem."""
+    room_ids = list(room_ids)
+    keys = {_key(room_id, day): room_id for room_id in room_ids}
+    cached = cache.get_many(keys)
+    now = timezone.now()
+    result = {}
+    for key, state in cached.items():
+        bitmap = DayBitmap(*state)
+        if not bitmap.is_stale(now):
+            result[keys[key]] = bitmap
+    missing = [room_id for room_id in room_ids if room_id not in result]
+    if missing:
+        generation_keys = [_generation_key(_key(room_id, day)) for room_id in missing]
+        generations = cache.get_many(generation_keys)
+        window_start, window_end = _window(day)
+        rows = (
+            Reservation.objects.blocking(now)
+            .filter(room_id__in=missing, start_at__lt=window_end, end_at__gt=window_start)
+            .values_list("room_id", "start_at", "end_at", "status", "hold_expires_at")
+        )
+        built = {room_id: DayBitmap() for room_id in missing}
+        for room_id, start_at, end_at, status, hold in rows:
+            if status != Reservation.Status.PENDING:
+                hold = None
+            built[room_id].mark(day, start_at, end_at, hold)
+        cache.set_many(
+            {_key(room_id, day): bitmap.state() for room_id, bitmap in built.items()},
+            timeout=BITMAP_TTL,
+        )
+        current = cache.get_many(generation_keys)
+        raced = [
+            _key(room_id, day)
+            for room_id, gen_key in zip(missing, generation_keys)
+            if current.get(gen_key) != generations.get(gen_key)
+        ]
+        if raced:
+            # Łatka w trakcie przebudowy – zapisana bitmapa może jej nie zawierać.
+            cache.delete_many(raced)
+        result.update(built)
+    return result
+
+
+def _busy_rooms(room_ids, start_at, end_at):
+    """Id sal (z room_ids) zajętych w [start_at, end_at) – jedno zapytanie do bazy."""
+    return set(
+        Reservation.objects.blocking()
+        .filter(room_id__in=room_ids, start_at__lt=end_at, end_at__gt=start_at)
+        .values_list("room_id", flat=True)
+    )
+
+
+def free_rooms(room_ids, start_at, end_at):
+    """Id sal (z room_ids) wolnych w [start_at, end_at), w kolejności wejścia."""
+    room_ids = list(room_ids)
+    day = _day_of(start_at)
+    if not occupancy_cache_enabled() or not _in_work_hours(day, start_at, end_at):
+        busy = _busy_rooms(room_ids, start_at, end_at)
+        return [room_id for room_id in room_ids if room_id not in busy]
+    bitmaps = day_bitmaps(room_ids, day)
+    outer, inner = _masks(day, start_at, end_at)
+    free, undecided = [], []
+    for room_id in room_ids:
+        bitmap = bitmaps[room_id]
+        if bitmap.full & outer or bitmap.occupied & inner:
+            continue
+        if bitmap.occupied & outer:
+            undecided.append(room_id)  # zajętość tylko w częściowo dotkniętych slotach
+        else:
+            free.append(room_id)
+    if undecided:
+        days = room_index.days(undecided, day)
+        free.extend(room_id for room_id in undecided if days[room_id].is_free(start_at, end_at))
+    order = {room_id: i for i, room_id in enumerate(room_ids)}
+    return sorted(free, key=order.__getitem__)
+
+
+def _patch(room_id, day, apply):
+    """Łatka bitmapy w cache pod krótką blokadą; przy konflikcie bitmapa jest usuwana.
+
+    Pomijana, gdy bitmapy są wyłączone (cache w pamięci procesu – occupancy_cache_enabled).
+
+    Nowa generacja zapisywana jest przed odczytem klucza – trwająca przebudowa (day_bitmaps)
+    odrzuci wtedy swoją bitmapę, nawet jeśli łatka nie zastała klucza w cache. Po zapisie
+    właściciel blokady sprawdza generację: zmieniona oznacza równoległą łatkę, której
+    zmiany zapisana bitmapa może nie mieć.
+    """
+    if not occupancy_cache_enabled():
+        return
+    key = _key(room_id, day)
+    generation_key = _generation_key(key)
+    generation = uuid.uuid4().hex
+    cache.set(generation_key, generation, timeout=BITMAP_TTL)
+    lock = f"{key}:lock"
+    if not cache.add(lock, 1, timeout=PATCH_LOCK_TTL):
+        cache.delete(key)
+        return
+    try:
+        state = cache.get(key)
+        if state is None:
+            return  # brak w cache – następny odczyt zbuduje bitmapę z bazy
+        bitmap = DayBitmap(*state)
+        if apply(bitmap):
+            cache.set(key, bitmap.state(), timeout=BITMAP_TTL)
+            if cache.get(generation_key) != generation:
+                cache.delete(key)
+        else:
+            cache.delete(key)
+    finally:
+        cache.delete(lock)
+
+
+def mark_booked(room_id, start_at, end_at, hold_expires_at=None):
+    day = _day_of(start_at)
+
+    def apply(bitmap):
+        bitmap.mark(day, start_at, end_at, hold_expires_at)
+        return True
+
+    _patch(room_id, day, apply)
+
+
+def mark_released(room_id, start_at, end_at):
+    """Czyści bity zwolnionej rezerwacji.
+
+    Wyrównana rezerwacja w całości pokrywa swoje sloty, więc żadna inna (rozłączna) ich nie
+    dotyka – można je wyczyścić. Niewyrównana może dzielić skrajne sloty z sąsiednią
+    rezerwacją, więc bitmapa dnia jest usuwana i zbudowana ponownie przy odczycie.
+    """
+    day = _day_of(start_at)
+
+    def apply(bitmap):
+        if not _is_aligned(day, start_at, end_at) or not _in_work_hours(day, start_at, end_at):
+            return False
+        mask, _inner = _masks(day, start_at, end_at)
+        bitmap.occupied &= ~mask
+        bitmap.full &= ~mask
+        return True
+
+    _patch(room_id, day, apply)
@@ -1,14 +1,121 @@
-"""Logika tworzenia rezerwacji: walidacja, kolizje, hold, Celery."""
+"""Logika tworzenia rezerwacji: walidacja, kolizje, hold, zdarzenia (outbox).
 
+Zadania Celery nie są publikowane w trakcie żądania: zmiana statusu i wiersz outboxu
+(services.outbox) zapisywane są w jednej transakcji, a do brokera wysyła je dispatcher.
+"""
+
+import threading
+from contextlib import contextmanager
 from datetime import time, timedelta
 
 from django.conf import settings
+from django.db import IntegrityError, connection, transaction
 from django.utils import timezone
 
 from reservations.exceptions import ReservationCollisionError, ReservationValidationError
-from reservations.models import Reservation
-from reservations.services.availability import intervals_overlap
-from reservations.tasks import expire_hold, send_notifications
+from reservations.models import OVERLAP_CONSTRAINT_NAME, Reservation
+from reservations.services import hooks, outbox
+from reservations.services.availability import find_collision
+from reservations.services.holds import expire_due_holds, schedule_hold_expiry
+from reservations.tasks import send_notifications
+from rooms.models import Room
+
+# Blokady per sala w obrębie procesu – fallback dla baz bez SELECT ... FOR UPDATE (SQLite).
+_room_locks = {}
+_room_locks_guard = threading.Lock()
+
+
+def _process_room_lock(room_id):
+    with _room_locks_guard:
+        lock = _room_locks.get(room_id)
+        if lock is None:
+            lock = _room_locks[room_id] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def room_booking_lock(room_id):
+    """Transakcja z wyłączną blokadą sali na czas sprawdzenia kolizji i zapisu.
+
+    Serializuje rezerwacje jednej sali (nie globalnie), więc przepustowość skaluje się
+    z liczbą sal:
+    - PostgreSQL (i inne bazy z SELECT ... FOR UPDATE): blokada wiersza Room do końca
+      transakcji – działa między procesami i workerami.
+    - SQLite: threading.Lock per sala w obrębie procesu, trzymany do commitu. SQLite i tak
+      serializuje zapisy; dev (runserver) to jeden proces, więc to wystarcza.
+    """
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            list(Room.objects.select_for_update().filter(pk=room_id).values_list("pk", flat=True))
+            yield
+    else:
+        with _process_room_lock(room_id), transaction.atomic():
+            yield
+
+
+def db_enforces_no_overlap():
+    """True, jeśli brak nakładania gwarantuje ograniczenie w bazie (PostgreSQL, migracja 0003).
+
+    Wyłączalne przez RESERVATION_DB_EXCLUSION_CONSTRAINT=False – wtedy serwis wraca do
+    sprawdzania pod blokadą sali (ograniczenie w bazie nadal działa jako zabezpieczenie).
+    """
+    return connection.vendor == "postgresql" and getattr(
+        settings, "RESERVATION_DB_EXCLUSION_CONSTRAINT", True
+    )
+
+
+def _is_overlap_violation(exc):
+    """Czy IntegrityError pochodzi z ograniczenia wykluczającego nakładanie (psycopg diag)."""
+    diag = getattr(exc.__cause__, "diag", None)
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint is not None:
+        return constraint == OVERLAP_CONSTRAINT_NAME
+    return OVERLAP_CONSTRAINT_NAME in str(exc)
+
+
+def _collision_error(room_name):
+    return ReservationCollisionError(f"Salka {room_name} jest obecnie zarezerwowana")
+
+
+def _room_collision_error(room_id):
+    room_name = Room.objects.filter(pk=room_id).values_list("name", flat=True).first()
+    return _collision_error(room_name)
+
+
+def _insert_checked(fields):
+    with transaction.atomic():
+        return Reservation.objects.create(**fields)
+
+
+def _insert_on_postgres(fields, slot, now):
+    try:
+        return _insert_checked(fields)
+    except IntegrityError as exc:
+        if not _is_overlap_violation(exc):
+            raise
+        # Ograniczenie widzi też wygasłe holdy – zwolnij je i spróbuj raz jeszcze.
+        if not expire_due_holds(now, overlapping=slot):
+            raise _room_collision_error(fields["room_id"]) from exc
+        try:
+            return _insert_checked(fields)
+        except IntegrityError as retry_exc:
+            if not _is_overlap_violation(retry_exc):
+                raise
+            raise _room_collision_error(fields["room_id"]) from retry_exc
+
+
+def _booked(reservation):
+    """Indeksy i zdarzenie wygaszenia holdu w outboxie – po commicie rezerwacji."""
+    hooks.reservation_booked(reservation)
+    schedule_hold_expiry(reservation.id, reservation.hold_expires_at)
+
+
+def _notify(reservation, event):
+    outbox.enqueue(
+        send_notifications,
+        [reservation.id, event],
+        dedup_key=f"send_notifications:{reservation.id}:{event}",
+    )
 
 
 def create_reservation(
@@ -21,11 +128,17 @@ def create_reservation(
     work_end=None,
     hold_minutes=None,
 ):
-    """Tworzy rezerwację (status=pending, hold 15 min) i kolejkowuje expire_hold.
+    """Tworzy rezerwację (status=pending, hold 15 min) i planuje wygaszenie holdu.
 
     - Waliduje: start < end, przedział w godzinach roboczych.
-    - Sprawdza kolizje z istniejącymi (nie-anulowanymi); przy kolizji → ReservationCollisionError (409).
-    - Ustawia hold_expires_at=now+15min i publikuje expire_hold(reservation_id, eta=hold_expires_at).
+    - Sprawdza kolizje z istniejącymi (nie-anulowanymi) jednym zapytaniem o okno nakładania
+      (find_collision); przy kolizji → ReservationCollisionError (409). Sprawdzenie i insert
+      wykonywane są pod blokadą sali (room_booking_lock). Na PostgreSQL kolizję wykrywa
+      ExclusionConstraint przy samym INSERT (db_enforces_no_overlap).
+    - Pending z wygasłym holdem nie blokuje: jeśli to on koliduje, jest anulowany na miejscu
+      (expire_due_holds dla slotu) – rezerwacje nie czekają na zadania wygaszające.
+    - Ustawia hold_expires_at=now+15min i planuje wygaszenie w koszyku czasu
+      (services.holds.schedule_hold_expiry) – wiersz outboxu po commicie rezerwacji.
 
     work_start, work_end: datetime.time (domyślnie z settings).
     hold_minutes: int (domyślnie RESERVATION_HOLD_MINUTES).
@@ -39,7 +152,9 @@ def create_reservation(
     )
 
     if start_at >= end_at:
-        raise ReservationValidationError("Data rozpoczęcia musi być wcześniejsza niż data zakończenia!")
+        raise ReservationValidationError(
+            "Data rozpoczęcia musi być wcześniejsza niż data zakończenia!"
+        )
 
     if start_at.date() != end_at.date():
         raise ReservationValidationError("Rezerwacja musi mieścić się w jednym dniu!")
@@ -54,44 +169,67 @@ def create_reservation(
             f"Nie można rezerwowac salki poza godzinami roboczymi ({work_start}–{work_end})"
         )
 
-    for r in Reservation.objects.filter(room_id=room_id).exclude(
-        status=Reservation.Status.CANCELED
-    ).select_related('room'):
-        if intervals_overlap(start_at, end_at, r.start_at, r.end_at):
-            raise ReservationCollisionError(
-                f"Salka {r.room.name} jest obecnie zarezerwowana"
-            )
-
     now = timezone.now()
     hold_expires_at = now + timedelta(minutes=hold_min)
-
-    reservation = Reservation.objects.create(
-        user=user,
-        room_id=room_id,
-        status=Reservation.Status.PENDING,
-        start_at=start_at,
-        end_at=end_at,
-        hold_expires_at=hold_expires_at,
-    )
-    expire_hold.apply_async(args=[reservation.id], eta=hold_expires_at)
+    fields = {
+        "user": user,
+        "room_id": room_id,
+        "status": Reservation.Status.PENDING,
+        "start_at": start_at,
+        "end_at": end_at,
+        "hold_expires_at": hold_expires_at,
+    }
+
+    slot = (room_id, start_at, end_at)
+    if db_enforces_no_overlap():
+        # Jeden indeksowany INSERT – kolizję wykrywa ExclusionConstraint (GiST).
+        with transaction.atomic():
+            reservation = _insert_on_postgres(fields, slot, now)
+            _booked(reservation)
+    else:
+        # Sprawdzenie i zapis pod blokadą sali – dwa równoległe POST-y na ten sam slot
+        # nie przejdą jednocześnie przez check-then-insert.
+        with room_booking_lock(room_id):
+            collision = find_collision(*slot, include_expired_holds=True)
+            if collision is not None and collision.hold_expired(now):
+                # Wygasły hold, którego zadanie w tle jeszcze nie anulowało – zwalniamy
+                # go tutaj (przedziały w tabeli i indeksach pozostają rozłączne).
+                expire_due_holds(now, overlapping=slot)
+                collision = find_collision(*slot, now=now)
+            if collision is not None:
+                raise _collision_error(collision.room.name)
+            reservation = Reservation.objects.create(**fields)
+            _booked(reservation)
     return reservation
 
 
 def confirm_reservation(reservation):
-    """Potwierdza rezerwację (pending → confirmed). Kolejkuje send_notifications.
+    """Potwierdza rezerwację (pending → confirmed); send_notifications przez outbox.
 
     Uprawnienia (owner lub admin) weryfikuje warstwa widoków.
     """
     if reservation.status != Reservation.Status.PENDING:
         raise ReservationValidationError("Można potwierdzać tylko rezerwacje w statusie pending!")
-    reservation.status = Reservation.Status.CONFIRMED
-    reservation.save(update_fields=["status", "updated_at"])
-    send_notifications.delay(reservation.id, "confirmed")
+    # Warunkowy UPDATE: hold mógł wygasnąć, a slot zająć ktoś inny (wygasły hold nie
+    # blokuje nowych rezerwacji) – także między odczytem a zapisem.
+    now = timezone.now()
+    with transaction.atomic():
+        confirmed = (
+            Reservation.objects.filter(pk=reservation.pk, status=Reservation.Status.PENDING)
+            .blocking(now)
+            .update(status=Reservation.Status.CONFIRMED, updated_at=now)
+        )
+        if not confirmed:
+            raise ReservationValidationError("Czas na potwierdzenie rezerwacji minął!")
+        reservation.status = Reservation.Status.CONFIRMED
+        reservation.updated_at = now
+        hooks.reservation_confirmed(reservation)
+        _notify(reservation, "confirmed")
     return reservation
 
 
 def cancel_reservation(reservation):
-    """Anuluje rezerwację (pending/confirmed → canceled). Kolejkuje send_notifications.
+    """Anuluje rezerwację (pending/confirmed → canceled); send_notifications przez outbox.
 
     Idempotentne przy już anulowanej. Uprawnienia (owner lub admin) weryfikuje warstwa widoków.
     """
@@ -104,7 +242,9 @@ def cancel_reservation(reservation):
         raise ReservationValidationError(
             f"Nie można anulować rezerwacji w statusie {reservation.status}"
         )
-    reservation.status = Reservation.Status.CANCELED
-    reservation.save(update_fields=["status", "updated_at"])
-    send_notifications.delay(reservation.id, "canceled")
+    with transaction.atomic():
+        reservation.status = Reservation.Status.CANCELED
+        reservation.save(update_fields=["status", "updated_at"])
+        hooks.reservation_released(reservation)
+        _notify(reservation, "canceled")
     return reservation
@@ -0,0 +1,194 @@
+"""Wygaszanie holdów w koszykach czasu zamiast jednego zadania ETA na rezerwację.
+
+create_reservation nie publikuje już expire_hold z eta=hold_expires_at dla każdej
+rezerwacji: hold trafia do koszyka o szerokości RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS
+(domyślnie 30 s), a na koniec koszyka planowane jest jedno zadanie expire_holds. Zadanie
+anuluje wygasłe holdy partiami UPDATE ... RETURNING (expire_in_chunks). Liczba wiadomości
+ETA trzymanych przez workery zależy od długości holdu i szerokości koszyka (15 min / 30 s
+≈ 31), nie od liczby otwartych holdów.
+
+Dokładność: hold wygasa najpóźniej szerokość koszyka po hold_expires_at (plus opóźnienie
+workera). Zadania trafiają do brokera przez outbox (services.outbox); dedup_key koszyka
+(expire_holds:<koniec koszyka>) daje jedno zdarzenie na koszyk niezależnie od liczby
+procesów. Zdarzenie koszyka zapisywane jest po commicie rezerwacji, nie w jej
+transakcji: wspólny unikalny klucz w transakcji rezerwacji blokowałby (INSERT ... ON
+CONFLICT czeka na niezatwierdzony wiersz) wszystkie równoległe rezerwacje koszyka
+niezależnie od sali. Awaria między commitem a zapisem zdarzenia gubi najwyżej sprzątanie
+koszyka – zostaje reconcile_pending. RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS=0 – dawne
+zachowanie (expire_hold z eta dokładnie na wygaśnięcie).
+
+Poprawność nie zależy od tych zadań: pending z hold_expires_at <= now jest wolny przy
+odczycie (ReservationQuerySet.blocking), a create_reservation trafiające na taki hold
+anuluje go od razu (expire_due_holds(overlapping=...)). Zadania tylko porządkują wiersze
+i wysyłają powiadomienia – trafiają na niskopriorytetową kolejkę "maintenance".
+"""
+
+import math
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reservations.models import Reservation
+from reservations.services import hooks, outbox
+from reservations.services.availability import MAX_RESERVATION_SPAN, overlapping_reservations
+from reservations.tasks import expire_hold, expire_holds, send_notifications_batch
+
+
+def bucket_seconds():
+    return getattr(settings, "RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS", 30)
+
+
+def bucket_end(moment, seconds):
+    """Koniec koszyka (wielokrotność seconds od epoki) zawierającego moment."""
+    ts = math.ceil(moment.timestamp() / seconds) * seconds
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+def schedule_hold_expiry(reservation_id, hold_expires_at):
+    """Planuje wygaszenie holdu (outbox): zadanie koszyka (raz na koszyk) albo expire_hold.
+
+    expire_hold (koszyk 0 s) – w transakcji rezerwacji; zadanie koszyka – po jej commicie.
+    """
+    seconds = bucket_seconds()
+    if not seconds:
+        outbox.enqueue(
+            expire_hold,
+            [reservation_id],
+            eta=hold_expires_at,
+            dedup_key=f"expire_hold:{reservation_id}",
+        )
+        return
+    eta = bucket_end(hold_expires_at, seconds)
+    transaction.on_commit(
+        lambda: outbox.enqueue(
+            expire_holds, eta=eta, dedup_key=f"expire_holds:{int(eta.timestamp())}"
+        )
+    )
+
+
+def _update_returning_supported():
+    if connection.vendor == "postgresql":
+        return True
+    return connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def _column(name):
+    return connection.ops.quote_name(Reservation._meta.get_field(name).column)
+
+
+def _db_datetime(value):
+    return Reservation._meta.get_field("updated_at").get_db_prep_value(value, connection)
+
+
+def _expire_returning(now, after_id, limit, overlapping):
+    table = connection.ops.quote_name(Reservation._meta.db_table)
+    returning = ", ".join(_column(name) for name in ("id", "room", "start_at", "end_at"))
+    db_now = _db_datetime(now)
+    due = f"{_column('status')} = %s AND {_column('hold_expires_at')} <= %s"
+    due_params = [Reservation.Status.PENDING, db_now]
+    if overlapping is not None:
+        room_id, start_at, end_at = overlapping
+        due += (
+            f" AND {_column('room')} = %s AND {_column('start_at')} > %s"
+            f" AND {_column('start_at')} < %s AND {_column('end_at')} > %s"
+        )
+        due_params += [
+            room_id,
+            _db_datetime(start_at - MAX_RESERVATION_SPAN),
+            _db_datetime(end_at),
+            _db_datetime(start_at),
+        ]
+    if limit is None:
+        where, where_params = due, due_params
+    else:
+        # Partia po id (keyset); wiersze zablokowane przez równoległe potwierdzenie
+        # zostają na następny przebieg zamiast blokować całą partię.
+        skip_locked = (
+            " FOR UPDATE SKIP LOCKED"
+            if connection.features.has_select_for_update_skip_locked
+            else ""
+        )
+        where = (
+            f"{_column('id')} IN (SELECT {_column('id')} FROM {table} "
+            f"WHERE {due} AND {_column('id')} > %s ORDER BY {_column('id')} LIMIT %s"
+            f"{skip_locked}) AND {_column('status')} = %s"
+        )
+        where_params = [*due_params, after_id, limit, Reservation.Status.PENDING]
+    sql = (
+        f"UPDATE {table} SET {_column('status')} = %s, {_column('updated_at')} = %s "
+        f"WHERE {where} RETURNING {returning}"
+    )
+    params = [Reservation.Status.CANCELED, db_now, *where_params]
+    # raw() stosuje konwertery pól (SQLite zwraca daty jako tekst).
+    return [(r.id, r.room_id, r.start_at, r.end_at) for r in Reservation.objects.raw(sql, params)]
+
+
+def _expire_select_update(now, after_id, limit, overlapping):
+    due = Reservation.objects.filter(status=Reservation.Status.PENDING, hold_expires_at__lte=now)
+    if overlapping is not None:
+        due = overlapping_reservations(*overlapping, queryset=due, include_expired_holds=True)
+    if limit is None:
+        due = due.select_for_update()
+    else:
+        due = (
+            due.filter(pk__gt=after_id)
+            .order_by("pk")
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)[
+                :limit
+            ]
+        )
+    rows = list(due.values_list("id", "room_id", "start_at", "end_at"))
+    Reservation.objects.filter(pk__in=[row[0] for row in rows]).update(
+        status=Reservation.Status.CANCELED, updated_at=now
+    )
+    return rows
+
+
+def _notify_expired(rows):
+    ids = sorted(row[0] for row in rows)
+    if ids:
+        outbox.enqueue(send_notifications_batch, [ids, "hold_expired"])
+
+
+def expire_due_holds(now=None, *, after_id=0, limit=None, overlapping=None):
+    """Anuluje pending z hold_expires_at <= now jednym zapytaniem.
+
+    limit – najwyżej tyle rezerwacji o id > after_id (partia reconcile_pending); None –
+    wszystkie naraz. overlapping – (room_id, start_at, end_at): tylko holdy sali nakładające
+    się na przedział (create_reservation zwalnia slot, nie czekając na zadania w tle).
+    Zwraca listę (id, room_id, start_at, end_at) anulowanych rezerwacji; po commicie
+    sloty zwalniane są w indeksach (hooks.reservations_released), a zdarzenie hold_expired
+    trafia do outboxu jako jedno zadanie send_notifications_batch. Bazy bez
+    UPDATE ... RETURNING: SELECT ... FOR UPDATE i UPDATE po id.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        if _update_returning_supported():
+            rows = _expire_returning(now, after_id, limit, overlapping)
+        else:
+            rows = _expire_select_update(now, after_id, limit, overlapping)
+        hooks.reservations_released(rows)
+        _notify_expired(rows)
+    return rows
+
+
+def expire_in_chunks(now, *, after_id=0, chunk_size=None):
+    """Generator partii expire_due_holds: każda we własnej transakcji, kolejne po id.
+
+    Zwraca listy anulowanych wierszy aż do wyczerpania zaległości; przerwanie w połowie
+    zostawia zatwierdzone partie, a wznowienie od max(id) ostatniej partii nie skanuje
+    ich ponownie.
+    """
+    chunk_size = chunk_size or getattr(settings, "RESERVATION_RECONCILE_CHUNK_SIZE", 1000)
+    while True:
+        rows = expire_due_holds(now, after_id=after_id, limit=chunk_size)
+        if not rows:
+            return
+        after_id = max(row[0] for row in rows)
+        yield rows
+        if len(rows) < chunk_size:
+            # Niepełna partia – zaległość wyczerpana (bez dodatkowego pustego UPDATE).
+            return
@@ -0,0 +1,83 @@
+"""Hooki po zmianie zajętości sal – indeks przedziałów w pamięci i bitmapy w cache.
+
+Wywoływane z create_reservation/confirm_reservation/cancel_reservation i z zadań
+wygaszających holdy. Zmiany stosowane są dopiero po commicie (transaction.on_commit),
+więc wycofana transakcja nie zostawia śladu w indeksach. Pending zajmuje slot tylko do
+hold_expires_at – indeks i bitmapy dostają czas wygaśnięcia holdu, a potwierdzenie
+(reservation_confirmed) zdejmuje go z indeksu. Bez wspólnego cache
+(occupancy_cache_enabled) indeks i bitmapy nie są używane ani aktualizowane.
+"""
+
+from django.db import transaction
+
+from reservations.services import bitmap
+from reservations.services.availability import occupancy_cache_enabled
+from reservations.services.interval_index import room_index
+
+
+def _hold_of(reservation):
+    if reservation.status == reservation.Status.PENDING:
+        return reservation.hold_expires_at
+    return None
+
+
+def reservation_booked(reservation):
+    """Nowa nie-anulowana rezerwacja zajmuje slot (pending – do wygaśnięcia holdu)."""
+    rid, room_id, start, end, hold = (
+        reservation.id,
+        reservation.room_id,
+        reservation.start_at,
+        reservation.end_at,
+        _hold_of(reservation),
+    )
+
+    def apply():
+        if occupancy_cache_enabled():
+            room_index.add(rid, room_id, start, end, hold_expires_at=hold)
+        bitmap.mark_booked(room_id, start, end, hold_expires_at=hold)
+
+    transaction.on_commit(apply)
+
+
+def reservation_confirmed(reservation):
+    """Potwierdzona rezerwacja zajmuje slot bezterminowo – koniec ważności holdu w indeksie."""
+    rid, room_id, start = reservation.id, reservation.room_id, reservation.start_at
+
+    def apply():
+        if occupancy_cache_enabled():
+            room_index.confirm(rid, room_id, start)
+
+    transaction.on_commit(apply)
+
+
+def reservation_released(reservation):
+    """Rezerwacja anulowana (przez użytkownika lub wygaśnięcie holdu) zwalnia slot."""
+    rid, room_id, start, end = (
+        reservation.id,
+        reservation.room_id,
+        reservation.start_at,
+        reservation.end_at,
+    )
+
+    def apply():
+        if occupancy_cache_enabled():
+            room_index.remove(rid, room_id, start)
+        bitmap.mark_released(room_id, start, end)
+
+    transaction.on_commit(apply)
+
+
+def reservations_released(rows):
+    """Wsadowe zwolnienie slotów: rows = iterowalne (id, room_id, start_at, end_at)."""
+    rows = list(rows)
+    if not rows:
+        return
+
+    def apply():
+        indexed = occupancy_cache_enabled()
+        for rid, room_id, start, end in rows:
+            if indexed:
+                room_index.remove(rid, room_id, start)
+            bitmap.mark_released(room_id, start, end)
+
+    transaction.on_commit(apply)
@@ -0,0 +1,210 @@
+"""Indeks przedziałów w pamięci procesu: zajętość sal per (sala, dzień).
+
+Każdy dzień sali to posortowane tablice starts/ends/ids rozłącznych przedziałów
+[start, end) nie-anulowanych rezerwacji. Ponieważ przedziały się nie nakładają,
+ends też są posortowane, więc "czy sala jest wolna" to jedno bisect – O(log n)
+bez zapytania do bazy, a wolne okna dnia to jeden przebieg od bisect. Pending pamięta
+czas wygaśnięcia holdu (holds): po nim przedział nie blokuje, choć zostaje w indeksie
+do fizycznego anulowania (services.holds).
+
+Czytają z niego find_free_slots (wyszukiwarka wolnych okien) i free_rooms (sale, których
+bitmapa nie rozstrzyga). Ładowanie leniwe: brakujące dni sal pobierane są jednym
+zapytaniem (days). Aktualizacje przyrostowe przez services.hooks po commicie
+(create/confirm/cancel/wygaszanie holdów).
+
+Spójność między procesami: wersja sali we wspólnym cache. Każda zmiana podbija wersję;
+proces z inną wersją lokalną odrzuca dni tej sali i ładuje je ponownie. Wymaga to cache
+widocznego dla WWW i Celery – przy cache w pamięci procesu (LocMem) indeks nie jest
+używany (occupancy_cache_enabled), a odczyty idą do bazy.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from reservations.models import Reservation
+
+VERSION_KEY = "reservations:room-index:{room_id}:v"
+
+
+def _day_of(dt):
+    return timezone.localtime(dt).date()
+
+
+def _version_key(room_id):
+    return VERSION_KEY.format(room_id=room_id)
+
+
+class RoomDayIndex:
+    """Rozłączne przedziały [start, end) jednej sali w jednym dniu, posortowane po start."""
+
+    __slots__ = ("starts", "ends", "ids", "holds")
+
+    def __init__(self, rows=()):
+        """rows: (id, start, end) albo (id, start, end, hold_expires_at) dla pending."""
+        rows = sorted(rows, key=lambda row: row[1])
+        self.ids = [row[0] for row in rows]
+        self.starts = [row[1] for row in rows]
+        self.ends = [row[2] for row in rows]
+        self.holds = {row[0]: row[3] for row in rows if len(row) > 3 and row[3] is not None}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, reservation_id, start, end, hold_expires_at=None):
+        if reservation_id in self.ids:
+            return
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reservation_id)
+        if hold_expires_at is not None:
+            self.holds[reservation_id] = hold_expires_at
+
+    def remove(self, reservation_id):
+        try:
+            i = self.ids.index(reservation_id)
+        except ValueError:
+            return
+        del self.starts[i], self.ends[i], self.ids[i]
+        self.holds.pop(reservation_id, None)
+
+    def _blocks(self, i, now):
+        hold = self.holds.get(self.ids[i])
+        return hold is None or hold > now
+
+    def is_free(self, start, end, now=None):
+        """Czy żaden blokujący przedział nie nakłada się na [start, end)."""
+        now = now or timezone.now()
+        # pierwszy przedział kończący się po start (styczność end == start nie koliduje)
+        i = bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < end:
+            if self._blocks(i, now):
+                return False
+            i += 1
+        return True
+
+    def gaps(self, start, end, duration, now=None):
+        """Wolne okna (>= duration) w [start, end) – lista (początek, koniec) w kolejności."""
+        now = now or timezone.now()
+        found, cursor = [], start
+        i = bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < end:
+            if self._blocks(i, now):
+                if self.starts[i] - cursor >= duration:
+                    found.append((cursor, self.starts[i]))
+                cursor = max(cursor, self.ends[i])
+            i += 1
+        if end - cursor >= duration:
+            found.append((cursor, end))
+        return found
+
+
+class IntervalIndex:
+    """Rejestr RoomDayIndex per (room_id, dzień) z wersjonowaniem per sala."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._days = {}  # (room_id, date) -> RoomDayIndex
+        self._versions = {}  # room_id -> wersja, z którą zgodne są lokalne dni sali
+
+    def reset(self):
+        with self._lock:
+            self._days.clear()
+            self._versions.clear()
+
+    def _drop_room(self, room_id):
+        for key in [k for k in self._days if k[0] == room_id]:
+            del self._days[key]
+        self._versions.pop(room_id, None)
+
+    def _load_days(self, room_ids, day):
+        tz = timezone.get_current_timezone()
+        day_start = timezone.make_aware(datetime.combine(day, datetime.min.time()), tz)
+        day_end = timezone.make_aware(datetime.combine(day, datetime.max.time()), tz)
+        rows = (
+            Reservation.objects.filter(
+                room_id__in=room_ids, start_at__gte=day_start, start_at__lte=day_end
+            )
+            .exclude(status=Reservation.Status.CANCELED)
+            .values_list("room_id", "id", "start_at", "end_at", "status", "hold_expires_at")
+        )
+        by_room = {room_id: [] for room_id in room_ids}
+        for room_id, rid, start, end, status, hold in rows:
+            by_room[room_id].append(
+                (rid, start, end, hold if status == Reservation.Status.PENDING else None)
+            )
+        return {room_id: RoomDayIndex(rows) for room_id, rows in by_room.items()}
+
+    def days(self, room_ids, day):
+        """{room_id: RoomDayIndex} na dzień; brakujące lub nieaktualne – jednym zapytaniem."""
+        room_ids = list(room_ids)
+        versions = cache.get_many([_version_key(room_id) for room_id in room_ids])
+        result, missing = {}, []
+        with self._lock:
+            for room_id in room_ids:
+                version = versions.get(_version_key(room_id), 0)
+                if self._versions.get(room_id, version) != version:
+                    self._drop_room(room_id)
+                index = self._days.get((room_id, day))
+                if index is None:
+                    missing.append(room_id)
+                else:
+                    result[room_id] = index
+        if missing:
+            # Wersje odczytane przed zapytaniem – zmiana w trakcie ładowania najwyżej
+            # wymusi ponowne ładowanie przy następnym odczycie.
+            loaded = self._load_days(missing, day)
+            with self._lock:
+                for room_id in missing:
+                    self._versions.setdefault(room_id, versions.get(_version_key(room_id), 0))
+                    result[room_id] = self._days.setdefault((room_id, day), loaded[room_id])
+        return result
+
+    def day(self, room_id, day):
+        """RoomDayIndex sali na dzień; ładuje z bazy przy braku lub nieaktualnej wersji."""
+        return self.days([room_id], day)[room_id]
+
+    def _bump(self, room_id):
+        """Podbija wersję sali; zwraca True, jeśli lokalny stan był aktualny przed zmianą."""
+        key = _version_key(room_id)
+        cache.add(key, 0, timeout=None)
+        try:
+            new_version = cache.incr(key)
+        except ValueError:  # klucz wygasł między add a incr
+            cache.set(key, 1, timeout=None)
+            new_version = 1
+        local = self._versions.get(room_id)
+        if local is not None and local + 1 == new_version:
+            self._versions[room_id] = new_version
+            return True
+        self._drop_room(room_id)
+        return False
+
+    def add(self, reservation_id, room_id, start, end, hold_expires_at=None):
+        with self._lock:
+            if self._bump(room_id):
+                index = self._days.get((room_id, _day_of(start)))
+                if index is not None:
+                    index.add(reservation_id, start, end, hold_expires_at)
+
+    def confirm(self, reservation_id, room_id, start):
+        """Rezerwacja potwierdzona – przedział blokuje niezależnie od holdu."""
+        with self._lock:
+            if self._bump(room_id):
+                index = self._days.get((room_id, _day_of(start)))
+                if index is not None:
+                    index.holds.pop(reservation_id, None)
+
+    def remove(self, reservation_id, room_id, start):
+        with self._lock:
+            if self._bump(room_id):
+                index = self._days.get((room_id, _day_of(start)))
+                if index is not None:
+                    index.remove(reservation_id)
+
+
+room_index = IntervalIndex()
@@ -0,0 +1,163 @@
+"""Transakcyjny outbox: zadania Celery zapisywane w transakcji zmiany statusu.
+
+create/confirm/cancel nie rozmawiają z brokerem w trakcie żądania – enqueue dopisuje
+wiersz OutboxEvent w tej samej transakcji co zmiana rezerwacji. Wycofana transakcja nie
+zostawia opublikowanego zadania, a wolny lub niedostępny broker nie wydłuża żądania ani
+go nie psuje.
+
+Dispatcher (zadanie dispatch_outbox z Beat albo `manage.py dispatch_outbox --loop`)
+pobiera zaległe zdarzenia partiami po RESERVATION_OUTBOX_BATCH_SIZE (SELECT ... FOR
+UPDATE SKIP LOCKED – równoległe dispatchery nie biorą tych samych wierszy) i publikuje je
+jednym producentem z puli połączeń Celery. Błąd publikacji kończy partię: wysłane są
+oznaczane, a nieudane czeka z wykładniczym backoffem.
+
+Dostarczenie co najmniej raz: awaria między publikacją a oznaczeniem wysłania oznacza
+ponowną publikację. dedup_key zdarzenia jest task_id wiadomości; konsument w swojej
+transakcji zaznacza wiersz jako obsłużony (claim_delivery – warunkowy UPDATE
+delivered_at) i pomija powtórkę. Znacznik jest w bazie, nie w cache procesu, więc działa
+między procesami prefork i po restarcie workera; błąd zadania wycofuje znacznik i retry
+wykonuje się normalnie. Skutki zewnętrzne (e-mail) poza transakcją mogą się powtórzyć
+tylko przy awarii między nimi a commitem. Wysłane zdarzenia usuwane są po
+RESERVATION_OUTBOX_RETENTION_HOURS – dłużej niż realne okno ponownych dostarczeń.
+"""
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from celery import current_app
+
+from reservations.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+def batch_size():
+    return getattr(settings, "RESERVATION_OUTBOX_BATCH_SIZE", 500)
+
+
+def retention():
+    return timedelta(hours=getattr(settings, "RESERVATION_OUTBOX_RETENTION_HOURS", 24))
+
+
+def enqueue(task, args=(), kwargs=None, *, eta=None, dedup_key=None):
+    """Dopisuje zadanie do outboxu w bieżącej transakcji.
+
+    task – zadanie Celery (albo jego nazwa). dedup_key – zdarzenie z kluczem, który już
+    jest w outboxie, jest pomijane; domyślnie klucz losowy.
+    """
+    OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(
+                task=getattr(task, "name", task),
+                args=list(args),
+                kwargs=kwargs or {},
+                eta=eta,
+                dedup_key=dedup_key or uuid.uuid4().hex,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _publish(event, producer):
+    current_app.tasks[event.task].apply_async(
+        args=event.args,
+        kwargs=event.kwargs,
+        eta=event.eta,
+        task_id=event.dedup_key,
+        producer=producer,
+    )
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2**attempts, MAX_BACKOFF_SECONDS))
+
+
+def dispatch_batch(limit=None, now=None):
+    """Publikuje do `limit` najstarszych zaległych zdarzeń. Zwraca (wysłane, błąd)."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.filter(sent_at__isnull=True, available_at__lte=now)
+            .order_by("id")
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)[
+                : limit or batch_size()
+            ]
+        )
+        sent, error = [], None
+        if events:
+            try:
+                with current_app.producer_or_acquire() as producer:
+                    for event in events:
+                        _publish(event, producer)
+                        sent.append(event.id)
+            except Exception as exc:
+                error = exc
+        OutboxEvent.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+        if error is not None:
+            failed = events[len(sent)]
+            OutboxEvent.objects.filter(pk=failed.pk).update(
+                attempts=F("attempts") + 1,
+                last_error=str(error)[:1000],
+                available_at=now + _backoff(failed.attempts + 1),
+            )
+            logger.warning(
+                "outbox publish failed",
+                extra={"event_id": failed.pk, "task": failed.task, "error": str(error)},
+            )
+    return len(sent), error
+
+
+def prune_sent(now=None):
+    """Usuwa zdarzenia wysłane dawniej niż RESERVATION_OUTBOX_RETENTION_HOURS."""
+    now = now or timezone.now()
+    return OutboxEvent.objects.filter(sent_at__lt=now - retention()).delete()[0]
+
+
+def dispatch_pending(*, limit=None, max_batches=None):
+    """Opróżnia outbox partiami do wyczerpania zaległości albo pierwszego błędu brokera.
+
+    Zwraca i loguje statystyki: wysłane, partie, błąd publikacji, usunięte stare, czas.
+    """
+    limit = limit or batch_size()
+    stats = {"sent": 0, "batches": 0, "failed": False}
+    started = time.perf_counter()
+    while max_batches is None or stats["batches"] < max_batches:
+        sent, error = dispatch_batch(limit)
+        stats["sent"] += sent
+        if sent:
+            stats["batches"] += 1
+        if error is not None:
+            stats["failed"] = True
+            break
+        if sent < limit:
+            break
+    stats["pruned"] = prune_sent()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    if stats["sent"] or stats["failed"] or stats["pruned"]:
+        logger.info("dispatch_outbox", extra=stats)
+    return stats
+
+
+def claim_delivery(task_id):
+    """Zaznacza zdarzenie outboxu o tym task_id jako obsłużone; False – powtórka.
+
+    Wołane w transakcji zadania: UPDATE blokuje wiersz do commitu, więc równoległa
+    powtórka czeka i widzi delivered_at. task_id spoza outboxu (np. bezpośrednie .delay)
+    – zawsze True.
+    """
+    if not task_id:
+        return True
+    claimed = OutboxEvent.objects.filter(dedup_key=task_id, delivered_at__isnull=True).update(
+        delivered_at=timezone.now()
+    )
+    return bool(claimed) or not OutboxEvent.objects.filter(dedup_key=task_id).exists()
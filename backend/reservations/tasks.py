@@ -1,7 +1,9 @@
-"""Zadania Celery: wygaszanie holdów, powiadomienia, reconcile."""
+"""Zadania Celery: wygaszanie holdów, powiadomienia, reconcile, dispatcher outboxu."""
 
 import logging
+from datetime import datetime
 
+from django.db import transaction
 from django.utils import timezone
 
 from celery import shared_task
@@ -11,6 +13,20 @@ from reservations.models import Reservation
 logger = logging.getLogger(__name__)
 
 
+def _hooks():
+    # Import lokalny: reservations.services.booking importuje ten moduł.
+    from reservations.services import hooks
+
+    return hooks
+
+
+def _outbox():
+    # Import lokalny jak _hooks: pakiet reservations.services importuje ten moduł.
+    from reservations.services import outbox
+
+    return outbox
+
+
 @shared_task(bind=True, max_retries=5, default_retry_delay=60)
 def expire_hold(self, reservation_id):
     """Anuluje rezerwację w statusie pending, jeśli hold wygasł (hold_expires_at <= now).
@@ -36,6 +52,7 @@ def expire_hold(self, reservation_id):
         try:
             r.status = Reservation.Status.CANCELED
             r.save(update_fields=["status", "updated_at"])
+            _hooks().reservation_released(r)
             logger.info(
                 "expire_hold canceled",
                 extra={"reservation_id": reservation_id, "canceled": True},
@@ -57,43 +74,109 @@ def expire_hold(self, reservation_id):
         )
 
 
+@shared_task(bind=True, max_retries=5, default_retry_delay=60)
+def expire_holds(self):
+    """Anuluje wygasłe holdy partiami (services.holds.expire_in_chunks).
+
+    Planowane raz na koszyk czasu (RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS) z eta na jego
+    koniec. Partie po RESERVATION_RECONCILE_CHUNK_SIZE jak w reconcile_pending – po
+    przestoju workerów pierwsze zaległe zadanie nie anuluje całej zaległości jednym
+    zapytaniem. Retry przy błędach transjentowych (np. baza); zatwierdzone partie
+    zostają, ponowienie bierze resztę.
+    """
+    from reservations.services.holds import expire_in_chunks
+
+    canceled = 0
+    try:
+        for rows in expire_in_chunks(timezone.now()):
+            canceled += len(rows)
+    except Exception as exc:
+        logger.warning("expire_holds retry", extra={"canceled_so_far": canceled, "error": str(exc)})
+        raise self.retry(exc=exc)
+    logger.info("expire_holds done", extra={"canceled_count": canceled})
+    return canceled
+
+
 @shared_task(bind=True, max_retries=5, default_retry_delay=60)
 def send_notifications(self, reservation_id, event):
     """Dummy: loguje zdarzenie. Hook pod e-mail / WebSocket (do rozbudowy).
 
-    event: np. 'created', 'confirmed', 'canceled', 'hold_expired'.
+    event: np. 'created', 'confirmed', 'canceled', 'hold_expired'. Publikowane z outboxu
+    (co najmniej raz) – powtórka o tym samym task_id jest pomijana.
     """
-    logger.info(
-        "send_notifications",
-        extra={"reservation_id": reservation_id, "event": event},
-    )
-    # hook: wywołanie pod przyszłe kanały (e-mail, WebSocket)
-    # _send_email(reservation_id, event)
-    # _push_websocket(reservation_id, event)
+    with transaction.atomic():
+        if not _outbox().claim_delivery(self.request.id):
+            logger.info("send_notifications duplicate", extra={"task_id": self.request.id})
+            return
+        logger.info(
+            "send_notifications",
+            extra={"reservation_id": reservation_id, "event": event},
+        )
+        # hook: wywołanie pod przyszłe kanały (e-mail, WebSocket)
+        # _send_email(reservation_id, event)
+        # _push_websocket(reservation_id, event)
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=120)
-def reconcile_pending(self):
-    """Sprząta stare pending (hold_expires_at <= now). Wywoływane z Beat co 5 min."""
-    now = timezone.now()
-    qs = Reservation.objects.filter(
-        status=Reservation.Status.PENDING,
-        hold_expires_at__isnull=False,
-        hold_expires_at__lte=now,
-    )
-    count = 0
-    try:
-        for r in qs:
-            r.status = Reservation.Status.CANCELED
-            r.save(update_fields=["status", "updated_at"])
-            count += 1
+@shared_task(bind=True, max_retries=5, default_retry_delay=60)
+def send_notifications_batch(self, reservation_ids, event):
+    """Jedno zdarzenie dla wielu rezerwacji (np. hold_expired z partii reconcile).
+
+    Dummy jak send_notifications: loguje zdarzenie; hook pod wysyłkę zbiorczą.
+    """
+    with transaction.atomic():
+        if not _outbox().claim_delivery(self.request.id):
+            logger.info("send_notifications_batch duplicate", extra={"task_id": self.request.id})
+            return
         logger.info(
-            "reconcile_pending done",
-            extra={"canceled_count": count},
+            "send_notifications_batch",
+            extra={
+                "reservation_ids": reservation_ids,
+                "event": event,
+                "count": len(reservation_ids),
+            },
         )
+
+
+@shared_task
+def dispatch_outbox():
+    """Publikuje zaległe zdarzenia outboxu (services.outbox.dispatch_pending). Beat co 2 s.
+
+    Zwraca liczbę opublikowanych; przy niedostępnym brokerze zdarzenia czekają w tabeli.
+    """
+    return _outbox().dispatch_pending()["sent"]
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=120)
+def reconcile_pending(self, cutoff=None, after_id=0, canceled=0):
+    """Sprząta stare pending (hold_expires_at <= now). Wywoływane z Beat co 5 min.
+
+    Partiami po RESERVATION_RECONCILE_CHUNK_SIZE (services.holds.expire_in_chunks): każda
+    partia to jeden UPDATE ... RETURNING we własnej transakcji i jedno zdarzenie
+    hold_expired dla całej partii. Checkpoint (cutoff, after_id, canceled) przekazywany
+    jest do retry – ponowienie kontynuuje od ostatniej zatwierdzonej partii.
+    """
+    from reservations.services.holds import expire_in_chunks
+
+    now = datetime.fromisoformat(cutoff) if cutoff else timezone.now()
+    try:
+        for rows in expire_in_chunks(now, after_id=after_id):
+            after_id = max(row[0] for row in rows)
+            canceled += len(rows)
+            logger.info(
+                "reconcile_pending chunk",
+                extra={"chunk_count": len(rows), "canceled_so_far": canceled, "after_id": after_id},
+            )
     except Exception as exc:
         logger.warning(
             "reconcile_pending retry",
-            extra={"canceled_so_far": count, "error": str(exc)},
+            extra={"canceled_so_far": canceled, "after_id": after_id, "error": str(exc)},
         )
-        raise self.retry(exc=exc)
+        raise self.retry(
+            exc=exc,
+            kwargs={"cutoff": now.isoformat(), "after_id": after_id, "canceled": canceled},
+        )
+    logger.info(
+        "reconcile_pending done",
+        extra={"canceled_count": canceled},
+    )
+    return canceled
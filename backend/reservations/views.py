@@ -1,6 +1,12 @@
 """ViewSet i endpointy REST dla rezerwacji."""
 
-from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
 
 from drf_spectacular.utils import (
     OpenApiExample,
@@ -10,29 +16,59 @@ from drf_spectacular.utils import (
 )
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
-from accounts.permissions import IsOwnerOrAdmin
+from accounts.permissions import IsAdmin, IsOwnerOrAdmin
+from config.conditional import ConditionalGetMixin, etag_matches
+from config.pagination import KeysetPagination
 from reservations.exceptions import ReservationCollisionError, ReservationValidationError
-from reservations.models import Reservation
+from reservations.export import CSVRenderer, NDJSONRenderer
+from reservations.filters import filter_reservations
+from reservations.ical import (
+    room_feed,
+    rotate_user_feed_key,
+    user_feed,
+    user_feed_token,
+    user_from_token,
+)
+from reservations.models import Reservation, expired_hold_q
+from reservations.reporting import utilization_report
 from reservations.serializers import (
+    RESERVATION_LIST_SPEC,
+    AvailabilitySearchQuerySerializer,
+    CalendarQuerySerializer,
+    FreeRoomsQuerySerializer,
+    FreeRoomsSerializer,
     ReservationCreateSerializer,
     ReservationDetailSerializer,
     ReservationListSerializer,
+    RoomAvailabilitySerializer,
+    UtilizationReportQuerySerializer,
 )
+from reservations.services.availability import find_free_slots, room_timeline
+from reservations.services.bitmap import free_rooms
 from reservations.services.booking import (
     cancel_reservation,
     confirm_reservation,
     create_reservation,
 )
+from rooms.models import Room
 
 
 @extend_schema_view(
     list=extend_schema(
         tags=["reservations"],
         summary="Lista rezerwacji",
-        description="Lista z filtrami: room_id, from (start_at__gte), to (end_at__lte), status. Wymaga uwierzytelnienia.",
+        description=(
+            "Lista z filtrami: room_id, from (start_at__gte), to (end_at__lte), status. "
+            "Paginacja kursorowa po (-start_at, -id): linki next/previous, page_size do 200; "
+            "paginate=false zwraca całą listę bez paginacji. Wymaga uwierzytelnienia."
+        ),
         parameters=[
             OpenApiParameter("room_id", int, OpenApiParameter.QUERY, required=False),
             OpenApiParameter(
@@ -63,6 +99,13 @@ from reservations.services.booking import (
                 required=False,
                 enum=["pending", "confirmed", "canceled"],
             ),
+            OpenApiParameter(
+                "fields",
+                str,
+                OpenApiParameter.QUERY,
+                required=False,
+                description="Wybrane pola wyniku po przecinku, np. id,start_at,end_at.",
+            ),
         ],
         responses={
             200: ReservationListSerializer(many=True),
@@ -71,21 +114,25 @@ from reservations.services.booking import (
         examples=[
             OpenApiExample(
                 "Response",
-                value=[
-                    {
-                        "id": 1,
-                        "user": 1,
-                        "user_email": "user@example.com",
-                        "room": 1,
-                        "room_name": "Sala A",
-                        "status": "confirmed",
-                        "start_at": "2025-01-15T09:00:00+01:00",
-                        "end_at": "2025-01-15T10:00:00+01:00",
-                        "hold_expires_at": None,
-                        "created_at": "2025-01-14T12:00:00Z",
-                        "updated_at": "2025-01-14T12:05:00Z",
-                    },
-                ],
+                value={
+                    "next": "http://localhost:8000/api/reservations/?cursor=eyJ2IjpbIjIw...",
+                    "previous": None,
+                    "results": [
+                        {
+                            "id": 1,
+                            "user": 1,
+                            "user_email": "user@example.com",
+                            "room": 1,
+                            "room_name": "Sala A",
+                            "status": "confirmed",
+                            "start_at": "2025-01-15T09:00:00+01:00",
+                            "end_at": "2025-01-15T10:00:00+01:00",
+                            "hold_expires_at": None,
+                            "created_at": "2025-01-14T12:00:00Z",
+                            "updated_at": "2025-01-14T12:05:00Z",
+                        },
+                    ],
+                },
                 response_only=True,
             ),
         ],
@@ -123,7 +170,7 @@ from reservations.services.booking import (
     create=extend_schema(
         tags=["reservations"],
         summary="Utwórz rezerwację",
-        description="Tworzy rezerwację (pending), ustawia hold 15 min, planuje expire_hold. Wymaga uwierzytelnienia.",
+        description="Tworzy rezerwację (pending), ustawia hold 15 min, planuje jego wygaszenie. Wymaga uwierzytelnienia.",
         request=ReservationCreateSerializer,
         responses={
             201: ReservationDetailSerializer,
@@ -208,36 +255,58 @@ from reservations.services.booking import (
             ),
         ],
     ),
+    export=extend_schema(
+        tags=["reservations"],
+        summary="Eksport rezerwacji (admin)",
+        description=(
+            "Strumień wszystkich pasujących rezerwacji bez paginacji: format=ndjson (domyślnie) "
+            "lub format=csv. Filtry jak w liście (room_id, from, to, status, mine) oraz fields. "
+            "Tylko admin."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "format", str, OpenApiParameter.QUERY, required=False, enum=["ndjson", "csv"]
+            ),
+            OpenApiParameter("room_id", int, OpenApiParameter.QUERY, required=False),
+            OpenApiParameter("from", str, OpenApiParameter.QUERY, required=False),
+            OpenApiParameter("to", str, OpenApiParameter.QUERY, required=False),
+            OpenApiParameter("status", str, OpenApiParameter.QUERY, required=False),
+            OpenApiParameter("fields", str, OpenApiParameter.QUERY, required=False),
+        ],
+        responses={
+            (200, "application/x-ndjson"): {"type": "string"},
+            (200, "text/csv"): {"type": "string"},
+            401: {"description": "Brak uwierzytelnienia"},
+            403: {"description": "Brak uprawnień (wymagana rola admin)"},
+        },
+    ),
 )
-class ReservationViewSet(ModelViewSet):
+class ReservationViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsOwnerOrAdmin]
+    # Lista i szczegóły zawierają nazwę sali i dane użytkownika.
+    conditional_related = ("room__updated_at", "user__updated_at")
+    pagination_class = KeysetPagination
+    # Keyset po (start_at, id) – indeksy reservations_room_start_idx / reservations_user_start_idx
+    # (filtry room_id, mine) oraz reservations_start_idx (lista admina).
+    ordering = ("-start_at", "-id")
+
+    def get_conditional_aggregates(self):
+        # Wygasły hold zmienia status (pending → canceled) bez zmiany wiersza: liczba
+        # wygasłych holdów rośnie w chwili wygaśnięcia, więc ETag zmienia się od razu,
+        # a nie dopiero po anulowaniu w tle (updated_at).
+        return {
+            **super().get_conditional_aggregates(),
+            "expired_holds": Count("pk", filter=expired_hold_q(timezone.now()), distinct=True),
+        }
 
     def get_queryset(self):
-        qs = Reservation.objects.select_related("room", "user").order_by("-start_at")
-        # Filtry: room_id, from (start_at__gte), to (end_at__lte), status
-        room_id = self.request.query_params.get("room_id")
-        if room_id is not None:
-            try:
-                qs = qs.filter(room_id=int(room_id))
-            except ValueError:
-                pass
-        from_ = self.request.query_params.get("from")
-        if from_:
-            dt = parse_datetime(from_)
-            if dt is not None:
-                qs = qs.filter(start_at__gte=dt)
-        to_ = self.request.query_params.get("to")
-        if to_:
-            dt = parse_datetime(to_)
-            if dt is not None:
-                qs = qs.filter(end_at__lte=dt)
-        status_ = self.request.query_params.get("status")
-        if status_ and status_ in dict(Reservation.Status.choices):
-            qs = qs.filter(status=status_)
-        mine = self.request.query_params.get("mine", "").lower()
-        if mine in ("true", "1"):
-            qs = qs.filter(user=self.request.user)
-        return qs
+        qs = (
+            Reservation.objects.with_current_status()
+            .select_related("room", "user")
+            .order_by(*self.ordering)
+        )
+        # Filtry: room_id, from (start_at__gte), to (end_at__lte), status, mine
+        return filter_reservations(qs, self.request.query_params, self.request.user)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -247,9 +316,13 @@ class ReservationViewSet(ModelViewSet):
         )
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        ser = ReservationListSerializer(queryset, many=True)
-        return Response(ser.data)
+        # Wiersze values() zamiast instancji + ReservationListSerializer (ten sam JSON).
+        spec = RESERVATION_LIST_SPEC.for_request(request)
+        queryset = self.filter_queryset(self.get_queryset()).values(*spec.sources)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(spec.serialize(page))
+        return Response(spec.serialize(queryset))
 
     def create(self, request, *args, **kwargs):
         ser = ReservationCreateSerializer(data=request.data)
@@ -281,6 +354,25 @@ class ReservationViewSet(ModelViewSet):
         instance = self.get_object()
         return Response(ReservationDetailSerializer(instance).data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAdmin],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        pagination_class=None,
+    )
+    def export(self, request):
+        renderer = request.accepted_renderer
+        names = RESERVATION_LIST_SPEC.requested_fields(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            renderer.stream(queryset, names),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = f'attachment; filename="reservations.{renderer.format}"'
+        return response
+
     @action(detail=True, methods=["post"], url_path="confirm")
     def confirm(self, request, pk=None):
         reservation = self.get_object()
@@ -306,3 +398,322 @@ class ReservationViewSet(ModelViewSet):
             )
         reservation.refresh_from_db()
         return Response(ReservationDetailSerializer(reservation).data)
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Wyszukiwarka wolnych slotów",
+    description=(
+        "Wolne okna (co najmniej `duration` minut) wszystkich sal spełniających filtry "
+        "w godzinach pracy danego dnia. Przedziały półotwarte [start_at, end_at). "
+        "Zwraca tylko sale z co najmniej jednym wolnym oknem. Wymaga uwierzytelnienia."
+    ),
+    parameters=[AvailabilitySearchQuerySerializer],
+    responses={
+        200: RoomAvailabilitySerializer(many=True),
+        400: {"description": "Błąd walidacji parametrów"},
+        401: {"description": "Brak uwierzytelnienia"},
+    },
+    examples=[
+        OpenApiExample(
+            "Response",
+            value=[
+                {
+                    "room_id": 1,
+                    "room_name": "Sala A",
+                    "capacity": 10,
+                    "location": "Piętro 1",
+                    "slots": [
+                        {
+                            "start_at": "2025-01-15T08:00:00+01:00",
+                            "end_at": "2025-01-15T09:00:00+01:00",
+                        },
+                        {
+                            "start_at": "2025-01-15T10:00:00+01:00",
+                            "end_at": "2025-01-15T18:00:00+01:00",
+                        },
+                    ],
+                },
+            ],
+            response_only=True,
+        ),
+    ],
+)
+class AvailabilitySearchView(APIView):
+    """GET /api/availability/search?date=&duration=&capacity=&location=&equipment="""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = AvailabilitySearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        found = find_free_slots(
+            data["date"],
+            timedelta(minutes=data["duration"]),
+            min_capacity=data.get("capacity"),
+            location=data.get("location"),
+            equipment_ids=data.get("equipment"),
+        )
+        payload = [
+            {
+                "room_id": room.id,
+                "room_name": room.name,
+                "capacity": room.capacity,
+                "location": room.location,
+                "slots": [{"start_at": start, "end_at": end} for start, end in slots],
+            }
+            for room, slots in found
+        ]
+        return Response(RoomAvailabilitySerializer(payload, many=True).data)
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Sale wolne w przedziale",
+    description=(
+        "Id sal wolnych w całym [start_at, end_at). Odpowiedź z bitmap zajętości w cache "
+        "(siatka RESERVATION_BITMAP_SLOT_MINUTES); przedziały niewyrównane do siatki "
+        "rozstrzygane dokładnym zapytaniem. Wymaga uwierzytelnienia."
+    ),
+    parameters=[FreeRoomsQuerySerializer],
+    responses={
+        200: FreeRoomsSerializer,
+        400: {"description": "Błąd walidacji parametrów"},
+        401: {"description": "Brak uwierzytelnienia"},
+    },
+    examples=[OpenApiExample("Response", value={"room_ids": [1, 3]}, response_only=True)],
+)
+class FreeRoomsView(APIView):
+    """GET /api/availability/free-rooms?start_at=&end_at=&room_ids="""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = FreeRoomsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        rooms = Room.objects.order_by("id")
+        if data.get("room_ids"):
+            rooms = rooms.filter(id__in=data["room_ids"])
+        room_ids = rooms.values_list("id", flat=True)
+        return Response({"room_ids": free_rooms(room_ids, data["start_at"], data["end_at"])})
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Raport wykorzystania sal (admin)",
+    description=(
+        "Wykorzystanie sal (% minut dnia pracy zajętych przez potwierdzone rezerwacje), "
+        "mapa cieplna dzień tygodnia × godzina, godziny szczytu oraz odsetek anulowań "
+        "i wygasłych holdów (przybliżenie no-show) dla dni [from, to]. Tylko admin."
+    ),
+    parameters=[UtilizationReportQuerySerializer],
+    responses={
+        200: {"description": "Raport (JSON)"},
+        400: {"description": "Błąd walidacji parametrów"},
+        401: {"description": "Brak uwierzytelnienia"},
+        403: {"description": "Brak uprawnień (wymagana rola admin)"},
+    },
+    examples=[
+        OpenApiExample(
+            "Response",
+            value={
+                "from": "2025-01-01",
+                "to": "2025-03-31",
+                "reservations": 1520,
+                "utilization": 41.37,
+                "cancel_ratio": 0.0921,
+                "no_show_ratio": 0.0315,
+                "rooms": [
+                    {
+                        "room_id": 1,
+                        "room_name": "Sala A",
+                        "reservations": 812,
+                        "booked_minutes": 24360.0,
+                        "utilization": 45.11,
+                        "cancel_ratio": 0.0813,
+                        "no_show_ratio": 0.0246,
+                    },
+                ],
+                "heatmap": [[0.0] * 24 for _weekday in range(7)],
+                "peak_hours": [{"weekday": 1, "hour": 10, "utilization": 88.5}],
+            },
+            response_only=True,
+        ),
+    ],
+)
+class UtilizationReportView(APIView):
+    """GET /api/reports/utilization?from=&to=&room_ids="""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        params = UtilizationReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(utilization_report(data["from"], data["to"], room_ids=data.get("room_ids")))
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Oś czasu sal (kalendarz)",
+    description=(
+        "Zwarta oś czasu dla widoku kalendarza: nazwy sal oraz per sala lista "
+        "[id, start_offset, end_offset, status] nie-anulowanych rezerwacji nakładających się "
+        "na [from, to). Offsety w sekundach od `from`. Bez danych użytkowników. "
+        "Wymaga uwierzytelnienia."
+    ),
+    parameters=[CalendarQuerySerializer],
+    responses={
+        200: {"description": "Oś czasu (JSON)"},
+        400: {"description": "Błąd walidacji parametrów"},
+        401: {"description": "Brak uwierzytelnienia"},
+    },
+    examples=[
+        OpenApiExample(
+            "Response",
+            value={
+                "from": "2025-01-13T00:00:00+01:00",
+                "to": "2025-01-20T00:00:00+01:00",
+                "rooms": {"1": "Sala A", "2": "Sala B"},
+                "timeline": {
+                    "1": [[15, 32400, 36000, "confirmed"], [17, 122400, 124200, "pending"]],
+                    "2": [],
+                },
+            },
+            response_only=True,
+        ),
+    ],
+)
+class CalendarView(APIView):
+    """GET /api/calendar?from=&to=&room_ids="""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = CalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        start, end = data["from"], data["to"]
+        names, timeline = room_timeline(start, end, room_ids=data.get("room_ids"))
+        return Response(
+            {
+                "from": timezone.localtime(start).isoformat(),
+                "to": timezone.localtime(end).isoformat(),
+                "rooms": names,
+                "timeline": timeline,
+            }
+        )
+
+
+class _FirstRendererNegotiation(BaseContentNegotiation):
+    """Klienci kalendarzy wysyłają różne Accept – odpowiedzi błędów zawsze jako JSON."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class _CalendarFeedView(APIView):
+    """Wspólna obsługa kanałów .ics: 304 po ETag, treść z cache albo strumień."""
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    content_negotiation_class = _FirstRendererNegotiation
+    content_type = "text/calendar; charset=utf-8"
+
+    def feed_response(self, request, feed, filename):
+        etag = feed.etag
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            response = HttpResponseNotModified()
+        else:
+            body = feed.cached()
+            if body is not None:
+                response = HttpResponse(body, content_type=self.content_type)
+            else:
+                response = StreamingHttpResponse(feed.stream(), content_type=self.content_type)
+            response["Content-Disposition"] = f'inline; filename="{filename}"'
+        response["ETag"] = etag
+        return response
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Kanał iCalendar sali",
+    description=(
+        "Publiczny kanał .ics zajętości sali (bez danych osobowych), od 30 dni wstecz. "
+        "ETag + If-None-Match → 304."
+    ),
+    responses={
+        (200, "text/calendar"): {"type": "string"},
+        304: {"description": "Bez zmian (If-None-Match)"},
+        404: {"description": "Nie znaleziono sali"},
+    },
+)
+class RoomCalendarFeedView(_CalendarFeedView):
+    """GET /api/calendar/rooms/<room_id>.ics"""
+
+    def get(self, request, room_id):
+        room = get_object_or_404(Room, pk=room_id)
+        return self.feed_response(request, room_feed(room), f"sala-{room.pk}.ics")
+
+
+@extend_schema(
+    tags=["reservations"],
+    summary="Kanał iCalendar użytkownika",
+    description=(
+        "Kanał .ics rezerwacji użytkownika; token z GET /api/calendar/feed-link "
+        "(klienci kalendarzy nie wysyłają JWT), unieważniany przez POST na ten sam adres. "
+        "ETag + If-None-Match → 304."
+    ),
+    responses={
+        (200, "text/calendar"): {"type": "string"},
+        304: {"description": "Bez zmian (If-None-Match)"},
+        404: {"description": "Nieprawidłowy token"},
+    },
+)
+class UserCalendarFeedView(_CalendarFeedView):
+    """GET /api/calendar/users/<token>.ics"""
+
+    def get(self, request, token):
+        user = user_from_token(token)
+        if user is None:
+            raise NotFound("Nieprawidłowy token kanału.")
+        return self.feed_response(request, user_feed(user), "rezerwacje.ics")
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["reservations"],
+        summary="Link kanału iCalendar zalogowanego użytkownika",
+        description="Adres do subskrypcji w Outlook / Google Calendar. Wymaga uwierzytelnienia.",
+        responses={200: {"description": '{"url": "<adres .ics>"}'}},
+    ),
+    post=extend_schema(
+        tags=["reservations"],
+        summary="Nowy link kanału iCalendar",
+        description=(
+            "Generuje nowy klucz kanału – dotychczasowe linki użytkownika przestają działać "
+            "(np. po wycieku adresu). Zwraca nowy adres."
+        ),
+        request=None,
+        responses={200: {"description": '{"url": "<adres .ics>"}'}},
+    ),
+)
+class CalendarFeedLinkView(APIView):
+    """GET /api/calendar/feed-link – link kanału; POST – nowy link (stare unieważnione)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return self._link(request, user_feed_token(request.user))
+
+    def post(self, request):
+        return self._link(request, rotate_user_feed_key(request.user))
+
+    def _link(self, request, token):
+        path = reverse("calendar-feed-user", args=[token])
+        return Response({"url": request.build_absolute_uri(path)})
@@ -0,0 +1,127 @@
+"""Katalog sal w cache jako gotowe bajty JSON (lista i szczegóły sali).
+
+Publiczna lista sal to najczęściej odpytywany endpoint (kioski w holu). Zamiast
+serializować sale przy każdym żądaniu trzymamy wyrenderowaną odpowiedź w cache razem
+z ETag (skrót treści) – trafienie to zero zapytań do bazy, a 304 nie wymaga nawet
+odczytu treści poza cache.
+
+Unieważnianie: licznik generacji w kluczach. Każda zmiana sali, sprzętu lub
+room_equipment (sygnały w rooms.signals – obejmują RoomCreateUpdateSerializer.create /
+update / _save_equipment, zapisy EquipmentViewSet i usuwanie sal) zwiększa generację,
+teraz i ponownie po commicie – odczyt w trakcie transakcji nie utrwali starej treści.
+Przeliczenie equipment_summary (rooms.services) unieważnia katalog po swoim zapisie.
+
+Lawina przebudów (stampede) zbierana jest do jednej: w procesie jedna z LOCK_STRIPES
+blokad wybrana skrótem klucza (stała pula – klucze z generacją nie zostawiają śladu),
+między procesami cache.add jako blokada z TTL; pozostali czekają na wpis, a po
+WAIT_TIMEOUT budują odpowiedź dla siebie bez zapisu do cache.
+"""
+
+import hashlib
+import threading
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import JSONRenderer
+
+from rooms.models import Room
+from rooms.serializers import ROOM_LIST_SPEC, RoomDetailSerializer
+
+GENERATION_KEY = "rooms:catalog:generation"
+CATALOG_KEY = "rooms:catalog:{generation}:{name}"
+CATALOG_TTL = 300
+LOCK_TTL = 10
+WAIT_TIMEOUT = 2.0
+WAIT_STEP = 0.05
+LOCK_STRIPES = 64
+
+_local_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+class CatalogEntry(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def _entry(body):
+    return CatalogEntry('"{}"'.format(hashlib.sha1(body).hexdigest()), body)
+
+
+def generation():
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # Start od czasu, nie od 1 – po utracie licznika stare klucze się nie powtórzą.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        value = cache.get(GENERATION_KEY, time.time_ns())
+    return value
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate():
+    """Unieważnia cały katalog: teraz i po commicie bieżącej transakcji."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def cached_entry(name, build):
+    """CatalogEntry spod `name` w bieżącej generacji; build() → bajty przy braku wpisu."""
+    key = CATALOG_KEY.format(generation=generation(), name=name)
+    entry = cache.get(key)
+    if entry is not None:
+        return CatalogEntry(*entry)
+    with _local_locks[hash(key) % LOCK_STRIPES]:
+        entry = cache.get(key)
+        if entry is not None:
+            return CatalogEntry(*entry)
+        lock = f"{key}:lock"
+        if cache.add(lock, 1, timeout=LOCK_TTL):
+            try:
+                entry = _entry(build())
+                cache.set(key, tuple(entry), timeout=CATALOG_TTL)
+            finally:
+                cache.delete(lock)
+            return entry
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+            if entry is not None:
+                return CatalogEntry(*entry)
+    return _entry(build())
+
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+def room_list():
+    """Lista sal – te same bajty co RoomListSerializer(many=True) + JSONRenderer."""
+
+    def build():
+        spec = ROOM_LIST_SPEC.compile()
+        return _render(spec.serialize(Room.objects.values(*spec.sources)))
+
+    return cached_entry("list", build)
+
+
+def room_detail(pk):
+    """Szczegóły sali (RoomDetailSerializer); brak sali → Http404 (nie trafia do cache)."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        pk = None
+
+    def build():
+        return _render(RoomDetailSerializer(get_object_or_404(Room, pk=pk)).data)
+
+    return cached_entry(f"room:{pk}", build)
@@ -0,0 +1,48 @@
+"""
+Przebudowa i kontrola Room.equipment_summary / equipment_mask (rooms.services).
+
+Uruchomienie: python manage.py rebuild_equipment_summary          # naprawia rozjechane sale
+              python manage.py rebuild_equipment_summary --check  # tylko raport
+              python manage.py rebuild_equipment_summary --all    # przelicza wszystkie sale
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from rooms import catalog
+from rooms.models import Room
+from rooms.services import find_drift, refresh_equipment_summary
+
+
+class Command(BaseCommand):
+    help = "Przebudowuje podsumowanie sprzętu sal i wykrywa rozjazd z room_equipment."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="Tylko sprawdza; kod błędu przy rozjeździe."
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Przelicza wszystkie sale, nie tylko rozjechane."
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        drifted = find_drift(chunk_size=options["chunk_size"])
+        if options["check"]:
+            if drifted:
+                raise CommandError(
+                    f"Rozjazd podsumowania sprzętu w {len(drifted)} salach: "
+                    + ", ".join(map(str, drifted[:20]))
+                    + (" …" if len(drifted) > 20 else "")
+                )
+            self.stdout.write(self.style.SUCCESS("Podsumowanie sprzętu zgodne."))
+            return
+
+        room_ids = Room.objects.values_list("id", flat=True) if options["all"] else drifted
+        with transaction.atomic():
+            updated = refresh_equipment_summary(room_ids)
+            if updated:
+                catalog.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(f"Przeliczono sale: {updated} (rozjechane: {len(drifted)}).")
+        )
@@ -0,0 +1,49 @@
+"""Room.equipment_summary i equipment_mask + wypełnienie z istniejących room_equipment."""
+
+from django.db import migrations, models
+
+MASK_MAX_ID = 62
+
+
+def fill_summary(apps, schema_editor):
+    Room = apps.get_model("rooms", "Room")
+    RoomEquipment = apps.get_model("rooms", "RoomEquipment")
+    computed = {}
+    rows = RoomEquipment.objects.order_by("id").values_list(
+        "room_id", "equipment_id", "equipment__name", "qty"
+    )
+    for room_id, equipment_id, name, qty in rows:
+        summary, mask = computed.setdefault(room_id, ([], 0))
+        summary.append({"id": equipment_id, "name": name, "qty": qty})
+        if 0 < equipment_id <= MASK_MAX_ID:
+            computed[room_id] = (summary, mask | 1 << equipment_id)
+    rooms = list(Room.objects.filter(pk__in=computed).only("id"))
+    for room in rooms:
+        room.equipment_summary, room.equipment_mask = computed[room.pk]
+    Room.objects.bulk_update(rooms, ["equipment_summary", "equipment_mask"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rooms", "0002_add_room_capacity_location"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="equipment_summary",
+            field=models.JSONField(
+                blank=True, default=list, help_text="Sprzęt sali: [{id, name, qty}, ...]"
+            ),
+        ),
+        migrations.AddField(
+            model_name="room",
+            name="equipment_mask",
+            field=models.BigIntegerField(
+                default=0,
+                help_text="Bity id sprzętu sali (id <= 62), do filtrowania bez złączenia",
+            ),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
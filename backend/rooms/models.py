@@ -7,6 +7,13 @@ class Room(models.Model):
     location = models.CharField(
         max_length=255, blank=True, default="", help_text="Lokalizacja, np. piętro, budynek"
     )
+    # Dane pochodne z room_equipment – utrzymywane przez rooms.services.
+    equipment_summary = models.JSONField(
+        default=list, blank=True, help_text="Sprzęt sali: [{id, name, qty}, ...]"
+    )
+    equipment_mask = models.BigIntegerField(
+        default=0, help_text="Bity id sprzętu sali (id <= 62), do filtrowania bez złączenia"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
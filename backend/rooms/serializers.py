@@ -3,7 +3,9 @@
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from config.fastserializers import DateTime, FastSpec, Field
 from rooms.models import Equipment, Room, RoomEquipment
+from rooms.services import batched_refresh
 
 
 class RoomListSerializer(serializers.ModelSerializer):
@@ -27,10 +29,20 @@ class RoomListSerializer(serializers.ModelSerializer):
         }
     )
     def get_equipment(self, obj):
-        return [
-            {"id": re.equipment.id, "name": re.equipment.name, "qty": re.qty}
-            for re in obj.roomequipment_set.all()
-        ]
+        # Podsumowanie utrzymywane przez rooms.services – bez złączenia z room_equipment.
+        return obj.equipment_summary
+
+
+# Szybka ścieżka listy (config.fastserializers) – ten sam wynik co RoomListSerializer.
+ROOM_LIST_SPEC = FastSpec(
+    Field("id"),
+    Field("name"),
+    Field("capacity"),
+    Field("location"),
+    Field("equipment", source="equipment_summary"),
+    DateTime("created_at"),
+    DateTime("updated_at"),
+)
 
 
 class RoomDetailSerializer(serializers.ModelSerializer):
@@ -54,10 +66,8 @@ class RoomDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_equipment(self, obj):
-        return [
-            {"id": re.equipment.id, "name": re.equipment.name, "qty": re.qty}
-            for re in obj.roomequipment_set.all()
-        ]
+        # Podsumowanie utrzymywane przez rooms.services – bez złączenia z room_equipment.
+        return obj.equipment_summary
 
 
 class RoomEquipmentInputSerializer(serializers.Serializer):
@@ -109,14 +119,16 @@ class RoomCreateUpdateSerializer(serializers.ModelSerializer):
         return room
 
     def _save_equipment(self, room, equipment_data):
-        """Zastąpienie sprzętu w sali."""
-        room.roomequipment_set.all().delete()
-        for item in equipment_data:
-            RoomEquipment.objects.create(
-                room=room,
-                equipment_id=item["equipment_id"],
-                qty=item.get("qty", 1),
-            )
+        """Zastąpienie sprzętu w sali (podsumowanie sprzętu przeliczane raz, na końcu)."""
+        with batched_refresh():
+            room.roomequipment_set.all().delete()
+            for item in equipment_data:
+                RoomEquipment.objects.create(
+                    room=room,
+                    equipment_id=item["equipment_id"],
+                    qty=item.get("qty", 1),
+                )
+        room.refresh_from_db(fields=["equipment_summary", "equipment_mask"])
 
 
 class EquipmentSerializer(serializers.ModelSerializer):
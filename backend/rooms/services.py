@@ -0,0 +1,117 @@
+"""Zdenormalizowane podsumowanie sprzętu sali (Room.equipment_summary / equipment_mask).
+
+equipment_summary to gotowa lista [{id, name, qty}, ...] w kolejności wierszy
+room_equipment (jak dawne get_equipment) – katalog sal renderuje się z jednej tabeli.
+equipment_mask to bity id sprzętu (bit n ↔ equipment_id n, n <= MASK_MAX_ID) do
+filtrowania sal po sprzęcie bez złączenia; sprzęt o większym id nie ma bitu i filtr
+wraca wtedy do złączenia z room_equipment.
+
+Spójność: sygnały w rooms.signals (zapis/usunięcie room_equipment, zmiana nazwy
+i usunięcie Equipment) odświeżają dotknięte sale. Hurtowe zmiany (_save_equipment)
+zbierają je w batched_refresh() – jedno przeliczenie na koniec. Zapisy z pominięciem
+sygnałów (bulk_create, SQL) wymagają refresh_equipment_summary; rozjazd wykrywa
+komenda rebuild_equipment_summary.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from rooms.models import Room, RoomEquipment
+
+MASK_MAX_ID = 62
+
+_state = threading.local()
+
+
+def equipment_mask(equipment_ids):
+    """Maska bitowa dla id sprzętu; None, gdy któreś id nie mieści się w masce."""
+    mask = 0
+    for equipment_id in equipment_ids:
+        if not 0 < equipment_id <= MASK_MAX_ID:
+            return None
+        mask |= 1 << equipment_id
+    return mask
+
+
+def compute_equipment_summary(room_ids):
+    """{room_id: (summary, mask)} dla podanych sal – jedno zapytanie po room_equipment."""
+    result = {room_id: ([], 0) for room_id in room_ids}
+    rows = (
+        RoomEquipment.objects.filter(room_id__in=result)
+        .order_by("id")
+        .values_list("room_id", "equipment_id", "equipment__name", "qty")
+    )
+    for room_id, equipment_id, name, qty in rows:
+        summary, mask = result[room_id]
+        summary.append({"id": equipment_id, "name": name, "qty": qty})
+        result[room_id] = (summary, mask | (equipment_mask([equipment_id]) or 0))
+    return result
+
+
+def refresh_equipment_summary(room_ids):
+    """Przelicza kolumny podsumowania sprzętu podanych sal; zwraca liczbę sal.
+
+    Katalog sal (rooms.catalog) renderuje equipment_summary, więc jest unieważniany po
+    zapisie – unieważnienie z sygnału przed przeliczeniem nie wystarcza (w autocommit
+    czytelnik zdążyłby zapisać w cache starą treść w nowej generacji).
+    """
+    # Import lokalny: rooms.catalog importuje serializery, a te ten moduł.
+    from rooms import catalog
+
+    computed = compute_equipment_summary(set(room_ids))
+    rooms = list(Room.objects.filter(pk__in=computed).only("id"))
+    for room in rooms:
+        room.equipment_summary, room.equipment_mask = computed[room.pk]
+    # bulk_update nie dotyka updated_at – podsumowanie to dane pochodne, nie edycja sali.
+    Room.objects.bulk_update(rooms, ["equipment_summary", "equipment_mask"], batch_size=500)
+    if rooms:
+        catalog.invalidate()
+    return len(rooms)
+
+
+def rooms_with_equipment(equipment_id):
+    """Id sal, do których przypisany jest dany sprzęt."""
+    return list(
+        RoomEquipment.objects.filter(equipment_id=equipment_id)
+        .values_list("room_id", flat=True)
+        .distinct()
+    )
+
+
+def schedule_refresh(room_ids):
+    """Odświeża sale od razu albo – wewnątrz batched_refresh() – na jego końcu."""
+    pending = getattr(_state, "pending", None)
+    if pending is None:
+        refresh_equipment_summary(room_ids)
+    else:
+        pending.update(room_ids)
+
+
+@contextmanager
+def batched_refresh():
+    """Zbiera odświeżenia z schedule_refresh i wykonuje je raz po wyjściu z bloku."""
+    if getattr(_state, "pending", None) is not None:
+        yield
+        return
+    _state.pending = pending = set()
+    try:
+        yield
+    finally:
+        _state.pending = None
+    refresh_equipment_summary(pending)
+
+
+def find_drift(chunk_size=500):
+    """Id sal, których equipment_summary/equipment_mask różnią się od room_equipment."""
+    drifted = []
+    room_ids = list(Room.objects.order_by("id").values_list("id", flat=True))
+    for offset in range(0, len(room_ids), chunk_size):
+        chunk = room_ids[offset : offset + chunk_size]
+        computed = compute_equipment_summary(chunk)
+        stored = Room.objects.filter(pk__in=chunk).values_list(
+            "id", "equipment_summary", "equipment_mask"
+        )
+        drifted.extend(
+            room_id for room_id, summary, mask in stored if computed[room_id] != (summary, mask)
+        )
+    return sorted(drifted)
@@ -0,0 +1,41 @@
+"""Sygnały sal i sprzętu: unieważnianie katalogu (rooms.catalog) i podsumowania sprzętu."""
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from rooms import catalog
+from rooms.models import Equipment, Room, RoomEquipment
+from rooms.services import rooms_with_equipment, schedule_refresh
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_save, sender=RoomEquipment)
+@receiver(post_delete, sender=RoomEquipment)
+def invalidate_catalog(sender, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=RoomEquipment)
+@receiver(post_delete, sender=RoomEquipment)
+def refresh_room_summary(sender, instance, **kwargs):
+    schedule_refresh([instance.room_id])
+
+
+@receiver(post_save, sender=Equipment)
+def refresh_summary_on_rename(sender, instance, created, **kwargs):
+    if not created:
+        schedule_refresh(rooms_with_equipment(instance.pk))
+
+
+@receiver(pre_delete, sender=Equipment)
+def remember_equipment_rooms(sender, instance, **kwargs):
+    # Po usunięciu (kaskada room_equipment) nie da się już ustalić sal sprzętu.
+    instance._summary_room_ids = rooms_with_equipment(instance.pk)
+
+
+@receiver(post_delete, sender=Equipment)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    schedule_refresh(getattr(instance, "_summary_room_ids", ()))
@@ -1,14 +1,25 @@
 """ViewSet i endpointy REST dla sal."""
 
-from drf_spectacular.utils import OpenApiExample, extend_schema, extend_schema_view
+from django.db.models import Count, Max
+from django.http import HttpResponse
+
+from drf_spectacular.utils import (
+    OpenApiExample,
+    OpenApiParameter,
+    extend_schema,
+    extend_schema_view,
+)
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from accounts.permissions import IsAdmin
+from config.conditional import ConditionalGetMixin
+from rooms import catalog
 from rooms.models import Equipment, Room, RoomEquipment
 from rooms.serializers import (
+    ROOM_LIST_SPEC,
     EquipmentSerializer,
     RoomCreateUpdateSerializer,
     RoomDetailSerializer,
@@ -20,7 +31,13 @@ from rooms.serializers import (
     list=extend_schema(
         tags=["rooms"],
         summary="Lista sal",
-        description="Publiczna lista sal. Bez uwierzytelnienia.",
+        description=(
+            "Publiczna lista sal. Bez uwierzytelnienia. "
+            "fields – wybrane pola po przecinku, np. id,name,capacity."
+        ),
+        parameters=[
+            OpenApiParameter("fields", str, OpenApiParameter.QUERY, required=False),
+        ],
         responses={200: RoomListSerializer(many=True)},
         examples=[
             OpenApiExample(
@@ -105,8 +122,35 @@ from rooms.serializers import (
         },
     ),
 )
-class RoomViewSet(ModelViewSet):
-    queryset = Room.objects.all().prefetch_related("roomequipment_set__equipment")
+class RoomViewSet(ConditionalGetMixin, ModelViewSet):
+    queryset = Room.objects.all()
+    _catalog = None
+
+    def _catalog_entry(self):
+        """Wpis katalogu w cache (rooms.catalog) albo None dla wariantów spoza cache."""
+        if self.request.accepted_renderer.format != "json":
+            return None
+        if self.action == "list" and not self.request.query_params:
+            return catalog.room_list()
+        if self.action == "retrieve":
+            return catalog.room_detail(self.kwargs[self.lookup_field])
+        return None
+
+    def get_conditional_headers(self):
+        # Katalog w cache: ETag ze skrótu treści, bez zapytania o odcisk.
+        self._catalog = self._catalog_entry()
+        if self._catalog is None:
+            return super().get_conditional_headers()
+        return {"ETag": self._catalog.etag, "Cache-Control": "private, no-cache"}
+
+    def get_conditional_aggregates(self):
+        # Sprzęt sali: _save_equipment usuwa i tworzy wiersze room_equipment od nowa.
+        return {
+            **super().get_conditional_aggregates(),
+            "equipment_count": Count("roomequipment", distinct=True),
+            "equipment_modified": Max("roomequipment__updated_at"),
+            "equipment_renamed": Max("roomequipment__equipment__updated_at"),
+        }
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -120,6 +164,19 @@ class RoomViewSet(ModelViewSet):
             return [AllowAny()]
         return [IsAdmin()]
 
+    def list(self, request, *args, **kwargs):
+        if self._catalog is not None:
+            return HttpResponse(self._catalog.body, content_type="application/json")
+        # Wiersze values() (sprzęt z equipment_summary) zamiast RoomListSerializer.
+        spec = ROOM_LIST_SPEC.for_request(request)
+        queryset = self.filter_queryset(Room.objects.all()).values(*spec.sources)
+        return Response(spec.serialize(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self._catalog is not None:
+            return HttpResponse(self._catalog.body, content_type="application/json")
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         ser = self.get_serializer(data=request.data)
         ser.is_valid(raise_exception=True)
@@ -191,7 +248,7 @@ class RoomViewSet(ModelViewSet):
         },
     ),
 )
-class EquipmentViewSet(ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, ModelViewSet):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
 
@@ -0,0 +1,93 @@
+"""Testy użytkownika z cache w uwierzytelnianiu JWT (accounts.authentication)."""
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import RoleRefreshToken, cached_user
+from accounts.models import Role, User, UserRole
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username="jan@ex.com", email="jan@ex.com", password="test", first_name="Jan"
+    )
+
+
+@pytest.fixture
+def admin(db):
+    user = User.objects.create_user(username="a@ex.com", email="a@ex.com", password="test")
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="admin")[0])
+    return user
+
+
+def _bearer(user, token_class=RoleRefreshToken):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token_class.for_user(user).access_token}")
+    return client
+
+
+@pytest.mark.django_db
+class TestCachedUser:
+    def test_cieply_me_bez_zapytan(self, user, django_assert_num_queries):
+        client = _bearer(user)
+        with django_assert_num_queries(1):
+            first = client.get("/api/me")
+        with django_assert_num_queries(0):
+            again = client.get("/api/me")
+        assert again.json() == first.json()
+        assert again.json()["first_name"] == "Jan"
+
+    def test_stary_token_role_z_bazy(self, user, django_assert_num_queries):
+        client = _bearer(user, RefreshToken)
+        client.get("/api/me")
+        with django_assert_num_queries(1):  # tylko role – użytkownik z cache
+            client.get("/api/me")
+
+    def test_dezaktywacja(self, user):
+        client = _bearer(user)
+        assert client.get("/api/me").status_code == status.HTTP_200_OK
+        user.is_active = False
+        user.save()
+        assert client.get("/api/me").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_usuniecie_przez_admina(self, user, admin):
+        client = _bearer(user)
+        assert client.get("/api/me").status_code == status.HTTP_200_OK
+        r = _bearer(admin).delete(f"/api/admin/users/{user.pk}/")
+        assert r.status_code == status.HTTP_204_NO_CONTENT
+        assert client.get("/api/me").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_reset_hasla_uniewaznia(self, user, admin, django_assert_num_queries):
+        client = _bearer(user)
+        client.get("/api/me")
+        r = _bearer(admin).post(
+            f"/api/admin/users/{user.pk}/reset-password/",
+            {"password": "Nowe-Haslo-123"},
+            format="json",
+        )
+        assert r.status_code == status.HTTP_200_OK
+        with django_assert_num_queries(1):  # wpis usunięty – użytkownik z bazy
+            client.get("/api/me")
+
+    def test_haslo_odroczone_i_zapis(self, user):
+        client = _bearer(user)
+        client.get("/api/me")
+        client.get("/api/me")
+        # Zapis użytkownika z cache nie nadpisuje hasła (pole odroczone).
+        cached, _ = cached_user(user.pk)
+        assert "password" in cached.get_deferred_fields()
+        cached.first_name = "Janek"
+        cached.save()
+        user.refresh_from_db()
+        assert user.first_name == "Janek"
+        assert user.check_password("test")
+
+    def test_bez_cache(self, user, settings, django_assert_num_queries):
+        settings.AUTH_USER_CACHE_TTL = 0
+        client = _bearer(user)
+        client.get("/api/me")
+        with django_assert_num_queries(1):
+            client.get("/api/me")
@@ -0,0 +1,52 @@
+"""Testy unikalnego indeksu LOWER(email) i wyszukiwania User.objects.by_email."""
+
+from django.db import IntegrityError, connection, transaction
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="jan@ex.com", email="Jan@Ex.com", password="test")
+
+
+@pytest.mark.django_db
+class TestEmailLookup:
+    def test_by_email_bez_wielkosci_liter(self, user):
+        assert User.objects.by_email("JAN@ex.COM").get() == user
+        assert not User.objects.by_email("").exists()
+
+    def test_duplikat_innej_wielkosci_liter(self, user):
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username="jan2@ex.com", email="jan@ex.com")
+
+    def test_puste_adresy_dozwolone(self, db):
+        User.objects.create_user(username="a")
+        User.objects.create_user(username="b")
+        assert User.objects.filter(email="").count() == 2
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="plan zapytania SQLite")
+    def test_plan_uzywa_indeksu(self, user):
+        assert "users_email_lower_uniq" in User.objects.by_email("jan@ex.com").explain()
+
+    def test_logowanie_i_rejestracja(self, user):
+        client = APIClient()
+        r = client.post(
+            "/api/auth/login", {"email": "JAN@EX.COM", "password": "test"}, format="json"
+        )
+        assert r.status_code == status.HTTP_200_OK
+        r = client.post(
+            "/api/auth/register",
+            {
+                "email": "jan@EX.com",
+                "password": "Xy7!pass-long",
+                "password_confirm": "Xy7!pass-long",
+            },
+            format="json",
+        )
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert "email" in r.json()
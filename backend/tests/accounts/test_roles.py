@@ -0,0 +1,87 @@
+"""Testy ról raz na żądanie i claimu "roles" w tokenie JWT (accounts.roles / authentication)."""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from accounts.models import Role, User, UserRole
+from rooms.models import Room
+
+
+@pytest.fixture
+def admin_user(db):
+    user = User.objects.create_user(username="admin@ex.com", password="test", email="admin@ex.com")
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="user")[0])
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="admin")[0])
+    return user
+
+
+def _login(email="admin@ex.com"):
+    r = APIClient().post("/api/auth/login", {"email": email, "password": "test"}, format="json")
+    assert r.status_code == status.HTTP_200_OK
+    return r.json()
+
+
+def _bearer(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+    return client
+
+
+def _role_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connection) as ctx:
+        r = getattr(client, method)(url, **kwargs)
+    return r, sum('"roles"' in query["sql"] for query in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestRoleClaims:
+    def test_login_claim_w_tokenie(self, admin_user):
+        data = _login()
+        assert AccessToken(data["access"])["roles"] == ["user", "admin"]
+        assert data["user"]["roles"] == ["user", "admin"]
+
+    def test_akcja_admina_bez_zapytan_o_role(self, admin_user):
+        room = Room.objects.create(name="Sala A")
+        client = _bearer(_login()["access"])
+        r, queries = _role_queries(
+            client, "patch", f"/api/rooms/{room.pk}/", data={"name": "Sala B"}, format="json"
+        )
+        assert r.status_code == status.HTTP_200_OK
+        assert queries == 0
+
+    def test_stary_token_jedno_zapytanie(self, admin_user):
+        # Token bez claimu (sprzed zmiany): has_permission + has_object_permission – raz.
+        room = Room.objects.create(name="Sala A")
+        client = _bearer(str(RefreshToken.for_user(admin_user).access_token))
+        r, queries = _role_queries(
+            client, "patch", f"/api/rooms/{room.pk}/", data={"name": "Sala B"}, format="json"
+        )
+        assert r.status_code == status.HTTP_200_OK
+        assert queries == 1
+
+    def test_odebranie_roli_po_odswiezeniu(self, admin_user):
+        other = User.objects.create_user(username="b@ex.com", password="test", email="b@ex.com")
+        UserRole.objects.create(user=other, role=Role.objects.get(name="admin"))
+        tokens = _login("b@ex.com")
+        r = _bearer(_login()["access"]).patch(
+            f"/api/admin/users/{other.pk}/", {"is_admin": False}, format="json"
+        )
+        assert r.status_code == status.HTTP_200_OK
+
+        # Stary access token działa do wygaśnięcia; refresh wystawia token z nowymi rolami.
+        assert _bearer(tokens["access"]).get("/api/admin/users/").status_code == 200
+        r = APIClient().post("/api/auth/refresh", {"refresh": tokens["refresh"]}, format="json")
+        access = r.json()["access"]
+        assert AccessToken(access)["roles"] == []
+        assert _bearer(access).get("/api/admin/users/").status_code == 403
+
+    def test_wylaczone_claimy(self, admin_user, settings):
+        settings.JWT_ROLE_CLAIMS = False
+        access = _login()["access"]
+        assert "roles" not in AccessToken(access)
+        assert _bearer(access).get("/api/admin/users/").status_code == 200
@@ -0,0 +1,134 @@
+"""Testy token bucket logowania/rejestracji i przehaszowania hasła w tle."""
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts import hashers, serializers, throttling
+from accounts.models import User
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="jan@ex.com", email="jan@ex.com", password="test")
+
+
+@pytest.fixture
+def rates(settings):
+    settings.AUTH_THROTTLE_RATES = {"auth_ip": "3/min", "auth_email": "2/min"}
+
+
+@pytest.fixture
+def password_checks(monkeypatch):
+    calls = []
+    original = serializers.check_password_with_rehash
+
+    def counting(user, raw_password):
+        calls.append(user.pk)
+        return original(user, raw_password)
+
+    monkeypatch.setattr(serializers, "check_password_with_rehash", counting)
+    return calls
+
+
+@pytest.mark.parametrize("period", ["s", "sec", "second", "m", "min", "minute", "hour", "day"])
+def test_parse_rate_okresy_jak_w_drf(period):
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    assert throttling.parse_rate(f"30/{period}") == (30, 30 / seconds)
+
+
+def _login(email="jan@ex.com", password="zle", ip="10.0.0.1", **headers):
+    return APIClient().post(
+        "/api/auth/login",
+        {"email": email, "password": password},
+        format="json",
+        REMOTE_ADDR=ip,
+        **headers,
+    )
+
+
+@pytest.mark.django_db
+class TestAuthThrottle:
+    def test_limit_per_email_bez_haszowania(self, user, rates, password_checks):
+        assert _login(ip="10.0.0.1").status_code == status.HTTP_400_BAD_REQUEST
+        assert _login(ip="10.0.0.2").status_code == status.HTTP_400_BAD_REQUEST
+        r = _login(email="JAN@ex.com", ip="10.0.0.3")
+        assert r.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(r["Retry-After"]) > 0
+        assert len(password_checks) == 2  # odrzucona próba nie sprawdza hasła
+
+    def test_limit_per_ip(self, user, rates):
+        for i in range(3):
+            assert _login(email=f"inny{i}@ex.com").status_code == status.HTTP_400_BAD_REQUEST
+        assert _login(email="kolejny@ex.com").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert _login(email="kolejny@ex.com", ip="10.0.0.9").status_code == 400
+
+    def test_podrobiony_x_forwarded_for_nie_omija_limitu(self, user, rates):
+        for i in range(3):
+            r = _login(email=f"inny{i}@ex.com", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}")
+            assert r.status_code == status.HTTP_400_BAD_REQUEST
+        r = _login(email="kolejny@ex.com", HTTP_X_FORWARDED_FOR="203.0.113.99")
+        assert r.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_zaufane_proxy_klient_z_x_forwarded_for(self, user, rates, settings):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        for i in range(3):
+            r = _login(email=f"inny{i}@ex.com", HTTP_X_FORWARDED_FOR=f"6.6.6.{i}, 203.0.113.7")
+            assert r.status_code == status.HTTP_400_BAD_REQUEST
+        r = _login(email="kolejny@ex.com", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        assert r.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        r = _login(email="kolejny@ex.com", HTTP_X_FORWARDED_FOR="203.0.113.8")
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_uzupelnianie_kubelka(self, user, rates, monkeypatch):
+        now = [1_000_000.0]
+        monkeypatch.setattr(throttling.time, "time", lambda: now[0])
+        _login()
+        _login()
+        assert _login().status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        now[0] += 30  # 2/min → jeden żeton po 30 s
+        assert _login(password="test").status_code == status.HTTP_200_OK
+        assert _login().status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_rejestracja(self, db, rates):
+        client = APIClient()
+        payload = {"email": "nowy@ex.com", "password": "a", "password_confirm": "b"}
+        for _ in range(2):
+            assert client.post("/api/auth/register", payload, format="json").status_code == 400
+        r = client.post("/api/auth/register", payload, format="json")
+        assert r.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_bez_limitu(self, user, settings):
+        settings.AUTH_THROTTLE_RATES = {}
+        for _ in range(15):
+            assert _login().status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestBackgroundRehash:
+    def test_przehaszowanie_po_commicie(
+        self, user, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        class InlineExecutor:
+            def submit(self, fn, *args):
+                fn(*args)
+
+        monkeypatch.setattr(hashers, "_executor", InlineExecutor())
+        monkeypatch.setattr(hashers, "close_old_connections", lambda: None)
+        settings.AUTH_PBKDF2_ITERATIONS = 1000
+        settings.AUTH_LOGIN_BACKGROUND_REHASH = True
+        old_hash = user.password
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            assert _login(password="test").status_code == status.HTTP_200_OK
+        assert callbacks  # przehaszowanie zaplanowane po commicie, nie w żądaniu
+        user.refresh_from_db()
+        assert user.password != old_hash
+        assert user.password.startswith("pbkdf2_sha256$1000$")
+        assert user.check_password("test")
+
+    def test_synchronicznie_bez_flagi(self, user, settings):
+        settings.AUTH_PBKDF2_ITERATIONS = 1000
+        assert _login(password="test").status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.password.startswith("pbkdf2_sha256$1000$")
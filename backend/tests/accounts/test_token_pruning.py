@@ -0,0 +1,104 @@
+"""Testy przycinania tabel token_blacklist i negatywnego cache czarnej listy (accounts.tokens)."""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.authentication import RoleRefreshToken
+from accounts.models import User
+from accounts.tasks import prune_tokens
+from accounts.tokens import prune_expired_tokens
+
+BLACKLIST_TABLE = BlacklistedToken._meta.db_table
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="jan@ex.com", email="jan@ex.com", password="test")
+
+
+def _tokens(user, count, *, expired, blacklisted=0):
+    now = timezone.now()
+    expires_at = now - timedelta(days=1) if expired else now + timedelta(days=1)
+    prefix = "old" if expired else "new"
+    tokens = OutstandingToken.objects.bulk_create(
+        OutstandingToken(
+            user=user, jti=f"{prefix}-{i}", token="x", created_at=now, expires_at=expires_at
+        )
+        for i in range(count)
+    )
+    BlacklistedToken.objects.bulk_create(BlacklistedToken(token=t) for t in tokens[:blacklisted])
+    return tokens
+
+
+def _refresh(client, refresh):
+    return client.post("/api/auth/refresh", {"refresh": str(refresh)}, format="json")
+
+
+def _blacklist_queries(queries):
+    return [q for q in queries if BLACKLIST_TABLE in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestPruneExpiredTokens:
+    def test_usuwa_tylko_wygasle_partiami(self, user):
+        _tokens(user, 7, expired=True, blacklisted=3)
+        _tokens(user, 2, expired=False, blacklisted=1)
+        stats = prune_expired_tokens(batch_size=3)
+        assert stats["outstanding"] == 7
+        assert stats["blacklisted"] == 3
+        assert stats["batches"] == 3
+        assert stats["outstanding_total"] == 2
+        assert stats["blacklisted_total"] == 1
+        assert set(OutstandingToken.objects.values_list("jti", flat=True)) == {"new-0", "new-1"}
+
+    def test_max_batches_ogranicza_jedno_uruchomienie(self, user):
+        _tokens(user, 5, expired=True)
+        stats = prune_expired_tokens(batch_size=2, max_batches=1)
+        assert stats["outstanding"] == 2
+        assert OutstandingToken.objects.count() == 3
+
+    def test_zadanie_celery_loguje_metryki(self, user, caplog):
+        _tokens(user, 2, expired=True)
+        with caplog.at_level("INFO", logger="accounts.tokens"):
+            result = prune_tokens()
+        assert result["outstanding"] == 2
+        record = next(r for r in caplog.records if r.getMessage() == "prune_tokens")
+        assert record.outstanding == 2 and record.outstanding_total == 0
+
+
+@pytest.mark.django_db
+class TestNegativeBlacklistCache:
+    def test_drugie_odswiezenie_bez_zapytania_o_blackliste(self, user):
+        client = APIClient()
+        refresh = RoleRefreshToken.for_user(user)
+        with CaptureQueriesContext(connection) as first:
+            assert _refresh(client, refresh).status_code == status.HTTP_200_OK
+        with CaptureQueriesContext(connection) as again:
+            assert _refresh(client, refresh).status_code == status.HTTP_200_OK
+        assert len(_blacklist_queries(first.captured_queries)) == 1
+        assert _blacklist_queries(again.captured_queries) == []
+
+    def test_wylogowanie_unieważnia_wpis(self, user):
+        client = APIClient()
+        refresh = RoleRefreshToken.for_user(user)
+        assert _refresh(client, refresh).status_code == status.HTTP_200_OK
+        response = client.post("/api/auth/logout", {"refresh": str(refresh)}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert _refresh(client, refresh).status_code == status.HTTP_401_UNAUTHORIZED
+
+    @override_settings(AUTH_BLACKLIST_NEGATIVE_TTL=0)
+    def test_ttl_zero_zawsze_zapytanie(self, user):
+        client = APIClient()
+        refresh = RoleRefreshToken.for_user(user)
+        _refresh(client, refresh)
+        with CaptureQueriesContext(connection) as again:
+            assert _refresh(client, refresh).status_code == status.HTTP_200_OK
+        assert len(_blacklist_queries(again.captured_queries)) == 1
@@ -1,5 +1,7 @@
 """Testy API zarządzania użytkownikami (admin)."""
 
+from django.db.models import F
+
 import pytest
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -58,16 +60,69 @@ class TestUserListAPI:
         client.force_authenticate(user=admin_user)
         r = client.get("/api/admin/users/")
         assert r.status_code == status.HTTP_200_OK
-        assert len(r.json()) >= 2
+        assert len(r.json()["results"]) >= 2
 
     def test_search(self, client, admin_user, regular_user):
         client.force_authenticate(user=admin_user)
         r = client.get("/api/admin/users/", {"search": "Jan"})
         assert r.status_code == status.HTTP_200_OK
-        data = r.json()
+        data = r.json()["results"]
         assert len(data) == 1
         assert data[0]["email"] == regular_user.email
 
+    def test_lista_stala_liczba_zapytan(
+        self, client, admin_user, role_user, django_assert_num_queries
+    ):
+        client.force_authenticate(user=admin_user)
+        for size in (5, 40):
+            User.objects.bulk_create(
+                User(username=f"u{size}-{i}@ex.com", email=f"u{size}-{i}@ex.com")
+                for i in range(size)
+            )
+            # rola "user" dla części kont – role w tym samym zapytaniu co strona
+            UserRole.objects.bulk_create(
+                UserRole(user=user, role=role_user)
+                for user in User.objects.filter(username__startswith=f"u{size}-")[::2]
+            )
+            admin_user.__dict__.pop("_role_names", None)
+            with django_assert_num_queries(2):  # role admina (IsAdmin) + strona
+                r = client.get("/api/admin/users/", {"page_size": size})
+            assert len(r.json()["results"]) == size
+
+    def test_role_w_liscie(self, client, admin_user, regular_user):
+        client.force_authenticate(user=admin_user)
+        rows = {u["email"]: u for u in client.get("/api/admin/users/").json()["results"]}
+        assert rows[admin_user.email]["is_admin"] is True
+        assert rows[admin_user.email]["roles"] == ["admin", "user"]
+        assert rows[regular_user.email]["is_admin"] is False
+        assert rows[regular_user.email]["roles"] == ["user"]
+
+    def test_kursor_z_ordering(self, client, admin_user):
+        client.force_authenticate(user=admin_user)
+        User.objects.bulk_create(
+            User(username=f"k{i}@ex.com", email=f"k{i}@ex.com", last_login=None) for i in range(5)
+        )
+        User.objects.filter(email__in=["k1@ex.com", "k3@ex.com"]).update(
+            last_login="2025-01-01T10:00Z"
+        )
+        cases = {
+            "email": ("email", "id"),
+            "-last_login": (F("last_login").desc(nulls_last=True), "-id"),
+            "last_login": (F("last_login").asc(nulls_first=True), "id"),
+            None: ("-created_at", "-id"),
+        }
+        for ordering, order_by in cases.items():
+            expected = list(User.objects.order_by(*order_by).values_list("email", flat=True))
+            params = {"page_size": 2}
+            if ordering:
+                params["ordering"] = ordering
+            seen, url = [], "/api/admin/users/"
+            while url:
+                data = client.get(url, params).json()
+                seen += [u["email"] for u in data["results"]]
+                url, params = data["next"], {}
+            assert seen == expected, ordering
+
 
 @pytest.mark.django_db
 class TestUserCreateAPI:
@@ -2,5 +2,27 @@
 
 import os
 
+import pytest
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
 os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "1")
+
+
+@pytest.fixture(autouse=True)
+def _reset_process_caches():
+    """Cache (m.in. bitmapy zajętości) i indeksy w pamięci procesu przeżywają rollback bazy."""
+    from django.core.cache import cache
+
+    from accounts.tokens import reset_negative_cache
+    from reservations.services.interval_index import room_index
+
+    cache.clear()
+    room_index.reset()
+    reset_negative_cache()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _occupancy_cache(settings):
+    """Testy działają w jednym procesie – LocMem jest dla nich wspólnym cache."""
+    settings.RESERVATION_OCCUPANCY_CACHE = True
@@ -0,0 +1,111 @@
+"""Testy wyszukiwarki wolnych slotów: find_free_slots i GET /api/availability/search."""
+
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from reservations.models import Reservation
+from reservations.services.availability import find_free_slots
+from rooms.models import Equipment, Room, RoomEquipment
+
+DAY = date(2030, 3, 4)
+HOUR = timedelta(hours=1)
+
+
+def _dt(h, m=0, day=DAY):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=h, minute=m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def room(db):
+    return Room.objects.create(name="Sala A", capacity=6, location="Parter")
+
+
+def _reserve(user, room, start, end, status=Reservation.Status.CONFIRMED):
+    return Reservation.objects.create(
+        user=user, room=room, status=status, start_at=start, end_at=end
+    )
+
+
+@pytest.mark.django_db
+class TestFindFreeSlots:
+    def test_pusta_sala_caly_dzien_pracy(self, room):
+        assert find_free_slots(DAY, HOUR) == [(room, [(_dt(8), _dt(18))])]
+
+    def test_przerwy_miedzy_rezerwacjami_polotwarte(self, user, room):
+        _reserve(user, room, _dt(9), _dt(10))
+        _reserve(user, room, _dt(10), _dt(11))  # styka się – brak okna [10, 10)
+        _reserve(user, room, _dt(11, 30), _dt(12))
+        _reserve(user, room, _dt(13), _dt(14), status=Reservation.Status.CANCELED)
+        [(_, slots)] = find_free_slots(DAY, HOUR)
+        assert slots == [(_dt(8), _dt(9)), (_dt(12), _dt(18))]
+        [(_, slots)] = find_free_slots(DAY, timedelta(minutes=30))
+        assert slots == [(_dt(8), _dt(9)), (_dt(11), _dt(11, 30)), (_dt(12), _dt(18))]
+
+    def test_sala_bez_okna_pominieta(self, user, room):
+        _reserve(user, room, _dt(8), _dt(17, 30))
+        assert find_free_slots(DAY, HOUR) == []
+
+    def test_dzisiaj_od_teraz(self, room):
+        assert find_free_slots(DAY, HOUR, now=_dt(12, 15)) == [(room, [(_dt(12, 15), _dt(18))])]
+        assert find_free_slots(DAY, HOUR, now=_dt(17, 30)) == []
+
+    def test_filtry_sal(self, room):
+        big = Room.objects.create(name="Sala B", capacity=20, location="I piętro")
+        projector = Equipment.objects.create(name="Projektor")
+        board = Equipment.objects.create(name="Tablica")
+        RoomEquipment.objects.create(room=big, equipment=projector)
+        RoomEquipment.objects.create(room=big, equipment=board)
+        RoomEquipment.objects.create(room=room, equipment=projector)
+
+        def names(**filters):
+            return [r.name for r, _ in find_free_slots(DAY, HOUR, **filters)]
+
+        assert names(min_capacity=10) == ["Sala B"]
+        assert names(location="parter") == ["Sala A"]
+        assert names(equipment_ids=[projector.id]) == ["Sala A", "Sala B"]
+        assert names(equipment_ids=[projector.id, board.id]) == ["Sala B"]
+
+    def test_dwa_zapytania_niezaleznie_od_liczby_sal(self, user, room, django_assert_num_queries):
+        for i in range(5):
+            other = Room.objects.create(name=f"Sala {i}")
+            _reserve(user, other, _dt(9 + i), _dt(10 + i))
+        with django_assert_num_queries(2):
+            result = find_free_slots(DAY, HOUR)
+        assert len(result) == 6
+
+
+@pytest.mark.django_db
+class TestAvailabilitySearchAPI:
+    def test_unauthenticated_401(self):
+        r = APIClient().get("/api/availability/search", {"date": DAY, "duration": 60})
+        assert r.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_200(self, user, room):
+        _reserve(user, room, _dt(9), _dt(10))
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/availability/search", {"date": DAY, "duration": 60})
+        assert r.status_code == status.HTTP_200_OK
+        [item] = r.json()
+        assert item["room_id"] == room.id
+        assert item["room_name"] == "Sala A"
+        assert len(item["slots"]) == 2
+        assert item["slots"][1]["start_at"] == timezone.localtime(_dt(10)).isoformat()
+
+    def test_bledne_parametry_400(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/availability/search", {"date": DAY, "duration": 0, "equipment": "1,x"})
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(r.json()) == {"duration", "equipment"}
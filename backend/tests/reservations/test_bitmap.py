@@ -0,0 +1,203 @@
+"""Testy bitmap zajętości: maski, free_rooms, łatki po create/cancel, endpoint."""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from config.caching import cache_is_shared
+from reservations.models import Reservation
+from reservations.services.availability import occupancy_cache_enabled
+from reservations.services.bitmap import _key, _masks, day_bitmaps, free_rooms, mark_booked
+from reservations.services.booking import cancel_reservation, create_reservation
+from rooms.models import Room
+
+DAY = date(2030, 3, 4)
+
+
+def _dt(h, m=0):
+    return timezone.make_aware(datetime.combine(DAY, datetime.min.time()).replace(hour=h, minute=m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def rooms(db):
+    return [Room.objects.create(name=f"Sala {i}") for i in range(3)]
+
+
+def _reserve(user, room, start, end, status=Reservation.Status.CONFIRMED):
+    return Reservation.objects.create(
+        user=user, room=room, status=status, start_at=start, end_at=end
+    )
+
+
+class TestMasks:
+    @override_settings(RESERVATION_BITMAP_SLOT_MINUTES=15)
+    def test_wyrownany_i_niewyrownany(self):
+        # 08:00 to slot 0; 09:00–10:00 = sloty 4..7
+        assert _masks(DAY, _dt(9), _dt(10)) == (0b1111 << 4, 0b1111 << 4)
+        # 09:10–09:50 dotyka slotów 4..7, w całości zawiera 5..6
+        assert _masks(DAY, _dt(9, 10), _dt(9, 50)) == (0b1111 << 4, 0b11 << 5)
+
+
+@pytest.mark.django_db
+class TestFreeRooms:
+    def test_wyrownane_bez_zapytan_po_zbudowaniu(self, user, rooms, django_assert_num_queries):
+        a, b, c = rooms
+        _reserve(user, a, _dt(10), _dt(11))
+        _reserve(user, b, _dt(11, 30), _dt(12))
+        _reserve(user, c, _dt(10), _dt(11), status=Reservation.Status.CANCELED)
+        ids = [r.id for r in rooms]
+        with django_assert_num_queries(1):
+            assert free_rooms(ids, _dt(10), _dt(11, 30)) == [b.id, c.id]
+        with django_assert_num_queries(0):
+            assert free_rooms(ids, _dt(11), _dt(12)) == [a.id, c.id]
+            assert free_rooms(ids, _dt(11), _dt(11, 30)) == ids  # styczność półotwarta
+
+    @override_settings(RESERVATION_BITMAP_SLOT_MINUTES=30)
+    def test_niewyrownane_dokladnie(self, user, rooms, django_assert_num_queries):
+        a, b, _c = rooms
+        _reserve(user, a, _dt(10, 10), _dt(10, 20))
+        _reserve(user, b, _dt(9), _dt(10, 10))
+        ids = [r.id for r in rooms]
+        day_bitmaps(ids, DAY)
+        # a: zajętość tylko w dotkniętym slocie 10:00–10:30 – rozstrzyga indeks przedziałów
+        # (jedno zapytanie przy ładowaniu dnia, potem bez bazy)
+        with django_assert_num_queries(1):
+            assert free_rooms(ids, _dt(10, 20), _dt(11)) == ids
+        with django_assert_num_queries(0):
+            assert free_rooms(ids, _dt(10, 5), _dt(10, 15)) == [rooms[2].id]
+        # b: slot 09:30–10:00 zajęty w całości – zajęta bez zapytania
+        with django_assert_num_queries(0):
+            assert b.id not in free_rooms([b.id], _dt(9, 45), _dt(9, 50))
+
+    def test_poza_godzinami_pracy(self, user, rooms):
+        a = rooms[0]
+        _reserve(user, a, _dt(18), _dt(19))
+        assert free_rooms([a.id], _dt(18, 30), _dt(19, 30)) == []
+        assert free_rooms([a.id], _dt(19), _dt(20)) == [a.id]
+
+
+@pytest.mark.django_db
+class TestProcessLocalCache:
+    def test_locmem_to_cache_procesu(self, settings):
+        assert not cache_is_shared()
+        settings.RESERVATION_OCCUPANCY_CACHE = None
+        assert not occupancy_cache_enabled()
+
+    def test_bez_wspolnego_cache_odczyt_z_bazy(
+        self, user, rooms, settings, django_assert_num_queries
+    ):
+        settings.RESERVATION_OCCUPANCY_CACHE = None
+        a, b, _c = rooms
+        _reserve(user, a, _dt(10), _dt(11))
+        ids = [r.id for r in rooms]
+        for _ in range(2):
+            with django_assert_num_queries(1):
+                assert free_rooms(ids, _dt(10), _dt(11)) == [b.id, rooms[2].id]
+        mark_booked(b.id, _dt(10), _dt(11))
+        assert cache.get(_key(a.id, DAY)) is None
+        assert cache.get(_key(b.id, DAY)) is None
+
+
+@pytest.mark.django_db
+class TestPatching:
+    @patch("reservations.services.booking.schedule_hold_expiry")
+    def test_create_i_cancel_latane_w_miejscu(
+        self, mock_expire, user, rooms, django_capture_on_commit_callbacks
+    ):
+        a = rooms[0]
+        assert free_rooms([a.id], _dt(10), _dt(11)) == [a.id]
+        with django_capture_on_commit_callbacks(execute=True):
+            r = create_reservation(user, a.id, _dt(10), _dt(11))
+        assert cache.get(_key(a.id, DAY)) is not None
+        assert free_rooms([a.id], _dt(10), _dt(11)) == []
+        with django_capture_on_commit_callbacks(execute=True):
+            cancel_reservation(r)
+        assert cache.get(_key(a.id, DAY))[:2] == (0, 0)
+        assert free_rooms([a.id], _dt(10), _dt(11)) == [a.id]
+
+    def test_latka_w_trakcie_przebudowy_nie_ginie(self, user, rooms):
+        a = rooms[0]
+        real_set_many = cache.set_many
+
+        def commit_between_query_and_store(data, timeout):
+            # Rezerwacja zatwierdzona po zapytaniu przebudowy, przed zapisem do cache:
+            # jej łatka nie zastaje jeszcze klucza.
+            _reserve(user, a, _dt(10), _dt(11))
+            mark_booked(a.id, _dt(10), _dt(11))
+            real_set_many(data, timeout=timeout)
+
+        racing = MagicMock(wraps=cache)
+        racing.set_many.side_effect = commit_between_query_and_store
+        with patch("reservations.services.bitmap.cache", racing):
+            assert free_rooms([a.id], _dt(10), _dt(11)) == [a.id]
+        # Bitmapa bez tej rezerwacji nie została w cache – następny odczyt widzi zajętość.
+        assert cache.get(_key(a.id, DAY)) is None
+        assert free_rooms([a.id], _dt(10), _dt(11)) == []
+
+    def test_rownolegla_latka_bez_blokady_nie_ginie(self, user, rooms):
+        a = rooms[0]
+        day_bitmaps([a.id], DAY)
+        key = _key(a.id, DAY)
+        real_get = cache.get
+        raced = []
+
+        def patch_after_read(k, *args, **kwargs):
+            value = real_get(k, *args, **kwargs)
+            if k == key and not raced:
+                # Druga łatka po odczycie pierwszej: nie dostaje blokady, usuwa klucz
+                # i wychodzi – pierwsza zapisuje potem bitmapę bez jej rezerwacji.
+                raced.append(1)
+                _reserve(user, a, _dt(12), _dt(13))
+                mark_booked(a.id, _dt(12), _dt(13))
+            return value
+
+        racing = MagicMock(wraps=cache)
+        racing.get.side_effect = patch_after_read
+        with patch("reservations.services.bitmap.cache", racing):
+            _reserve(user, a, _dt(10), _dt(11))
+            mark_booked(a.id, _dt(10), _dt(11))
+        assert free_rooms([a.id], _dt(12), _dt(13)) == []
+        assert free_rooms([a.id], _dt(10), _dt(11)) == []
+
+    @override_settings(RESERVATION_BITMAP_SLOT_MINUTES=30)
+    def test_cancel_niewyrownanej_usuwa_bitmape(
+        self, user, rooms, django_capture_on_commit_callbacks
+    ):
+        a = rooms[0]
+        r = _reserve(user, a, _dt(10, 10), _dt(10, 20))
+        day_bitmaps([a.id], DAY)
+        with django_capture_on_commit_callbacks(execute=True):
+            cancel_reservation(r)
+        assert cache.get(_key(a.id, DAY)) is None
+        assert free_rooms([a.id], _dt(10), _dt(10, 30)) == [a.id]
+
+
+@pytest.mark.django_db
+def test_free_rooms_api(user, rooms):
+    a, b, _c = rooms
+    _reserve(user, a, _dt(10), _dt(11))
+    client = APIClient()
+    client.force_authenticate(user=user)
+    r = client.get(
+        "/api/availability/free-rooms",
+        {
+            "start_at": _dt(10).isoformat(),
+            "end_at": _dt(11).isoformat(),
+            "room_ids": f"{a.id},{b.id},999",
+        },
+    )
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"room_ids": [b.id]}
@@ -3,14 +3,21 @@
 from datetime import datetime
 from unittest.mock import patch
 
+from django.db import IntegrityError
 from django.utils import timezone
 
 import pytest
 
 from accounts.models import User
 from reservations.exceptions import ReservationCollisionError, ReservationValidationError
-from reservations.models import Reservation
-from reservations.services.availability import intervals_overlap
+from reservations.models import OVERLAP_CONSTRAINT_NAME, OutboxEvent, Reservation
+from reservations.services.availability import (
+    find_collision,
+    intervals_overlap,
+    is_slot_free,
+    overlapping_reservations,
+    reservations_in_window,
+)
 from reservations.services.booking import (
     cancel_reservation,
     confirm_reservation,
@@ -104,7 +111,7 @@ def _dt(year, month, day, h, m, tz=None):
     return timezone.make_aware(datetime(year, month, day, h, m), tz)
 
 
-@patch("reservations.services.booking.expire_hold")
+@patch("reservations.services.booking.schedule_hold_expiry")
 class TestCreateReservation:
     def test_start_ge_end_validation_error(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours
@@ -112,7 +119,7 @@ class TestCreateReservation:
         end = _dt(2025, 2, 1, 9, 0)
         with pytest.raises(ReservationValidationError, match="rozpoczęcia"):
             create_reservation(user, room.id, start, end, work_start=work_start, work_end=work_end)
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_poza_godzinami_roboczymi(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours  # 8–18
@@ -120,7 +127,7 @@ class TestCreateReservation:
         end = _dt(2025, 2, 1, 8, 0)
         with pytest.raises(ReservationValidationError, match="godzinami roboczymi"):
             create_reservation(user, room.id, start, end, work_start=work_start, work_end=work_end)
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_na_dwa_dni_validation_error(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours
@@ -128,7 +135,7 @@ class TestCreateReservation:
         end = _dt(2025, 2, 2, 9, 0)
         with pytest.raises(ReservationValidationError, match="jednym dniu"):
             create_reservation(user, room.id, start, end, work_start=work_start, work_end=work_end)
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_naive_datetime_validation_error(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours
@@ -136,7 +143,7 @@ class TestCreateReservation:
         end = datetime(2025, 2, 1, 11, 0)
         with pytest.raises(ReservationValidationError, match="timezone-aware"):
             create_reservation(user, room.id, start, end, work_start=work_start, work_end=work_end)
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_kolizja_collision_error(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours
@@ -147,9 +154,9 @@ class TestCreateReservation:
         )
         with pytest.raises(ReservationCollisionError, match="jest obecnie zarezerwowana"):
             create_reservation(user, room.id, start, end, work_start=work_start, work_end=work_end)
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
-    def test_ok_tworzy_pending_i_kolejkuje_expire_hold(self, mock_expire, user, room, work_hours):
+    def test_ok_tworzy_pending_i_planuje_wygaszenie(self, mock_expire, user, room, work_hours):
         work_start, work_end = work_hours
         start = _dt(2025, 2, 1, 10, 0)
         end = _dt(2025, 2, 1, 11, 0)
@@ -160,10 +167,7 @@ class TestCreateReservation:
         assert r.room_id == room.id
         assert r.start_at == start and r.end_at == end
         assert r.hold_expires_at is not None
-        mock_expire.apply_async.assert_called_once()
-        call = mock_expire.apply_async.call_args
-        assert call[1]["eta"] == r.hold_expires_at
-        assert call[1]["args"][0] == r.id
+        mock_expire.assert_called_once_with(r.id, r.hold_expires_at)
 
     def test_brak_kolizji_gdy_styczność(self, mock_expire, user, room, work_hours):
         """Istniejąca [10,11); nowa [11,12) – styczność: brak kolizji."""
@@ -185,15 +189,24 @@ class TestCreateReservation:
             hold_minutes=15,
         )
         assert r.status == Reservation.Status.PENDING
-        mock_expire.apply_async.assert_called_once()
+        mock_expire.assert_called_once()
 
 
 # --- confirm_reservation, cancel_reservation ---
 
 
-@patch("reservations.services.booking.send_notifications")
+def _notifications():
+    """Argumenty send_notifications zapisane w outboxie (publikuje je dispatcher)."""
+    return list(
+        OutboxEvent.objects.filter(task="reservations.tasks.send_notifications")
+        .order_by("id")
+        .values_list("args", flat=True)
+    )
+
+
+@pytest.mark.django_db
 class TestConfirmReservation:
-    def test_ok_pending_to_confirmed(self, mock_send, user, room):
+    def test_ok_pending_to_confirmed(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -205,9 +218,9 @@ class TestConfirmReservation:
         assert out.status == Reservation.Status.CONFIRMED
         r.refresh_from_db()
         assert r.status == Reservation.Status.CONFIRMED
-        mock_send.delay.assert_called_once_with(r.id, "confirmed")
+        assert _notifications() == [[r.id, "confirmed"]]
 
-    def test_not_pending_raises(self, mock_send, user, room):
+    def test_not_pending_raises(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -217,12 +230,12 @@ class TestConfirmReservation:
         )
         with pytest.raises(ReservationValidationError, match="pending"):
             confirm_reservation(r)
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
 
 
-@patch("reservations.services.booking.send_notifications")
+@pytest.mark.django_db
 class TestCancelReservation:
-    def test_ok_pending_to_canceled(self, mock_send, user, room):
+    def test_ok_pending_to_canceled(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -232,9 +245,9 @@ class TestCancelReservation:
         )
         out = cancel_reservation(r)
         assert out.status == Reservation.Status.CANCELED
-        mock_send.delay.assert_called_once_with(r.id, "canceled")
+        assert _notifications() == [[r.id, "canceled"]]
 
-    def test_ok_confirmed_to_canceled(self, mock_send, user, room):
+    def test_ok_confirmed_to_canceled(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -244,9 +257,9 @@ class TestCancelReservation:
         )
         out = cancel_reservation(r)
         assert out.status == Reservation.Status.CANCELED
-        mock_send.delay.assert_called_once_with(r.id, "canceled")
+        assert _notifications() == [[r.id, "canceled"]]
 
-    def test_already_canceled_idempotent(self, mock_send, user, room):
+    def test_already_canceled_idempotent(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -256,9 +269,9 @@ class TestCancelReservation:
         )
         out = cancel_reservation(r)
         assert out.status == Reservation.Status.CANCELED
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
 
-    def test_invalid_status_raises(self, mock_send, user, room):
+    def test_invalid_status_raises(self, user, room):
         r = Reservation.objects.create(
             user=user,
             room=room,
@@ -270,4 +283,108 @@ class TestCancelReservation:
         r.refresh_from_db()
         with pytest.raises(ReservationValidationError, match="Nie można anulować"):
             cancel_reservation(r)
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
+
+
+# --- overlapping_reservations / find_collision: zapytanie o okno nakładania ---
+
+
+@pytest.mark.django_db
+class TestOverlapQuery:
+    def test_zwraca_tylko_nakladajace_sie(self, user, room):
+        inside = Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(2025, 2, 1, 10, 30),
+            end_at=_dt(2025, 2, 1, 11, 30),
+        )
+        # styczne, anulowane, inny dzień, inna sala – poza wynikiem
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(2025, 2, 1, 9, 0),
+            end_at=_dt(2025, 2, 1, 10, 0),
+        )
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CANCELED,
+            start_at=_dt(2025, 2, 1, 10, 0),
+            end_at=_dt(2025, 2, 1, 11, 0),
+        )
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(2025, 1, 31, 10, 0),
+            end_at=_dt(2025, 1, 31, 11, 0),
+        )
+        other = Room.objects.create(name="Sala B")
+        Reservation.objects.create(
+            user=user,
+            room=other,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(2025, 2, 1, 10, 0),
+            end_at=_dt(2025, 2, 1, 11, 0),
+        )
+        qs = overlapping_reservations(room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0))
+        assert list(qs.values_list("id", flat=True)) == [inside.id]
+        assert find_collision(room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0)) == inside
+        assert is_slot_free(room.id, _dt(2025, 2, 1, 11, 30), _dt(2025, 2, 1, 12, 0))
+
+    def test_jedno_zapytanie(self, user, room, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert find_collision(room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0)) is None
+
+
+# --- PostgreSQL: ExclusionConstraint → ReservationCollisionError ---
+
+
+class _Diag:
+    constraint_name = OVERLAP_CONSTRAINT_NAME
+
+
+class _PgError(Exception):
+    diag = _Diag()
+
+
+def _exclusion_violation():
+    exc = IntegrityError("conflicting key value violates exclusion constraint")
+    exc.__cause__ = _PgError()
+    return exc
+
+
+@patch("reservations.services.booking.schedule_hold_expiry")
+@patch("reservations.services.booking.db_enforces_no_overlap", return_value=True)
+class TestExclusionConstraintPath:
+    def test_naruszenie_ograniczenia_to_kolizja(self, mock_db, mock_expire, user, room):
+        with patch.object(Reservation.objects, "create", side_effect=_exclusion_violation()):
+            with pytest.raises(ReservationCollisionError, match="Sala A jest obecnie"):
+                create_reservation(user, room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0))
+        mock_expire.assert_not_called()
+
+    def test_inny_integrity_error_propagowany(self, mock_db, mock_expire, user, room):
+        with patch.object(Reservation.objects, "create", side_effect=IntegrityError("fk")):
+            with pytest.raises(IntegrityError):
+                create_reservation(user, room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0))
+
+    def test_insert_bez_zapytania_o_kolizje(self, mock_db, mock_expire, user, room):
+        with patch("reservations.services.booking.find_collision") as mock_find:
+            r = create_reservation(user, room.id, _dt(2025, 2, 1, 10, 0), _dt(2025, 2, 1, 11, 0))
+        assert r.status == Reservation.Status.PENDING
+        mock_find.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_reservations_in_window(user, room):
+    r = Reservation.objects.create(
+        user=user,
+        room=room,
+        status=Reservation.Status.CANCELED,
+        start_at=_dt(2025, 2, 1, 10, 0),
+        end_at=_dt(2025, 2, 1, 11, 0),
+    )
+    assert list(reservations_in_window(_dt(2025, 2, 1, 10, 30), _dt(2025, 2, 1, 12, 0))) == [r]
+    assert not reservations_in_window(_dt(2025, 2, 1, 11, 0), _dt(2025, 2, 1, 12, 0)).exists()
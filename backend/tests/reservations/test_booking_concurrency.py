@@ -0,0 +1,79 @@
+"""Test obciążeniowy: równoległe create_reservation na tę samą salę nie dublują slotów."""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import User
+from reservations.exceptions import ReservationCollisionError
+from reservations.models import Reservation
+from reservations.services.availability import intervals_overlap
+from reservations.services.booking import create_reservation
+from rooms.models import Room
+
+THREADS = 8
+ATTEMPTS_PER_THREAD = 250
+
+
+def _slots():
+    """Sloty 1 h co 30 min (8:00–18:00) – sąsiednie wzajemnie się nakładają."""
+    tz = timezone.get_current_timezone()
+    day = timezone.make_aware(datetime(2025, 3, 3, 8, 0), tz)
+    return [
+        (day + timedelta(minutes=30 * i), day + timedelta(minutes=30 * i + 60)) for i in range(19)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("reservations.services.booking.schedule_hold_expiry")
+def test_rownolegle_rezerwacje_bez_nakladania(mock_expire):
+    user = User.objects.create_user(username="stress", password=None, email="stress@ex.com")
+    room = Room.objects.create(name="Sala stres")
+    slots = _slots()
+    created, collisions, errors = [], [], []
+    barrier = threading.Barrier(THREADS)
+
+    def worker(offset):
+        try:
+            barrier.wait()
+            for i in range(ATTEMPTS_PER_THREAD):
+                start, end = slots[(offset + i) % len(slots)]
+                try:
+                    r = create_reservation(user, room.id, start, end)
+                    created.append(r.id)
+                except ReservationCollisionError:
+                    collisions.append(1)
+        except Exception as exc:  # pragma: no cover - raportowane w asercji
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    assert errors == []
+    assert len(created) + len(collisions) == THREADS * ATTEMPTS_PER_THREAD
+    rows = list(
+        Reservation.objects.filter(room=room)
+        .exclude(status=Reservation.Status.CANCELED)
+        .order_by("start_at")
+        .values_list("start_at", "end_at")
+    )
+    assert len(rows) == len(created) > 0
+    for (s1, e1), (s2, e2) in zip(rows, rows[1:]):
+        assert not intervals_overlap(s1, e1, s2, e2)
+    print(
+        f"\n{THREADS * ATTEMPTS_PER_THREAD} prób, {len(created)} rezerwacji, "
+        f"{THREADS * ATTEMPTS_PER_THREAD / elapsed:.0f} prób/s"
+    )
@@ -0,0 +1,93 @@
+"""Testy osi czasu kalendarza: room_timeline i GET /api/calendar."""
+
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from reservations.models import Reservation
+from reservations.services.availability import room_timeline
+from rooms.models import Room
+
+
+def _dt(day, h, m=0):
+    return timezone.make_aware(datetime(2025, 3, day, h, m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def rooms(db):
+    return [Room.objects.create(name="Sala A"), Room.objects.create(name="Sala B")]
+
+
+def _reserve(user, room, start, end, status=Reservation.Status.CONFIRMED):
+    return Reservation.objects.create(
+        user=user, room=room, status=status, start_at=start, end_at=end
+    )
+
+
+@pytest.mark.django_db
+class TestRoomTimeline:
+    def test_offsety_i_statusy(self, user, rooms, django_assert_num_queries):
+        a, b = rooms
+        r1 = _reserve(user, a, _dt(3, 9), _dt(3, 10))
+        r2 = _reserve(user, a, _dt(4, 8), _dt(4, 8, 30), status=Reservation.Status.PENDING)
+        _reserve(user, a, _dt(3, 11), _dt(3, 12), status=Reservation.Status.CANCELED)
+        _reserve(user, b, _dt(10, 9), _dt(10, 10))  # poza oknem
+        with django_assert_num_queries(2):
+            names, timeline = room_timeline(_dt(3, 0), _dt(10, 0))
+        assert names == {a.id: "Sala A", b.id: "Sala B"}
+        assert timeline == {
+            a.id: [
+                [r1.id, 9 * 3600, 10 * 3600, "confirmed"],
+                [r2.id, 32 * 3600, 32 * 3600 + 1800, "pending"],
+            ],
+            b.id: [],
+        }
+
+    def test_filtr_sal(self, user, rooms):
+        a, b = rooms
+        _reserve(user, a, _dt(3, 9), _dt(3, 10))
+        names, timeline = room_timeline(_dt(3, 0), _dt(4, 0), room_ids=[b.id])
+        assert names == {b.id: "Sala B"}
+        assert timeline == {b.id: []}
+
+
+@pytest.mark.django_db
+class TestCalendarAPI:
+    def test_unauthenticated_401(self):
+        r = APIClient().get("/api/calendar", {"from": "2025-03-03T00:00:00Z"})
+        assert r.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_200_bez_danych_uzytkownika(self, user, rooms):
+        a, _b = rooms
+        r1 = _reserve(user, a, _dt(3, 9), _dt(3, 10))
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get(
+            "/api/calendar",
+            {"from": _dt(3, 0).isoformat(), "to": _dt(10, 0).isoformat(), "room_ids": str(a.id)},
+        )
+        assert r.status_code == status.HTTP_200_OK
+        data = r.json()
+        assert data["rooms"] == {str(a.id): "Sala A"}
+        assert data["timeline"] == {str(a.id): [[r1.id, 9 * 3600, 10 * 3600, "confirmed"]]}
+        assert "u1@ex.com" not in r.content.decode()
+
+    def test_za_dlugie_okno_400(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        start = _dt(1, 0)
+        r = client.get(
+            "/api/calendar",
+            {"from": start.isoformat(), "to": (start + timedelta(days=40)).isoformat()},
+        )
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,170 @@
+"""Testy warunkowego GET (config.conditional): ETag / Last-Modified / 304 w viewsetach."""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User, UserRole
+from reservations.models import Reservation
+from rooms.models import Equipment, Room, RoomEquipment
+
+
+def _dt(day, h):
+    return timezone.make_aware(datetime(2025, 3, day, h))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def other(db):
+    return User.objects.create_user(username="u2@ex.com", password="test", email="u2@ex.com")
+
+
+@pytest.fixture
+def admin(db):
+    user = User.objects.create_user(username="a1@ex.com", password="test", email="a1@ex.com")
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="admin")[0])
+    return user
+
+
+@pytest.fixture
+def room(db):
+    room = Room.objects.create(name="Sala A")
+    RoomEquipment.objects.create(room=room, equipment=Equipment.objects.create(name="Projektor"))
+    return room
+
+
+@pytest.fixture
+def reservation(user, room):
+    return Reservation.objects.create(
+        user=user,
+        room=room,
+        status=Reservation.Status.CONFIRMED,
+        start_at=_dt(3, 9),
+        end_at=_dt(3, 10),
+    )
+
+
+def _client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestRooms:
+    def test_naglowki_i_304(self, room, django_assert_num_queries):
+        # ?fields= – wariant spoza katalogu w cache (rooms.catalog): odcisk z bazy
+        client = _client()
+        url = "/api/rooms/?fields=id,name,equipment"
+        r = client.get(url)
+        assert r.status_code == status.HTTP_200_OK
+        assert r["ETag"].startswith('"')
+        assert r["Cache-Control"] == "private, no-cache"
+        assert "Last-Modified" in r
+
+        with django_assert_num_queries(1):
+            r2 = client.get(url, HTTP_IF_NONE_MATCH=r["ETag"])
+        assert r2.status_code == status.HTTP_304_NOT_MODIFIED
+        assert r2["ETag"] == r["ETag"]
+        assert r2.content == b""
+
+    def test_usuniecie_sprzetu_zmienia_etag(self, room, admin):
+        etag = _client().get("/api/rooms/")["ETag"]
+        r = _client(admin).patch(f"/api/rooms/{room.pk}/", {"equipment": []}, format="json")
+        assert r.status_code == status.HTTP_200_OK
+        # wymuszenie tego samego updated_at sali – zmiana widoczna tylko przez sprzęt
+        Room.objects.filter(pk=room.pk).update(updated_at=room.updated_at)
+        r = _client().get("/api/rooms/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()[0]["equipment"] == []
+
+    def test_zmiana_nazwy_sprzetu_zmienia_etag(self, room):
+        etag = _client().get(f"/api/rooms/{room.pk}/")["ETag"]
+        equipment = Equipment.objects.get()
+        equipment.name = "Rzutnik"
+        equipment.save()
+        r = _client().get(f"/api/rooms/{room.pk}/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["equipment"][0]["name"] == "Rzutnik"
+
+    def test_equipment_304(self, room):
+        client = _client()
+        etag = client.get("/api/equipment/")["ETag"]
+        assert client.get("/api/equipment/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+        Equipment.objects.create(name="Tablica")
+        assert client.get("/api/equipment/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+class TestReservations:
+    def test_lista_304_jednym_zapytaniem(self, user, reservation, django_assert_num_queries):
+        client = _client(user)
+        etag = client.get("/api/reservations/")["ETag"]
+        with django_assert_num_queries(1):
+            r = client.get("/api/reservations/", HTTP_IF_NONE_MATCH=f'W/{etag}, "inny"')
+        assert r.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_wygasly_hold_zmienia_etag(self, user, room):
+        hold = Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.PENDING,
+            start_at=_dt(4, 9),
+            end_at=_dt(4, 10),
+            hold_expires_at=timezone.now() + timedelta(seconds=60),
+        )
+        client = _client(user)
+        first = client.get("/api/reservations/", {"paginate": "false"})
+        assert first.json()[0]["status"] == "pending"
+        # Wiersz bez zmian (brak zadania w tle), tylko czas mija.
+        later = timezone.now() + timedelta(minutes=5)
+        with patch("django.utils.timezone.now", return_value=later):
+            r = client.get(
+                "/api/reservations/", {"paginate": "false"}, HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+            assert r.status_code == status.HTTP_200_OK
+            assert r.json()[0]["status"] == "canceled"
+            detail = client.get(f"/api/reservations/{hold.id}/", HTTP_IF_NONE_MATCH=first["ETag"])
+            assert detail.json()["status"] == "canceled"
+
+    def test_parametry_w_etag(self, user, reservation):
+        client = _client(user)
+        etag = client.get("/api/reservations/")["ETag"]
+        assert client.get("/api/reservations/", {"fields": "id"})["ETag"] != etag
+
+    def test_usuniecie_i_zmiana_sali(self, user, room, reservation):
+        client = _client(user)
+        extra = Reservation.objects.create(
+            user=user, room=room, start_at=_dt(4, 9), end_at=_dt(4, 10)
+        )
+        etag = client.get("/api/reservations/")["ETag"]
+        extra.delete()
+        r = client.get("/api/reservations/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+
+        etag = r["ETag"]
+        room.name = "Sala Z"
+        room.save()
+        r = client.get("/api/reservations/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["results"][0]["room_name"] == "Sala Z"
+
+    def test_szczegoly_uprawnienia_przed_304(self, other, reservation):
+        r = _client(other).get(f"/api/reservations/{reservation.pk}/", HTTP_IF_NONE_MATCH="*")
+        assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_szczegoly_304(self, user, reservation):
+        client = _client(user)
+        etag = client.get(f"/api/reservations/{reservation.pk}/")["ETag"]
+        r = client.get(f"/api/reservations/{reservation.pk}/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,137 @@
+"""Testy eksportu rezerwacji: GET /api/reservations/export/ i komenda export_reservations."""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User, UserRole
+from reservations.export import CSVRenderer
+from reservations.models import Reservation
+from reservations.serializers import ReservationListSerializer
+from rooms.models import Room
+
+
+def _dt(day, h, m=0):
+    return timezone.make_aware(datetime(2025, 3, day, h, m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def admin(db):
+    user = User.objects.create_user(username="a1@ex.com", password="test", email="a1@ex.com")
+    role, _ = Role.objects.get_or_create(name="admin")
+    UserRole.objects.create(user=user, role=role)
+    return user
+
+
+@pytest.fixture
+def reservations(user):
+    a = Room.objects.create(name="Sala A")
+    b = Room.objects.create(name="Sala „B”, 1 piętro")
+    return [
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CONFIRMED if i % 2 else Reservation.Status.PENDING,
+            start_at=_dt(3 + i, 9),
+            end_at=_dt(3 + i, 10),
+        )
+        for i, room in enumerate([a, b, a, b, a])
+    ]
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _body(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    def test_ndjson_jak_lista(self, admin, reservations):
+        r = _client(admin).get("/api/reservations/export/")
+        assert r.status_code == status.HTTP_200_OK
+        assert r.streaming
+        assert r["Content-Type"] == "application/x-ndjson; charset=utf-8"
+        rows = [json.loads(line) for line in _body(r).splitlines()]
+        qs = Reservation.objects.select_related("room", "user").order_by("-start_at", "-id")
+        assert rows == json.loads(json.dumps(ReservationListSerializer(qs, many=True).data))
+
+    def test_csv_filtry_i_pola(self, admin, reservations):
+        room_id = reservations[1].room_id
+        r = _client(admin).get(
+            "/api/reservations/export/",
+            {"format": "csv", "room_id": room_id, "status": "confirmed", "fields": "id,room_name"},
+        )
+        assert r.status_code == status.HTTP_200_OK
+        assert r["Content-Type"] == "text/csv; charset=utf-8"
+        assert 'filename="reservations.csv"' in r["Content-Disposition"]
+        rows = list(csv.reader(io.StringIO(_body(r))))
+        assert rows == [
+            ["id", "room_name"],
+            [str(reservations[3].id), "Sala „B”, 1 piętro"],
+            [str(reservations[1].id), "Sala „B”, 1 piętro"],
+        ]
+
+    def test_csv_puste_wartosci(self, admin, reservations):
+        r = _client(admin).get(
+            "/api/reservations/export/", {"format": "csv", "fields": "id,hold_expires_at"}
+        )
+        header, *rows = list(csv.reader(io.StringIO(_body(r))))
+        assert header == ["id", "hold_expires_at"]
+        assert len(rows) == len(reservations)
+        assert all(value == "" for _id, value in rows)
+
+    def test_tylko_admin(self, user, reservations):
+        r = _client(user).get("/api/reservations/export/")
+        assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_nieznany_format_404(self, admin):
+        r = _client(admin).get("/api/reservations/export/", {"format": "xlsx"})
+        assert r.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_strumien_porcjami(self, reservations):
+        qs = Reservation.objects.order_by("id")
+        chunks = list(CSVRenderer().stream(qs, ("id",), chunk_size=2))
+        # nagłówek + 3 porcje (2 + 2 + 1)
+        assert len(chunks) == 4
+        assert chunks[0] == b"id\r\n"
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+    def test_ndjson_stdout(self, reservations):
+        out = io.StringIO()
+        call_command("export_reservations", "--fields", "id,status", stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert rows == [{"id": r.id, "status": r.status} for r in reservations]
+
+    def test_csv_plik_z_filtrem(self, reservations, tmp_path):
+        path = tmp_path / "export.csv"
+        call_command(
+            "export_reservations",
+            "--format=csv",
+            f"--output={path}",
+            "--status=pending",
+            "--fields=id",
+            "--chunk-size=1",
+        )
+        rows = list(csv.reader(io.StringIO(path.read_text(encoding="utf-8"))))
+        pending = [r for r in reservations if r.status == Reservation.Status.PENDING]
+        assert rows == [["id"]] + [[str(r.id)] for r in pending]
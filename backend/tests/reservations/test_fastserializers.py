@@ -0,0 +1,165 @@
+"""Testy szybkiej ścieżki serializacji list (config.fastserializers) – zgodność z DRF."""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from config.fastserializers import drf_datetime
+from reservations.models import Reservation
+from reservations.serializers import RESERVATION_LIST_SPEC, ReservationListSerializer
+from rooms.models import Equipment, Room, RoomEquipment
+from rooms.serializers import ROOM_LIST_SPEC, RoomListSerializer
+
+
+def _dt(day, h, m=0):
+    return timezone.make_aware(datetime(2025, 3, day, h, m))
+
+
+def _json(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username="u1@ex.com", password="test", email="u1@ex.com", first_name="Ala", last_name="Ż"
+    )
+
+
+@pytest.fixture
+def rooms(db):
+    projector = Equipment.objects.create(name="Projektor")
+    board = Equipment.objects.create(name="Tablica")
+    a = Room.objects.create(name="Sala A", capacity=6, location="Parter")
+    b = Room.objects.create(name="Sala B", capacity=12)
+    Room.objects.create(name="Sala C")
+    RoomEquipment.objects.create(room=a, equipment=board, qty=2)
+    RoomEquipment.objects.create(room=a, equipment=projector, qty=1)
+    RoomEquipment.objects.create(room=b, equipment=projector, qty=1)
+    return Room.objects.order_by("id")
+
+
+@pytest.fixture
+def reservations(user, rooms):
+    a, b, _c = rooms
+    return [
+        Reservation.objects.create(
+            user=user,
+            room=a,
+            status=Reservation.Status.PENDING,
+            start_at=_dt(3, 9),
+            end_at=_dt(3, 10),
+            hold_expires_at=timezone.now() + timedelta(minutes=15),
+        ),
+        Reservation.objects.create(
+            user=user,
+            room=b,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(30, 9, 15),  # po zmianie czasu na letni
+            end_at=_dt(30, 10),
+        ),
+    ]
+
+
+class TestDrfDatetime:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            None,
+            datetime(2025, 1, 15, 9, 0, tzinfo=dt_timezone.utc),
+            datetime(2025, 7, 15, 9, 0, 0, 123456, tzinfo=dt_timezone.utc),
+        ],
+    )
+    def test_jak_datetimefield(self, value):
+        assert drf_datetime(value) == DateTimeField().to_representation(value)
+
+    def test_utc_jako_z(self):
+        with timezone.override("UTC"):
+            value = datetime(2025, 1, 15, 9, 0, tzinfo=dt_timezone.utc)
+            assert drf_datetime(value) == "2025-01-15T09:00:00Z"
+
+
+@pytest.mark.django_db
+class TestSpecs:
+    def test_pola_jak_serializery(self):
+        assert RESERVATION_LIST_SPEC.names == ReservationListSerializer.Meta.fields
+        assert ROOM_LIST_SPEC.names == RoomListSerializer.Meta.fields
+
+    def test_rezerwacje_bajt_w_bajt(self, reservations):
+        qs = Reservation.objects.with_current_status().select_related("room", "user").order_by("id")
+        expected = _json(ReservationListSerializer(qs, many=True).data)
+        spec = RESERVATION_LIST_SPEC.compile()
+        assert _json(spec.serialize(qs.values(*spec.sources))) == expected
+
+    def test_sale_bajt_w_bajt(self, rooms, django_assert_num_queries):
+        qs = Room.objects.order_by("id")
+        expected = _json(RoomListSerializer(qs, many=True).data)
+        spec = ROOM_LIST_SPEC.compile()
+        with django_assert_num_queries(1):  # sprzęt z rooms.equipment_summary
+            assert _json(spec.serialize(qs.values(*spec.sources))) == expected
+
+    def test_krotki_i_podzbior_pol(self, reservations):
+        spec = RESERVATION_LIST_SPEC.compile(("id", "status"), as_tuple=True)
+        rows = spec.serialize(
+            Reservation.objects.with_current_status().order_by("id").values(*spec.sources)
+        )
+        assert rows == [(r.id, r.status) for r in reservations]
+
+    def test_kompilacja_raz(self):
+        assert RESERVATION_LIST_SPEC.compile(("id",)) is RESERVATION_LIST_SPEC.compile(("id",))
+
+
+@pytest.mark.django_db
+class TestListEndpoints:
+    def test_lista_rezerwacji_jak_drf(self, user, reservations):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"paginate": "false"})
+        assert r.status_code == status.HTTP_200_OK
+        qs = Reservation.objects.select_related("room", "user").order_by("-start_at", "-id")
+        assert r.content == _json(ReservationListSerializer(qs, many=True).data)
+
+    def test_sparse_fields(self, user, reservations):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"fields": "end_at,id", "page_size": 1})
+        assert r.status_code == status.HTTP_200_OK
+        (row,) = r.json()["results"]
+        assert list(row) == ["id", "end_at"]
+        assert row["id"] == reservations[1].id
+        # kursor z pól sortowania (start_at), choć klient ich nie wybrał
+        r2 = client.get(r.json()["next"])
+        assert [x["id"] for x in r2.json()["results"]] == [reservations[0].id]
+
+    def test_nieznane_pole_400(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"fields": "id,password"})
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in r.json()["fields"]
+
+    def test_lista_sal_jak_drf(self, rooms):
+        r = APIClient().get("/api/rooms/")
+        assert r.status_code == status.HTTP_200_OK
+        qs = Room.objects.all().prefetch_related("roomequipment_set__equipment")
+        assert r.content == _json(RoomListSerializer(qs, many=True).data)
+
+    def test_lista_sal_fields(self, rooms):
+        r = APIClient().get("/api/rooms/", {"fields": "id,equipment"})
+        ids = dict(Equipment.objects.values_list("name", "id"))
+        assert r.json()[0] == {
+            "id": rooms[0].id,
+            "equipment": [
+                {"id": ids["Tablica"], "name": "Tablica", "qty": 2},
+                {"id": ids["Projektor"], "name": "Projektor", "qty": 1},
+            ],
+        }
+        assert r.json()[2] == {"id": rooms[2].id, "equipment": []}
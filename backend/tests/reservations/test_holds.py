@@ -0,0 +1,128 @@
+"""Testy wygaszania holdów w koszykach czasu (reservations.services.holds)."""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import User
+from reservations.models import OutboxEvent, Reservation
+from reservations.services.holds import bucket_end, expire_due_holds, schedule_hold_expiry
+from reservations.tasks import expire_holds
+from rooms.models import Room
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def room(db):
+    return Room.objects.create(name="Sala A")
+
+
+def _pending(user, room, hold_minutes, hour=10):
+    now = timezone.now()
+    start = (now + timedelta(days=1)).replace(hour=hour, minute=0, second=0, microsecond=0)
+    return Reservation.objects.create(
+        user=user,
+        room=room,
+        status=Reservation.Status.PENDING,
+        start_at=start,
+        end_at=start + timedelta(hours=1),
+        hold_expires_at=now + timedelta(minutes=hold_minutes),
+    )
+
+
+def test_bucket_end_zaokragla_w_gore():
+    moment = datetime(2025, 2, 1, 10, 0, 1, tzinfo=dt_timezone.utc)
+    assert bucket_end(moment, 30) == datetime(2025, 2, 1, 10, 0, 30, tzinfo=dt_timezone.utc)
+    assert bucket_end(moment.replace(second=30), 30) == moment.replace(second=30)
+
+
+def _outbox():
+    return list(OutboxEvent.objects.order_by("id").values_list("task", "args", "eta"))
+
+
+@pytest.mark.django_db
+class TestScheduleHoldExpiry:
+    def test_jedno_zdarzenie_na_koszyk(self, django_capture_on_commit_callbacks):
+        base = datetime(2030, 1, 1, 10, 0, 1, tzinfo=dt_timezone.utc)
+        with django_capture_on_commit_callbacks(execute=True):
+            for offset in (0, 5, 20):
+                schedule_hold_expiry(1, base + timedelta(seconds=offset))
+            schedule_hold_expiry(2, base + timedelta(seconds=40))
+        assert _outbox() == [
+            ("reservations.tasks.expire_holds", [], bucket_end(base, 30)),
+            ("reservations.tasks.expire_holds", [], bucket_end(base + timedelta(seconds=40), 30)),
+        ]
+
+    def test_koszyk_po_commicie_rezerwacji(self, django_capture_on_commit_callbacks):
+        moment = datetime(2030, 1, 1, 10, 0, 1, tzinfo=dt_timezone.utc)
+        with django_capture_on_commit_callbacks() as callbacks:
+            schedule_hold_expiry(1, moment)
+            # W transakcji rezerwacji nie ma wiersza ze wspólnym kluczem koszyka.
+            assert _outbox() == []
+        callbacks[0]()
+        assert _outbox() == [("reservations.tasks.expire_holds", [], bucket_end(moment, 30))]
+
+    @override_settings(RESERVATION_HOLD_EXPIRY_BUCKET_SECONDS=0)
+    def test_zero_to_eta_per_rezerwacja(self):
+        moment = datetime(2030, 1, 1, 10, 0, 1, tzinfo=dt_timezone.utc)
+        schedule_hold_expiry(7, moment)
+        assert _outbox() == [("reservations.tasks.expire_hold", [7], moment)]
+
+
+@pytest.mark.django_db
+class TestExpireDueHolds:
+    def test_anuluje_tylko_wygasle_pending(self, user, room, django_capture_on_commit_callbacks):
+        expired = _pending(user, room, -1, hour=9)
+        waiting = _pending(user, room, 10, hour=11)
+        confirmed = _pending(user, room, -1, hour=13)
+        Reservation.objects.filter(pk=confirmed.pk).update(status=Reservation.Status.CONFIRMED)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            rows = expire_due_holds()
+
+        assert rows == [(expired.id, room.id, expired.start_at, expired.end_at)]
+        statuses = dict(Reservation.objects.values_list("id", "status"))
+        assert statuses == {
+            expired.id: Reservation.Status.CANCELED,
+            waiting.id: Reservation.Status.PENDING,
+            confirmed.id: Reservation.Status.CONFIRMED,
+        }
+        assert _outbox() == [
+            ("reservations.tasks.send_notifications_batch", [[expired.id], "hold_expired"], None)
+        ]
+
+    def test_jedno_zapytanie(self, user, room):
+        for hour in (9, 10, 11):
+            _pending(user, room, -1, hour=hour)
+        with CaptureQueriesContext(connection) as ctx:
+            assert len(expire_due_holds()) == 3
+        queries = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if "reservations" in q["sql"] and "reservations_outbox" not in q["sql"]
+        ]
+        assert len(queries) == 1 and queries[0].startswith("UPDATE")
+
+    def test_zadanie_anuluje_partiami(self, user, room, settings):
+        settings.RESERVATION_RECONCILE_CHUNK_SIZE = 2
+        for hour in (9, 10, 11, 12, 13):
+            _pending(user, room, -1, hour=hour)
+        with CaptureQueriesContext(connection) as ctx:
+            assert expire_holds() == 5
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 3
+        assert all("LIMIT" in sql for sql in updates)
+
+    def test_zadanie_zwraca_liczbe(self, user, room):
+        _pending(user, room, -1)
+        assert expire_holds() == 1
+        assert expire_holds() == 0
@@ -0,0 +1,186 @@
+"""Testy kanałów iCalendar: /api/calendar/rooms/<id>.ics i /api/calendar/users/<token>.ics."""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from reservations.ical import _fold, rotate_user_feed_key, user_feed_token, user_from_token
+from reservations.models import Reservation
+from rooms.models import Room
+
+
+def _at(days, h, m=0):
+    day = timezone.localdate() + timedelta(days=days)
+    return timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(
+        hours=h, minutes=m
+    )
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username="u1@ex.com", password="test", email="u1@ex.com", first_name="Jan"
+    )
+
+
+@pytest.fixture
+def room(db):
+    return Room.objects.create(name="Sala A", location="Parter; skrzydło B")
+
+
+@pytest.fixture
+def reservations(user, room):
+    def make(days, h, status):
+        return Reservation.objects.create(
+            user=user, room=room, status=status, start_at=_at(days, h), end_at=_at(days, h + 1)
+        )
+
+    return [
+        make(1, 9, Reservation.Status.CONFIRMED),
+        make(2, 10, Reservation.Status.PENDING),
+        make(3, 11, Reservation.Status.CANCELED),
+        make(-40, 9, Reservation.Status.CONFIRMED),  # poza oknem kanału
+    ]
+
+
+def _body(response):
+    if response.streaming:
+        return b"".join(response.streaming_content).decode("utf-8")
+    return response.content.decode("utf-8")
+
+
+def _room_url(room):
+    return f"/api/calendar/rooms/{room.pk}.ics"
+
+
+@pytest.mark.django_db
+class TestRoomFeed:
+    def test_tresc(self, room, reservations):
+        r = APIClient().get(_room_url(room))
+        assert r.status_code == status.HTTP_200_OK
+        assert r["Content-Type"] == "text/calendar; charset=utf-8"
+        body = _body(r)
+        assert body.startswith("BEGIN:VCALENDAR\r\n")
+        assert body.endswith("END:VCALENDAR\r\n")
+        assert body.count("BEGIN:VEVENT") == 2
+        assert f"UID:reservation-{reservations[0].pk}@meetspace-plus" in body
+        assert "STATUS:CONFIRMED" in body and "STATUS:TENTATIVE" in body
+        assert "LOCATION:Sala A\\, Parter\\; skrzydło B" in body
+        # bez danych osobowych
+        assert "u1@ex.com" not in body and "Jan" not in body
+
+    def test_304_i_cache(self, room, reservations, django_assert_num_queries):
+        client = APIClient()
+        first = client.get(_room_url(room))
+        assert first.streaming
+        body = _body(first)
+        etag = first["ETag"]
+
+        with django_assert_num_queries(2):  # sala + odcisk
+            r = client.get(_room_url(room), HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_304_NOT_MODIFIED
+        assert r["ETag"] == etag
+
+        with django_assert_num_queries(2):  # treść z cache, bez zapytania o wiersze
+            r = client.get(_room_url(room))
+        assert not r.streaming
+        assert r.content.decode("utf-8") == body
+
+    def test_zmiana_uniewaznia(self, room, reservations):
+        client = APIClient()
+        etag = client.get(_room_url(room))["ETag"]
+        reservations[1].status = Reservation.Status.CANCELED
+        reservations[1].save()
+        r = client.get(_room_url(room), HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert r["ETag"] != etag
+        assert _body(r).count("BEGIN:VEVENT") == 1
+
+    def test_wygasly_hold_uniewaznia(self, room, reservations):
+        Reservation.objects.filter(pk=reservations[1].pk).update(
+            hold_expires_at=timezone.now() + timedelta(seconds=60)
+        )
+        client = APIClient()
+        first = client.get(_room_url(room))
+        assert _body(first).count("BEGIN:VEVENT") == 2
+        later = timezone.now() + timedelta(minutes=5)
+        with patch("django.utils.timezone.now", return_value=later):
+            r = client.get(_room_url(room), HTTP_IF_NONE_MATCH=first["ETag"])
+            assert r.status_code == status.HTTP_200_OK
+            assert r["ETag"] != first["ETag"]
+            # Nowy klucz cache – treść bez wygasłego holdu, nie stara treść z cache.
+            assert _body(r).count("BEGIN:VEVENT") == 1
+
+    def test_zmiana_nazwy_sali(self, room, reservations):
+        client = APIClient()
+        etag = client.get(_room_url(room))["ETag"]
+        room.name = "Sala Z"
+        room.save()
+        r = client.get(_room_url(room), HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert "X-WR-CALNAME:Sala Sala Z" in _body(r)
+
+    def test_brak_sali_404(self, db):
+        r = APIClient().get("/api/calendar/rooms/999.ics", HTTP_ACCEPT="text/calendar")
+        assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestUserFeed:
+    def test_link_i_tresc(self, user, reservations):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = client.get("/api/calendar/feed-link").json()["url"]
+        assert user_feed_token(user) in url
+
+        r = APIClient().get(url)
+        assert r.status_code == status.HTTP_200_OK
+        body = _body(r)
+        assert body.count("BEGIN:VEVENT") == 2
+        assert "SUMMARY:Rezerwacja: Sala A (niepotwierdzona)" in body
+
+    def test_zly_token_404(self, user):
+        r = APIClient().get(f"/api/calendar/users/{user.pk}:zly.ics")
+        assert r.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_nowy_link_uniewaznia_stary(self, user, reservations):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        old = client.get("/api/calendar/feed-link").json()["url"]
+        new = client.post("/api/calendar/feed-link").json()["url"]
+        assert new != old
+        assert client.get("/api/calendar/feed-link").json()["url"] == new
+        assert APIClient().get(old).status_code == status.HTTP_404_NOT_FOUND
+        assert APIClient().get(new).status_code == status.HTTP_200_OK
+
+    def test_link_niezalezny_od_innych_uzytkownikow(self, user, reservations):
+        other = User.objects.create_user(username="u2@ex.com", password="x", email="u2@ex.com")
+        token = user_feed_token(user)
+        rotate_user_feed_key(other)
+        assert user_from_token(token) == user
+        # Podpis innego użytkownika nie pasuje do cudzego id.
+        forged = f"{user.pk}:{user_feed_token(other).partition(':')[2]}"
+        assert user_from_token(forged) is None
+
+    def test_nieaktywny_uzytkownik_404(self, user, reservations):
+        url = f"/api/calendar/users/{user_feed_token(user)}.ics"
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        assert APIClient().get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_link_wymaga_logowania(self, db):
+        r = APIClient().get("/api/calendar/feed-link")
+        assert r.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_fold_utf8():
+    line = "SUMMARY:" + "ż" * 60
+    folded = _fold(line)
+    parts = folded.removesuffix("\r\n").split("\r\n ")
+    assert all(len(part.encode("utf-8")) <= 75 for part in parts)
+    assert "".join(parts) == line
@@ -0,0 +1,176 @@
+"""Testy indeksu przedziałów w pamięci: RoomDayIndex, ładowanie, wersje, hooki, odczyty."""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import User
+from reservations.models import Reservation
+from reservations.services.availability import find_free_slots
+from reservations.services.booking import (
+    cancel_reservation,
+    confirm_reservation,
+    create_reservation,
+)
+from reservations.services.interval_index import RoomDayIndex, _version_key, room_index
+from reservations.tasks import expire_hold
+from rooms.models import Room
+
+DAY = date(2030, 3, 4)
+HOUR = timedelta(hours=1)
+
+
+def _dt(h, m=0):
+    return timezone.make_aware(datetime.combine(DAY, datetime.min.time()).replace(hour=h, minute=m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def room(db):
+    return Room.objects.create(name="Sala A")
+
+
+def _reserve(user, room, h1, h2, status=Reservation.Status.CONFIRMED, **kwargs):
+    return Reservation.objects.create(
+        user=user, room=room, status=status, start_at=_dt(h1), end_at=_dt(h2), **kwargs
+    )
+
+
+def _is_free(room, h1, h2):
+    return room_index.day(room.id, DAY).is_free(_dt(h1), _dt(h2))
+
+
+class TestRoomDayIndex:
+    def test_is_free_polotwarte(self):
+        idx = RoomDayIndex([(1, _dt(9), _dt(10)), (2, _dt(11), _dt(12))])
+        assert idx.is_free(_dt(10), _dt(11))
+        assert not idx.is_free(_dt(9, 30), _dt(10, 30))
+        assert not idx.is_free(_dt(8), _dt(13))
+
+    def test_add_remove(self):
+        idx = RoomDayIndex()
+        idx.add(2, _dt(11), _dt(12))
+        idx.add(1, _dt(9), _dt(10))
+        assert idx.ids == [1, 2]
+        idx.remove(1)
+        assert idx.is_free(_dt(9), _dt(10))
+        assert len(idx) == 1
+
+    def test_gaps(self):
+        idx = RoomDayIndex([(1, _dt(9), _dt(10)), (2, _dt(10, 30), _dt(12))])
+        assert idx.gaps(_dt(8), _dt(18), HOUR) == [(_dt(8), _dt(9)), (_dt(12), _dt(18))]
+        assert idx.gaps(_dt(9), _dt(12), timedelta(minutes=30)) == [(_dt(10), _dt(10, 30))]
+        assert idx.gaps(_dt(17, 30), _dt(18), HOUR) == []
+
+    def test_wygasly_hold_nie_blokuje(self):
+        idx = RoomDayIndex([(1, _dt(10), _dt(11), _dt(9))])
+        assert not idx.is_free(_dt(10), _dt(11), now=_dt(8, 30))
+        assert idx.is_free(_dt(10), _dt(11), now=_dt(9, 30))
+        assert idx.gaps(_dt(8), _dt(18), HOUR, now=_dt(12)) == [(_dt(8), _dt(18))]
+
+
+@pytest.mark.django_db
+class TestLazyIndex:
+    def test_dni_wielu_sal_jednym_zapytaniem(self, user, room, django_assert_num_queries):
+        other = Room.objects.create(name="Sala B")
+        _reserve(user, room, 10, 11)
+        _reserve(user, other, 12, 13, status=Reservation.Status.CANCELED)
+        with django_assert_num_queries(1):
+            days = room_index.days([room.id, other.id], DAY)
+        assert not days[room.id].is_free(_dt(10, 30), _dt(11, 30))
+        assert days[other.id].is_free(_dt(12), _dt(13))
+        with django_assert_num_queries(0):
+            assert room_index.days([room.id, other.id], DAY) == days
+
+    def test_zmiana_wersji_wymusza_przeladowanie(self, user, room, django_assert_num_queries):
+        assert _is_free(room, 10, 11)
+        _reserve(user, room, 10, 11)  # zapis w innym procesie – widać tylko nową wersję
+        cache.set(_version_key(room.id), 99, timeout=None)
+        with django_assert_num_queries(1):
+            assert not _is_free(room, 10, 11)
+
+
+@pytest.mark.django_db
+@patch("reservations.services.booking.schedule_hold_expiry")
+class TestHooks:
+    def test_create_i_cancel(self, mock_expire, user, room, django_capture_on_commit_callbacks):
+        assert _is_free(room, 10, 11)
+        with django_capture_on_commit_callbacks(execute=True):
+            r = create_reservation(user, room.id, _dt(10), _dt(11))
+        assert room_index.day(room.id, DAY).ids == [r.id]
+        assert not _is_free(room, 10, 11)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            cancel_reservation(r)
+        assert _is_free(room, 10, 11)
+
+    def test_potwierdzenie_zdejmuje_hold(
+        self, mock_expire, user, room, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            r = create_reservation(user, room.id, _dt(10), _dt(11))
+        assert r.id in room_index.day(room.id, DAY).holds
+        with django_capture_on_commit_callbacks(execute=True):
+            confirm_reservation(r)
+        after_hold = r.hold_expires_at + HOUR
+        assert not room_index.day(room.id, DAY).is_free(_dt(10), _dt(11), now=after_hold)
+
+    def test_expire_hold_zwalnia_slot(
+        self, mock_expire, user, room, django_capture_on_commit_callbacks
+    ):
+        r = _reserve(
+            user,
+            room,
+            10,
+            11,
+            status=Reservation.Status.PENDING,
+            hold_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        # Wygasły hold nie blokuje jeszcze przed anulowaniem w tle.
+        assert _is_free(room, 10, 11)
+        assert room_index.day(room.id, DAY).ids == [r.id]
+        with django_capture_on_commit_callbacks(execute=True):
+            expire_hold(r.id)
+        assert room_index.day(room.id, DAY).ids == []
+
+    def test_rollback_nie_zmienia_indeksu(
+        self, mock_expire, user, room, django_capture_on_commit_callbacks
+    ):
+        assert _is_free(room, 10, 11)
+        with django_capture_on_commit_callbacks(execute=False):
+            create_reservation(user, room.id, _dt(10), _dt(11))
+        # callbacki nie wykonane (symulacja rollbacku) – indeks bez zmian
+        assert room_index.day(room.id, DAY).ids == []
+
+
+@pytest.mark.django_db
+class TestFindFreeSlots:
+    def test_z_indeksu_bez_zapytania_o_rezerwacje(self, user, room, django_assert_num_queries):
+        _reserve(user, room, 10, 12)
+        now = _dt(7)
+        expected = [(room, [(_dt(8), _dt(10)), (_dt(12), _dt(18))])]
+        assert find_free_slots(DAY, HOUR, now=now) == expected
+        with django_assert_num_queries(1):  # tylko sale
+            assert find_free_slots(DAY, HOUR, now=now) == expected
+
+    def test_zmiana_w_innym_procesie(self, user, room):
+        now = _dt(7)
+        find_free_slots(DAY, HOUR, now=now)
+        _reserve(user, room, 8, 17)
+        cache.set(_version_key(room.id), 99, timeout=None)
+        assert find_free_slots(DAY, HOUR, now=now) == [(room, [(_dt(17), _dt(18))])]
+
+    def test_bez_wspolnego_cache_z_bazy(self, user, room, settings):
+        settings.RESERVATION_OCCUPANCY_CACHE = None  # LocMem – indeks nieużywany
+        _reserve(user, room, 10, 12)
+        [(_room, gaps)] = find_free_slots(DAY, HOUR, now=_dt(7))
+        assert gaps == [(_dt(8), _dt(10)), (_dt(12), _dt(18))]
+        assert not room_index._days
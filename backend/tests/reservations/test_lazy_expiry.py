@@ -0,0 +1,136 @@
+"""Testy leniwego wygaszania holdów: wygasły pending nie blokuje, zanim posprząta go Celery."""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from reservations.exceptions import ReservationValidationError
+from reservations.models import OutboxEvent, Reservation
+from reservations.services.availability import find_free_slots, is_slot_free
+from reservations.services.bitmap import free_rooms
+from reservations.services.booking import confirm_reservation, create_reservation
+from rooms.models import Room
+
+DAY = date(2030, 3, 4)
+
+
+def _dt(h, m=0):
+    return timezone.make_aware(datetime.combine(DAY, datetime.min.time()).replace(hour=h, minute=m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def room(db):
+    return Room.objects.create(name="Sala A")
+
+
+def _hold(user, room, h1, h2, *, minutes):
+    return Reservation.objects.create(
+        user=user,
+        room=room,
+        status=Reservation.Status.PENDING,
+        start_at=_dt(h1),
+        end_at=_dt(h2),
+        hold_expires_at=timezone.now() + timedelta(minutes=minutes),
+    )
+
+
+@pytest.mark.django_db
+class TestReads:
+    def test_wygasly_hold_wolny_niewygasly_zajety(self, user, room):
+        _hold(user, room, 10, 11, minutes=-1)
+        _hold(user, room, 12, 13, minutes=10)
+        assert is_slot_free(room.id, _dt(10), _dt(11))
+        assert not is_slot_free(room.id, _dt(12), _dt(13))
+        assert free_rooms([room.id], _dt(10), _dt(11)) == [room.id]
+        assert free_rooms([room.id], _dt(12), _dt(13)) == []
+        [(_room, gaps)] = find_free_slots(DAY, timedelta(hours=1))
+        assert gaps == [(_dt(8), _dt(12)), (_dt(13), _dt(18))]
+
+    def test_bitmapa_przebudowana_po_wygasnieciu_holdu(self, user, room):
+        r = _hold(user, room, 10, 11, minutes=10)
+        assert free_rooms([room.id], _dt(10), _dt(11)) == []
+        Reservation.objects.filter(pk=r.pk).update(hold_expires_at=timezone.now())
+        # Bitmapa w cache pamięta czas wygaśnięcia holdu (valid_until) – po nim jest stara.
+        with patch("reservations.services.bitmap.timezone.now", return_value=_dt(23)):
+            assert free_rooms([room.id], _dt(10), _dt(11)) == [room.id]
+
+    def test_lista_api_status_efektywny_i_filtr(self, user, room):
+        expired = _hold(user, room, 10, 11, minutes=-1)
+        waiting = _hold(user, room, 12, 13, minutes=10)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        rows = client.get("/api/reservations/", {"paginate": "false"}).json()
+        assert {row["id"]: row["status"] for row in rows} == {
+            expired.id: "canceled",
+            waiting.id: "pending",
+        }
+        pending = client.get("/api/reservations/", {"paginate": "false", "status": "pending"})
+        assert [row["id"] for row in pending.json()] == [waiting.id]
+        canceled = client.get("/api/reservations/", {"paginate": "false", "status": "canceled"})
+        assert [row["id"] for row in canceled.json()] == [expired.id]
+        detail = client.get(f"/api/reservations/{expired.id}/").json()
+        assert detail["status"] == "canceled"
+
+
+@pytest.mark.django_db
+@patch("reservations.services.booking.schedule_hold_expiry")
+class TestBooking:
+    def test_rezerwacja_na_wygaslym_holdzie(
+        self, mock_schedule, user, room, django_capture_on_commit_callbacks
+    ):
+        stale = _hold(user, room, 10, 11, minutes=-1)
+        with django_capture_on_commit_callbacks(execute=True):
+            r = create_reservation(user, room.id, _dt(10), _dt(11))
+        stale.refresh_from_db()
+        assert stale.status == Reservation.Status.CANCELED
+        assert r.status == Reservation.Status.PENDING
+        event = OutboxEvent.objects.get(task="reservations.tasks.send_notifications_batch")
+        assert event.args == [[stale.id], "hold_expired"]
+
+    def test_postgres_ponawia_insert_po_zwolnieniu_holdu(self, mock_schedule, user, room):
+        stale = _hold(user, room, 10, 11, minutes=-1)
+        violation = IntegrityError("reservations_room_period_excl")
+        create = Reservation.objects.create
+        calls = []
+
+        def create_once_violating(**fields):
+            calls.append(fields)
+            if len(calls) == 1:
+                raise violation
+            return create(**fields)
+
+        with (
+            patch("reservations.services.booking.db_enforces_no_overlap", return_value=True),
+            patch.object(Reservation.objects, "create", side_effect=create_once_violating),
+        ):
+            r = create_reservation(user, room.id, _dt(10), _dt(11))
+        assert len(calls) == 2
+        assert r.status == Reservation.Status.PENDING
+        stale.refresh_from_db()
+        assert stale.status == Reservation.Status.CANCELED
+
+    def test_potwierdzenie_wygaslego_holdu_odrzucone(self, mock_schedule, user, room):
+        r = _hold(user, room, 10, 11, minutes=-1)
+        with pytest.raises(ReservationValidationError, match="minął"):
+            confirm_reservation(r)
+        r.refresh_from_db()
+        assert r.status == Reservation.Status.PENDING
+
+    def test_potwierdzenie_api_400(self, mock_schedule, user, room):
+        r = _hold(user, room, 10, 11, minutes=-1)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(f"/api/reservations/{r.id}/confirm/")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
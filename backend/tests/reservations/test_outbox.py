@@ -0,0 +1,169 @@
+"""Testy outboxu zdarzeń (reservations.services.outbox) i dispatchera."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import User
+from reservations.models import OutboxEvent, Reservation
+from reservations.services import outbox
+from reservations.services.booking import cancel_reservation, confirm_reservation
+from reservations.tasks import dispatch_outbox, send_notifications
+from rooms.models import Room
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def reservation(user):
+    room = Room.objects.create(name="Sala A")
+    start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+    return Reservation.objects.create(
+        user=user,
+        room=room,
+        status=Reservation.Status.PENDING,
+        start_at=start,
+        end_at=start + timedelta(hours=1),
+        hold_expires_at=timezone.now() + timedelta(minutes=15),
+    )
+
+
+@pytest.fixture
+def broker():
+    """Producent z puli i zadania Celery zastąpione mockami – bez połączenia z brokerem."""
+    app = MagicMock()
+    with patch("reservations.services.outbox.current_app", app):
+        yield app
+
+
+def _published(broker):
+    task = broker.tasks.__getitem__.return_value
+    return [
+        (call.kwargs["args"], call.kwargs["task_id"]) for call in task.apply_async.call_args_list
+    ]
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    def test_zdarzenie_w_transakcji_zmiany_statusu(self, reservation):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                cancel_reservation(reservation)
+                raise RuntimeError("rollback")
+        assert not OutboxEvent.objects.exists()
+
+        reservation.refresh_from_db()
+        confirm_reservation(reservation)
+        event = OutboxEvent.objects.get()
+        assert (event.task, event.args) == (send_notifications.name, [reservation.id, "confirmed"])
+        assert event.dedup_key == f"send_notifications:{reservation.id}:confirmed"
+        assert event.sent_at is None
+
+    def test_dedup_key_pomija_powtorke(self, db):
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k1")
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k1")
+        outbox.enqueue(send_notifications, [2, "canceled"])
+        assert OutboxEvent.objects.count() == 2
+
+    def test_zadanie_bez_brokera_w_zadaniu(self, reservation):
+        # create/confirm/cancel nie publikują niczego w trakcie żądania.
+        with patch("reservations.services.outbox.current_app") as app:
+            confirm_reservation(reservation)
+        app.producer_or_acquire.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestDispatch:
+    def test_partie_po_kolei_z_dedup_key_jako_task_id(self, broker, db):
+        for i in range(5):
+            outbox.enqueue(send_notifications, [i, "canceled"], dedup_key=f"k{i}")
+        stats = outbox.dispatch_pending(limit=2)
+        assert (stats["sent"], stats["batches"], stats["failed"]) == (5, 3, False)
+        assert _published(broker) == [([i, "canceled"], f"k{i}") for i in range(5)]
+        # Jeden producent (połączenie z puli) na partię, nie na zdarzenie.
+        assert broker.producer_or_acquire.call_count == 3
+        assert not OutboxEvent.objects.filter(sent_at__isnull=True).exists()
+        assert outbox.dispatch_pending()["sent"] == 0
+
+    def test_blad_brokera_zostawia_zdarzenie_z_backoffem(self, broker, db):
+        for i in range(3):
+            outbox.enqueue(send_notifications, [i, "canceled"], dedup_key=f"k{i}")
+        task = broker.tasks.__getitem__.return_value
+        task.apply_async.side_effect = [None, ConnectionError("broker down"), None, None]
+
+        stats = outbox.dispatch_pending()
+        assert (stats["sent"], stats["failed"]) == (1, True)
+        failed = OutboxEvent.objects.get(dedup_key="k1")
+        assert failed.sent_at is None and failed.attempts == 1
+        assert "broker down" in failed.last_error
+        assert failed.available_at > timezone.now()
+
+        # Po backoffie: niewysłane zdarzenia wychodzą w pierwotnej kolejności.
+        OutboxEvent.objects.update(available_at=timezone.now())
+        assert outbox.dispatch_pending()["sent"] == 2
+        assert [task_id for _args, task_id in _published(broker)] == ["k0", "k1", "k1", "k2"]
+
+    def test_usuwa_stare_wyslane(self, broker, db, settings):
+        settings.RESERVATION_OUTBOX_RETENTION_HOURS = 1
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="old")
+        outbox.enqueue(send_notifications, [2, "canceled"], dedup_key="new")
+        OutboxEvent.objects.filter(dedup_key="old").update(
+            sent_at=timezone.now() - timedelta(hours=2)
+        )
+        stats = outbox.dispatch_pending()
+        assert (stats["sent"], stats["pruned"]) == (1, 1)
+        assert list(OutboxEvent.objects.values_list("dedup_key", flat=True)) == ["new"]
+
+    def test_zadanie_i_komenda(self, broker, db):
+        outbox.enqueue(send_notifications, [1, "canceled"])
+        assert dispatch_outbox() == 1
+        outbox.enqueue(send_notifications, [2, "canceled"])
+        call_command("dispatch_outbox", "--batch-size", "10")
+        assert len(_published(broker)) == 2
+
+
+@pytest.mark.django_db
+class TestKonsument:
+    def test_konsument_pomija_powtorke(self):
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k1")
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k2")
+        with patch("reservations.tasks.logger") as log:
+            send_notifications.apply(args=[1, "canceled"], task_id="k1")
+            send_notifications.apply(args=[1, "canceled"], task_id="k1")
+            send_notifications.apply(args=[1, "canceled"], task_id="k2")
+        messages = [call.args[0] for call in log.info.call_args_list]
+        assert messages == [
+            "send_notifications",
+            "send_notifications duplicate",
+            "send_notifications",
+        ]
+
+    def test_znacznik_w_bazie_nie_w_cache(self):
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k1")
+        send_notifications.apply(args=[1, "canceled"], task_id="k1")
+        cache.clear()
+        assert OutboxEvent.objects.get(dedup_key="k1").delivered_at is not None
+        assert outbox.claim_delivery("k1") is False
+
+    def test_zadanie_spoza_outboxu_zawsze_wykonane(self):
+        assert outbox.claim_delivery("spoza") is True
+        assert outbox.claim_delivery("spoza") is True
+        assert outbox.claim_delivery(None) is True
+
+    def test_blad_zadania_wycofuje_znacznik(self):
+        outbox.enqueue(send_notifications, [1, "canceled"], dedup_key="k1")
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                assert outbox.claim_delivery("k1") is True
+                raise RuntimeError("awaria")
+        assert OutboxEvent.objects.get(dedup_key="k1").delivered_at is None
+        assert outbox.claim_delivery("k1") is True
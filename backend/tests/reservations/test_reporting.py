@@ -0,0 +1,124 @@
+"""Testy raportu wykorzystania: macierz zajętości, wskaźniki, endpoint admina, komenda."""
+
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User, UserRole
+from reservations.models import Reservation
+from reservations.reporting import utilization_report
+from rooms.models import Room
+
+MONDAY = date(2025, 3, 3)
+
+
+def _dt(day, h, m=0):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=h, minute=m))
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="u1@ex.com", password="test", email="u1@ex.com")
+
+
+@pytest.fixture
+def admin_user(db):
+    u = User.objects.create_user(username="admin@ex.com", password="test", email="admin@ex.com")
+    UserRole.objects.create(user=u, role=Role.objects.get_or_create(name="admin")[0])
+    return u
+
+
+@pytest.fixture
+def rooms(db):
+    return [Room.objects.create(name="Sala A"), Room.objects.create(name="Sala B")]
+
+
+def _reserve(user, room, start, end, status=Reservation.Status.CONFIRMED, **kwargs):
+    return Reservation.objects.create(
+        user=user, room=room, status=status, start_at=start, end_at=end, **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestUtilizationReport:
+    def test_macierz_i_wskazniki(self, user, rooms):
+        a, b = rooms
+        _reserve(user, a, _dt(MONDAY, 9, 30), _dt(MONDAY, 11))  # 30 min o 9, 60 min o 10
+        _reserve(user, a, _dt(MONDAY + timedelta(days=1), 10), _dt(MONDAY + timedelta(days=1), 12))
+        _reserve(user, b, _dt(MONDAY, 10), _dt(MONDAY, 11), status=Reservation.Status.CANCELED)
+        hold = _dt(MONDAY, 7)
+        expired = _reserve(
+            user,
+            b,
+            _dt(MONDAY, 12),
+            _dt(MONDAY, 13),
+            status=Reservation.Status.CANCELED,
+            hold_expires_at=hold,
+        )
+        Reservation.objects.filter(pk=expired.pk).update(updated_at=hold + timedelta(minutes=1))
+        next_monday = MONDAY + timedelta(days=7)
+        _reserve(user, a, _dt(next_monday, 9), _dt(next_monday, 10))  # poza zakresem
+
+        report = utilization_report(MONDAY, MONDAY + timedelta(days=6), chunk_size=2)
+
+        assert report["reservations"] == 4
+        assert report["cancel_ratio"] == 0.5
+        assert report["no_show_ratio"] == 0.25
+        room_a, room_b = report["rooms"]
+        assert room_a["booked_minutes"] == 210.0
+        # 7 dni × 600 min dnia pracy
+        assert room_a["utilization"] == round(210 * 100 / 4200, 2)
+        assert room_b["utilization"] == 0.0
+        assert room_b["no_show_ratio"] == 0.5
+        # poniedziałek: 9:00 – 30 min, 10:00 – 60 min, uśrednione po 2 salach
+        assert report["heatmap"][0][9] == 25.0
+        assert report["heatmap"][0][10] == 50.0
+        assert report["heatmap"][1][11] == 50.0
+        assert report["peak_hours"][0]["utilization"] == 50.0
+
+    def test_filtr_sal_i_pusty_zakres(self, user, rooms):
+        a, b = rooms
+        _reserve(user, a, _dt(MONDAY, 9), _dt(MONDAY, 10))
+        report = utilization_report(MONDAY, MONDAY, room_ids=[b.id])
+        assert [r["room_id"] for r in report["rooms"]] == [b.id]
+        assert report["reservations"] == 0
+        assert report["peak_hours"] == []
+
+
+@pytest.mark.django_db
+class TestUtilizationReportAPI:
+    def test_tylko_admin(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        r = client.get("/api/reports/utilization", {"from": "2025-03-03", "to": "2025-03-09"})
+        assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_admin_200(self, admin_user, user, rooms):
+        _reserve(user, rooms[0], _dt(MONDAY, 9), _dt(MONDAY, 10))
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        r = client.get("/api/reports/utilization", {"from": "2025-03-03", "to": "2025-03-09"})
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["reservations"] == 1
+        assert len(r.json()["heatmap"]) == 7
+
+    def test_zly_zakres_400(self, admin_user):
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        r = client.get("/api/reports/utilization", {"from": "2025-03-09", "to": "2025-03-03"})
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_komenda_report_utilization(user, rooms):
+    _reserve(user, rooms[0], _dt(MONDAY, 9), _dt(MONDAY, 10))
+    out = StringIO()
+    call_command("report_utilization", "--from", "2025-03-03", "--to", "2025-03-03", stdout=out)
+    assert "Sala A" in out.getvalue()
+    assert "pn 09:00" in out.getvalue()
@@ -1,5 +1,7 @@
 """Testy integracyjne API rezerwacji: list, create, confirm, cancel."""
 
+import base64
+import json
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
@@ -9,7 +11,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from accounts.models import Role, User, UserRole
-from reservations.models import Reservation
+from reservations.models import OutboxEvent, Reservation
 from rooms.models import Room
 
 
@@ -76,13 +78,13 @@ class TestReservationsListAPI:
         client.force_authenticate(user=user)
         r = client.get("/api/reservations/")
         assert r.status_code == status.HTTP_200_OK
-        assert r.json() == []
+        assert r.json() == {"next": None, "previous": None, "results": []}
 
     def test_authenticated_200_with_data(self, client, user, reservation):
         client.force_authenticate(user=user)
         r = client.get("/api/reservations/")
         assert r.status_code == status.HTTP_200_OK
-        data = r.json()
+        data = r.json()["results"]
         assert len(data) == 1
         assert data[0]["id"] == reservation.id
         assert data[0]["status"] == "pending"
@@ -100,8 +102,8 @@ class TestReservationsListAPI:
         client.force_authenticate(user=user)
         r = client.get("/api/reservations/", {"room_id": room.id})
         assert r.status_code == status.HTTP_200_OK
-        assert len(r.json()) == 1
-        assert r.json()[0]["room"] == room.id
+        assert len(r.json()["results"]) == 1
+        assert r.json()["results"][0]["room"] == room.id
 
     def test_filter_status(self, client, user, reservation):
         reservation.status = Reservation.Status.CONFIRMED
@@ -109,12 +111,102 @@ class TestReservationsListAPI:
         client.force_authenticate(user=user)
         r = client.get("/api/reservations/", {"status": "confirmed"})
         assert r.status_code == status.HTTP_200_OK
-        assert len(r.json()) == 1
-        assert r.json()[0]["status"] == "confirmed"
+        assert len(r.json()["results"]) == 1
+        assert r.json()["results"][0]["status"] == "confirmed"
+
+    def test_paginate_false_cala_lista(self, client, user, reservation):
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"paginate": "false"})
+        assert r.status_code == status.HTTP_200_OK
+        assert [x["id"] for x in r.json()] == [reservation.id]
+
+
+@pytest.mark.django_db
+class TestReservationsPagination:
+    @pytest.fixture
+    def reservations(self, user, room):
+        # 7 rezerwacji, w tym 3 z tym samym start_at (remisy rozstrzyga id)
+        starts = [_dt(2025, 3, 1, 9, 0)] * 3 + [_dt(2025, 3, d, 9, 0) for d in (2, 3, 4, 5)]
+        return [
+            Reservation.objects.create(
+                user=user,
+                room=room,
+                status=Reservation.Status.CONFIRMED,
+                start_at=start,
+                end_at=start + timedelta(hours=1),
+            )
+            for start in starts
+        ]
+
+    def _walk(self, client, url, key="next"):
+        ids = []
+        while url:
+            r = client.get(url)
+            assert r.status_code == status.HTTP_200_OK
+            ids.extend(x["id"] for x in r.json()["results"])
+            url = r.json()[key]
+        return ids
+
+    def test_strony_w_kolejnosci_start_at_id(self, client, user, reservations):
+        client.force_authenticate(user=user)
+        expected = [
+            r.id for r in sorted(reservations, key=lambda r: (r.start_at, r.id), reverse=True)
+        ]
+        assert self._walk(client, "/api/reservations/?page_size=2") == expected
+
+    def test_poprzednia_strona(self, client, user, reservations):
+        client.force_authenticate(user=user)
+        first = client.get("/api/reservations/", {"page_size": 3}).json()
+        second = client.get(first["next"]).json()
+        back = client.get(second["previous"]).json()
+        assert back["results"] == first["results"]
+        assert back["previous"] is None
+
+    def test_stabilna_przy_wstawieniach(self, client, user, room, reservations):
+        client.force_authenticate(user=user)
+        first = client.get("/api/reservations/", {"page_size": 3}).json()
+        # nowa rezerwacja na początku listy nie przesuwa kolejnych stron
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.CONFIRMED,
+            start_at=_dt(2025, 4, 1, 9, 0),
+            end_at=_dt(2025, 4, 1, 10, 0),
+        )
+        seen = [x["id"] for x in first["results"]] + self._walk(client, first["next"])
+        assert len(seen) == len(set(seen)) == len(reservations)
+
+    def test_limit_page_size(self, client, user, reservations):
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"page_size": 10_000})
+        assert len(r.json()["results"]) == len(reservations)
+        r = client.get("/api/reservations/", {"page_size": 1})
+        assert len(r.json()["results"]) == 1
+
+    def test_nieprawidlowy_kursor_404(self, client, user):
+        client.force_authenticate(user=user)
+        r = client.get("/api/reservations/", {"cursor": "nie-kursor"})
+        assert r.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            ["garbage", 1],
+            ["2025-03-01T09:00:00+00:00", "abc"],
+            [{"a": 1}, 1],
+            [None, None],
+            ["2025-03-01T09:00:00+00:00", [1]],
+        ],
+    )
+    def test_podrobiony_kursor_404(self, client, user, reservations, values):
+        client.force_authenticate(user=user)
+        cursor = base64.urlsafe_b64encode(json.dumps({"v": values}).encode()).decode()
+        r = client.get("/api/reservations/", {"cursor": cursor})
+        assert r.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.django_db
-@patch("reservations.services.booking.expire_hold")
+@patch("reservations.services.booking.schedule_hold_expiry")
 class TestReservationsCreateAPI:
     def test_unauthenticated_401(self, mock_expire, client, room):
         r = client.post(
@@ -127,7 +219,7 @@ class TestReservationsCreateAPI:
             format="json",
         )
         assert r.status_code == status.HTTP_401_UNAUTHORIZED
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_validation_400(self, mock_expire, client, user, room):
         client.force_authenticate(user=user)
@@ -141,7 +233,7 @@ class TestReservationsCreateAPI:
             format="json",
         )
         assert r.status_code == status.HTTP_400_BAD_REQUEST
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
 
     def test_created_201(self, mock_expire, client, user, room):
         client.force_authenticate(user=user)
@@ -159,7 +251,7 @@ class TestReservationsCreateAPI:
         assert data["status"] == "pending"
         assert data["room"] == room.id
         assert "hold_expires_at" in data
-        mock_expire.apply_async.assert_called_once()
+        mock_expire.assert_called_once()
 
     def test_collision_409(self, mock_expire, client, user, room):
         Reservation.objects.create(
@@ -181,22 +273,29 @@ class TestReservationsCreateAPI:
         )
         assert r.status_code == status.HTTP_409_CONFLICT
         assert "jest obecnie zarezerwowana" in r.json().get("detail", "")
-        mock_expire.apply_async.assert_not_called()
+        mock_expire.assert_not_called()
+
+
+def _notifications():
+    return list(
+        OutboxEvent.objects.filter(task="reservations.tasks.send_notifications").values_list(
+            "args", flat=True
+        )
+    )
 
 
 @pytest.mark.django_db
-@patch("reservations.services.booking.send_notifications")
 class TestReservationsConfirmAPI:
-    def test_owner_200(self, mock_send, client, user, reservation):
+    def test_owner_200(self, client, user, reservation):
         client.force_authenticate(user=user)
         r = client.post(f"/api/reservations/{reservation.id}/confirm/")
         assert r.status_code == status.HTTP_200_OK
         assert r.json()["status"] == "confirmed"
         reservation.refresh_from_db()
         assert reservation.status == Reservation.Status.CONFIRMED
-        mock_send.delay.assert_called_once_with(reservation.id, "confirmed")
+        assert _notifications() == [[reservation.id, "confirmed"]]
 
-    def test_admin_200(self, mock_send, client, admin_user, user, room):
+    def test_admin_200(self, client, admin_user, user, room):
         res = Reservation.objects.create(
             user=user,
             room=room,
@@ -209,7 +308,7 @@ class TestReservationsConfirmAPI:
         assert r.status_code == status.HTTP_200_OK
         assert r.json()["status"] == "confirmed"
 
-    def test_non_owner_403(self, mock_send, client, user, room, role_user):
+    def test_non_owner_403(self, client, user, room, role_user):
         other = User.objects.create_user(
             username="other@ex.com", password="x", email="other@ex.com"
         )
@@ -224,31 +323,30 @@ class TestReservationsConfirmAPI:
         client.force_authenticate(user=other)
         r = client.post(f"/api/reservations/{res.id}/confirm/")
         assert r.status_code == status.HTTP_403_FORBIDDEN
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
 
-    def test_not_pending_400(self, mock_send, client, user, reservation):
+    def test_not_pending_400(self, client, user, reservation):
         reservation.status = Reservation.Status.CONFIRMED
         reservation.save(update_fields=["status"])
         client.force_authenticate(user=user)
         r = client.post(f"/api/reservations/{reservation.id}/confirm/")
         assert r.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
 
 
 @pytest.mark.django_db
-@patch("reservations.services.booking.send_notifications")
 class TestReservationsCancelAPI:
-    def test_owner_200(self, mock_send, client, user, reservation):
+    def test_owner_200(self, client, user, reservation):
         client.force_authenticate(user=user)
         r = client.post(f"/api/reservations/{reservation.id}/cancel/")
         assert r.status_code == status.HTTP_200_OK
         assert r.json()["status"] == "canceled"
         reservation.refresh_from_db()
         assert reservation.status == Reservation.Status.CANCELED
-        mock_send.delay.assert_called_once_with(reservation.id, "canceled")
+        assert _notifications() == [[reservation.id, "canceled"]]
 
-    def test_404(self, mock_send, client, user):
+    def test_404(self, client, user):
         client.force_authenticate(user=user)
         r = client.post("/api/reservations/99999/cancel/")
         assert r.status_code == status.HTTP_404_NOT_FOUND
-        mock_send.delay.assert_not_called()
+        assert _notifications() == []
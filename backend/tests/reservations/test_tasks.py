@@ -1,13 +1,14 @@
 """Testy zadań Celery: expire_hold, send_notifications, reconcile_pending."""
 
 from datetime import timedelta
+from unittest.mock import patch
 
 from django.utils import timezone
 
 import pytest
 
 from accounts.models import User
-from reservations.models import Reservation
+from reservations.models import OutboxEvent, Reservation
 from reservations.tasks import expire_hold, reconcile_pending, send_notifications
 from rooms.models import Room
 
@@ -160,3 +161,63 @@ class TestReconcilePending:
         reconcile_pending()
         r.refresh_from_db()
         assert r.status == Reservation.Status.CONFIRMED
+
+
+def _expired_holds(user, room, count):
+    return [
+        Reservation.objects.create(
+            user=user,
+            room=room,
+            status=Reservation.Status.PENDING,
+            start_at=_dt_offset(60 * (i + 1)),
+            end_at=_dt_offset(60 * (i + 1) + 30),
+            hold_expires_at=_dt_offset(-5),
+        ).id
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestReconcilePendingChunks:
+    @pytest.fixture(autouse=True)
+    def _chunk_size(self, settings):
+        settings.RESERVATION_RECONCILE_CHUNK_SIZE = 2
+
+    def test_partie_z_jednym_powiadomieniem(self, user, room):
+        ids = _expired_holds(user, room, 5)
+        assert reconcile_pending() == 5
+        batches = list(
+            OutboxEvent.objects.filter(task="reservations.tasks.send_notifications_batch")
+            .order_by("id")
+            .values_list("args", flat=True)
+        )
+        assert batches == [
+            [ids[0:2], "hold_expired"],
+            [ids[2:4], "hold_expired"],
+            [ids[4:5], "hold_expired"],
+        ]
+
+    def test_retry_kontynuuje_od_checkpointu(self, user, room):
+        from reservations.services import holds
+
+        ids = _expired_holds(user, room, 5)
+        real = holds.expire_due_holds
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(kwargs["after_id"])
+            if len(calls) == 2:
+                raise RuntimeError("db")
+            return real(*args, **kwargs)
+
+        with patch.object(holds, "expire_due_holds", side_effect=flaky):
+            with patch.object(
+                reconcile_pending, "retry", return_value=RuntimeError("retry")
+            ) as retry:
+                with pytest.raises(RuntimeError, match="retry"):
+                    reconcile_pending()
+        checkpoint = retry.call_args.kwargs["kwargs"]
+        assert checkpoint["after_id"] == ids[1] and checkpoint["canceled"] == 2
+
+        assert reconcile_pending(**checkpoint) == 5
+        assert not Reservation.objects.filter(status=Reservation.Status.PENDING).exists()
@@ -0,0 +1,148 @@
+"""Testy katalogu sal w cache (rooms.catalog): bajty odpowiedzi, unieważnianie, stampede."""
+
+import threading
+import time
+
+from django.core.cache import cache
+
+import pytest
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User, UserRole
+from rooms import catalog
+from rooms.models import Equipment, Room, RoomEquipment
+from rooms.serializers import RoomDetailSerializer, RoomListSerializer
+
+
+@pytest.fixture
+def admin(db):
+    user = User.objects.create_user(username="a1@ex.com", password="test", email="a1@ex.com")
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="admin")[0])
+    return user
+
+
+@pytest.fixture
+def rooms(db):
+    projector = Equipment.objects.create(name="Projektor")
+    a = Room.objects.create(name="Sala A", capacity=6, location="Parter")
+    b = Room.objects.create(name="Sala B")
+    RoomEquipment.objects.create(room=a, equipment=projector, qty=2)
+    return a, b
+
+
+def _admin_client(admin):
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@pytest.mark.django_db
+class TestCatalogEndpoints:
+    def test_lista_z_cache_bez_zapytan(self, rooms, django_assert_num_queries):
+        client = APIClient()
+        first = client.get("/api/rooms/")
+        expected = JSONRenderer().render(
+            RoomListSerializer(
+                Room.objects.prefetch_related("roomequipment_set__equipment"), many=True
+            ).data
+        )
+        assert first.content == expected
+        with django_assert_num_queries(0):
+            again = client.get("/api/rooms/")
+            not_modified = client.get("/api/rooms/", HTTP_IF_NONE_MATCH=first["ETag"])
+        assert again.content == expected
+        assert again["ETag"] == first["ETag"]
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_szczegoly_z_cache(self, rooms, django_assert_num_queries):
+        a, _b = rooms
+        client = APIClient()
+        a.refresh_from_db()
+        first = client.get(f"/api/rooms/{a.pk}/")
+        assert first.json() == RoomDetailSerializer(a).data
+        with django_assert_num_queries(0):
+            assert client.get(f"/api/rooms/{a.pk}/").content == first.content
+
+    def test_brak_sali_404(self, db):
+        assert APIClient().get("/api/rooms/999/").status_code == status.HTTP_404_NOT_FOUND
+        assert APIClient().get("/api/rooms/abc/").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_edycja_sali_uniewaznia(self, rooms, admin):
+        a, _b = rooms
+        client = APIClient()
+        etag = client.get("/api/rooms/")["ETag"]
+        client.get(f"/api/rooms/{a.pk}/")
+        _admin_client(admin).patch(f"/api/rooms/{a.pk}/", {"name": "Sala Z"}, format="json")
+        r = client.get("/api/rooms/", HTTP_IF_NONE_MATCH=etag)
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()[0]["name"] == "Sala Z"
+        assert client.get(f"/api/rooms/{a.pk}/").json()["name"] == "Sala Z"
+
+    def test_zmiana_sprzetu_uniewaznia(self, rooms, admin):
+        a, _b = rooms
+        client = APIClient()
+        client.get("/api/rooms/")
+        equipment = Equipment.objects.get()
+        _admin_client(admin).patch(
+            f"/api/equipment/{equipment.pk}/", {"name": "Rzutnik"}, format="json"
+        )
+        assert client.get("/api/rooms/").json()[0]["equipment"][0]["name"] == "Rzutnik"
+        _admin_client(admin).patch(f"/api/rooms/{a.pk}/", {"equipment": []}, format="json")
+        assert client.get("/api/rooms/").json()[0]["equipment"] == []
+
+    def test_usuniecie_sali_uniewaznia(self, rooms, admin):
+        a, b = rooms
+        client = APIClient()
+        client.get("/api/rooms/")
+        client.get(f"/api/rooms/{b.pk}/")
+        _admin_client(admin).delete(f"/api/rooms/{b.pk}/")
+        assert [room["id"] for room in client.get("/api/rooms/").json()] == [a.pk]
+        assert client.get(f"/api/rooms/{b.pk}/").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_fields_poza_cache(self, rooms):
+        r = APIClient().get("/api/rooms/", {"fields": "id"})
+        assert r.json() == [{"id": rooms[0].pk}, {"id": rooms[1].pk}]
+
+
+class TestCachedEntry:
+    def test_stampede_jedna_przebudowa(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.1)
+            return b"[]"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(catalog.cached_entry("t", build)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert {entry.body for entry in results} == {b"[]"}
+
+    def test_blokady_procesu_nie_rosna_z_generacjami(self):
+        for _ in range(100):
+            catalog.cached_entry("t", lambda: b"[]")
+            catalog._bump()
+        assert len(catalog._local_locks) == catalog.LOCK_STRIPES
+
+    def test_obca_blokada_czekanie_i_fallback(self, monkeypatch):
+        monkeypatch.setattr(catalog, "WAIT_TIMEOUT", 0.1)
+        key = catalog.CATALOG_KEY.format(generation=catalog.generation(), name="t")
+        cache.add(f"{key}:lock", 1)  # przebudowa trwa w innym procesie
+        entry = catalog.cached_entry("t", lambda: b"{}")
+        assert entry.body == b"{}"
+        assert cache.get(key) is None  # bez zapisu – wpis należy do właściciela blokady
+
+    def test_generacja_po_utracie_licznika(self, db):
+        before = catalog.generation()
+        cache.delete(catalog.GENERATION_KEY)
+        catalog.invalidate()
+        assert catalog.generation() != before
@@ -0,0 +1,119 @@
+"""Testy podsumowania sprzętu sali (rooms.services) i komendy rebuild_equipment_summary."""
+
+from django.core.management import CommandError, call_command
+
+import pytest
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User, UserRole
+from reservations.services.availability import _room_candidates
+from rooms import catalog, signals
+from rooms.models import Equipment, Room, RoomEquipment
+from rooms.services import equipment_mask, find_drift
+
+
+@pytest.fixture
+def admin(db):
+    user = User.objects.create_user(username="a1@ex.com", password="test", email="a1@ex.com")
+    UserRole.objects.create(user=user, role=Role.objects.get_or_create(name="admin")[0])
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def equipment(db):
+    return [Equipment.objects.create(name=name) for name in ("Projektor", "Tablica", "Kamera")]
+
+
+@pytest.fixture
+def room(equipment):
+    room = Room.objects.create(name="Sala A")
+    RoomEquipment.objects.create(room=room, equipment=equipment[0], qty=2)
+    RoomEquipment.objects.create(room=room, equipment=equipment[1])
+    return room
+
+
+def _summary(room):
+    room.refresh_from_db()
+    return room.equipment_summary, room.equipment_mask
+
+
+@pytest.mark.django_db
+class TestSummary:
+    def test_zapis_room_equipment(self, room, equipment):
+        summary, mask = _summary(room)
+        assert summary == [
+            {"id": equipment[0].pk, "name": "Projektor", "qty": 2},
+            {"id": equipment[1].pk, "name": "Tablica", "qty": 1},
+        ]
+        assert mask == equipment_mask([equipment[0].pk, equipment[1].pk])
+
+    def test_save_equipment_jedno_przeliczenie(self, room, equipment, admin):
+        payload = {"equipment": [{"equipment_id": equipment[2].pk, "qty": 3}]}
+        r = admin.patch(f"/api/rooms/{room.pk}/", payload, format="json")
+        assert r.json()["equipment"] == [{"id": equipment[2].pk, "name": "Kamera", "qty": 3}]
+        assert _summary(room)[1] == equipment_mask([equipment[2].pk])
+
+    def test_zmiana_nazwy_i_usuniecie_sprzetu(self, room, equipment):
+        equipment[0].name = "Rzutnik"
+        equipment[0].save()
+        assert _summary(room)[0][0]["name"] == "Rzutnik"
+        equipment[1].delete()
+        summary, mask = _summary(room)
+        assert [item["id"] for item in summary] == [equipment[0].pk]
+        assert mask == equipment_mask([equipment[0].pk])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_katalog_po_zmianie_nazwy_w_autocommit(self, room, equipment, monkeypatch):
+        original = signals.schedule_refresh
+
+        def read_catalog_first(room_ids):
+            catalog.room_list()  # czytelnik między unieważnieniem a przeliczeniem
+            original(room_ids)
+
+        monkeypatch.setattr(signals, "schedule_refresh", read_catalog_first)
+        equipment[0].name = "Rzutnik"
+        equipment[0].save()
+        assert b"Rzutnik" in catalog.room_list().body
+
+    def test_maska_poza_zakresem(self):
+        assert equipment_mask([1, 62]) == (1 << 1) | (1 << 62)
+        assert equipment_mask([63]) is None
+
+
+@pytest.mark.django_db
+class TestRoomCandidates:
+    def test_filtr_po_masce(self, room, equipment, django_assert_num_queries):
+        other = Room.objects.create(name="Sala B")
+        RoomEquipment.objects.create(room=other, equipment=equipment[0])
+        wanted = [equipment[0].pk, equipment[1].pk]
+        with django_assert_num_queries(1) as ctx:
+            assert list(_room_candidates(equipment_ids=wanted)) == [room]
+        assert "room_equipment" not in ctx.captured_queries[0]["sql"]
+        assert list(_room_candidates(equipment_ids=[equipment[0].pk])) == [room, other]
+
+    def test_id_poza_maska_zlaczenie(self, room, equipment):
+        big = Equipment.objects.create(id=100, name="Nagłośnienie")
+        RoomEquipment.objects.create(room=room, equipment=big)
+        assert list(_room_candidates(equipment_ids=[big.pk, equipment[0].pk])) == [room]
+
+
+@pytest.mark.django_db
+class TestRebuildCommand:
+    def test_check_i_naprawa(self, room, equipment):
+        Room.objects.filter(pk=room.pk).update(equipment_summary=[], equipment_mask=0)
+        assert find_drift() == [room.pk]
+        with pytest.raises(CommandError, match="1 salach"):
+            call_command("rebuild_equipment_summary", "--check")
+        call_command("rebuild_equipment_summary")
+        assert find_drift() == []
+        call_command("rebuild_equipment_summary", "--check")
+        assert len(_summary(room)[0]) == 2
+
+    def test_api_po_przebudowie(self, room):
+        Room.objects.filter(pk=room.pk).update(equipment_summary=[])
+        client = APIClient()
+        assert client.get("/api/rooms/").json()[0]["equipment"] == []
+        call_command("rebuild_equipment_summary", "--all")
+        assert len(client.get("/api/rooms/").json()[0]["equipment"]) == 2
@@ -89,6 +89,16 @@ export interface Reservation {
   updated_at: string
 }
 
+/** [id, start_offset, end_offset, status] – offsety w sekundach od `from` osi czasu */
+export type CalendarEntry = [number, number, number, ReservationStatusValue]
+
+export interface CalendarTimeline {
+  from: string
+  to: string
+  rooms: Record<string, string>
+  timeline: Record<string, CalendarEntry[]>
+}
+
 export interface ReservationCreate {
   room_id: number
   start_at: string
@@ -108,6 +118,7 @@ export interface AdminUser {
   first_name: string
   last_name: string
   is_admin: boolean
+  roles?: string[]
   last_login: string | null
   created_at: string
   updated_at?: string
@@ -1,10 +1,11 @@
 import { defineStore } from "pinia"
 import { ref, computed } from "vue"
 import { api } from "@/api/client"
-import type { Reservation, ReservationCreate } from "@/api/types"
+import type { CalendarTimeline, Reservation, ReservationCreate } from "@/api/types"
 
 export const useReservationsStore = defineStore("reservations", () => {
   const list = ref<Reservation[]>([])
+  const calendar = ref<CalendarTimeline | null>(null)
   const loading = ref(false)
   const error = ref<string | null>(null)
 
@@ -18,7 +19,10 @@ export const useReservationsStore = defineStore("reservations", () => {
     loading.value = true
     error.value = null
     try {
-      const { data } = await api.get<Reservation[]>("/reservations/", { params })
+      // Cała lista bez paginacji kursorowej (paginate=false – jawny opt-in API)
+      const { data } = await api.get<Reservation[]>("/reservations/", {
+        params: { ...params, paginate: "false" },
+      })
       list.value = data
       return data
     } catch (e: unknown) {
@@ -30,6 +34,29 @@ export const useReservationsStore = defineStore("reservations", () => {
     }
   }
 
+  /** Zwarta oś czasu sal (GET /calendar) – dla widoku kalendarza zamiast pełnej listy. */
+  async function fetchCalendar(params: { from: string; to: string; room_ids?: number[] }) {
+    loading.value = true
+    error.value = null
+    try {
+      const { data } = await api.get<CalendarTimeline>("/calendar", {
+        params: {
+          from: params.from,
+          to: params.to,
+          room_ids: params.room_ids?.join(","),
+        },
+      })
+      calendar.value = data
+      return data
+    } catch (e: unknown) {
+      const err = e as { message?: string }
+      error.value = err?.message ?? "Błąd ładowania kalendarza"
+      throw e
+    } finally {
+      loading.value = false
+    }
+  }
+
   async function fetchOne(id: number) {
     loading.value = true
     error.value = null
@@ -101,12 +128,14 @@ export const useReservationsStore = defineStore("reservations", () => {
 
   return {
     list,
+    calendar,
     loading,
     error,
     listCount,
     isListEmpty,
     hasError,
     fetchList,
+    fetchCalendar,
     fetchOne,
     create,
     confirm,
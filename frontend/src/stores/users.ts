@@ -24,7 +24,10 @@ export const useUsersStore = defineStore("users", () => {
     loading.value = true
     error.value = null
     try {
-      const { data } = await api.get<AdminUser[]>("/admin/users/")
+      // Cała lista bez paginacji kursorowej (paginate=false – jawny opt-in API)
+      const { data } = await api.get<AdminUser[]>("/admin/users/", {
+        params: { paginate: "false" },
+      })
       list.value = data
       return data
     } catch (e: unknown) {